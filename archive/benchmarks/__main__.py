@@ -0,0 +1,109 @@
+"""
+Runs the benchmark suite for the hot paths of tgintegration (see `benchmarks/cases.py`) offline and writes the
+results to a JSON file.
+
+Usage:
+
+    python -m benchmarks [-k PATTERN] [--output FILE] [--compare BASELINE] [--threshold 0.2]
+
+To guard against regressions, store the results of a run on the base revision and compare later runs against it:
+
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --compare baseline.json
+
+In comparison mode, the exit code is 1 if the median time per operation of any benchmark grew by more than the
+threshold.
+"""
+import argparse
+import asyncio
+import sys
+from typing import List
+
+import benchmarks.cases  # noqa: F401 (registers the benchmarks)
+from benchmarks.runner import compare
+from benchmarks.runner import find_regressions
+from benchmarks.runner import get_benchmarks
+from benchmarks.runner import measure
+from benchmarks.runner import read_results
+from benchmarks.runner import Result
+from benchmarks.runner import write_results
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k", dest="pattern", help="Only run benchmarks whose name matches"
+    )
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="The file to write the results to (default: %(default)s)",
+    )
+    parser.add_argument("--compare", metavar="BASELINE", help="Results to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown that counts as a regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Number of timed repeats per benchmark (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Factor for the number of iterations per repeat (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> List[Result]:
+    results = []
+    print(f"{'benchmark':<32} {'median µs':>12} {'min µs':>10} {'max µs':>10}")
+    for bench in get_benchmarks(args.pattern):
+        result = await measure(bench, repeats=args.repeats, scale=args.scale)
+        print(
+            f"{result.name:<32} {result.median_us:>12.2f} "
+            f"{result.min_us:>10.2f} {result.max_us:>10.2f}"
+        )
+        results.append(result)
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    write_results(args.output, results)
+    print(f"\nResults written to {args.output}")
+
+    if not args.compare:
+        return 0
+
+    comparisons = compare(read_results(args.compare), results)
+    regressions = find_regressions(comparisons, args.threshold)
+
+    print(f"\n{'benchmark':<32} {'baseline µs':>12} {'current µs':>12} {'change':>8}")
+    for c in comparisons:
+        if c.ratio is None:
+            print(f"{c.name:<32} {'-':>12} {c.current_us:>12.2f} {'new':>8}")
+            continue
+        flag = "  REGRESSION" if c in regressions else ""
+        print(
+            f"{c.name:<32} {c.baseline_us:>12.2f} {c.current_us:>12.2f} "
+            f"{c.ratio - 1:>+8.1%}{flag}"
+        )
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}."
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
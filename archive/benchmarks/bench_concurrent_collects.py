@@ -0,0 +1,101 @@
+"""
+Compares the event loop overhead of waiting with deadlines at 10, 100 and 1000 concurrent collectors.
+
+`wait_for` is the former approach of wrapping every wait in `asyncio.wait_for`, `scheduler` uses the shared
+`DeadlineScheduler`. The `collect` rows run complete collectors (routing, recording and waiting) against an in-memory
+client, with every collector receiving a few messages before its consecutive wait expires.
+
+Usage: `python -m benchmarks.bench_concurrent_collects`
+"""
+import asyncio
+import gc
+import time
+
+from benchmarks.utils import make_message
+from benchmarks.utils import started_client
+from tgintegration import BotController
+from tgintegration.collector import collect
+from tgintegration.deadline_scheduler import get_scheduler
+from tgintegration.expectation import Expectation
+from tgintegration.timeout_settings import TimeoutSettings
+from tgintegration.update_recorder import MessageRecorder
+from tgintegration.update_router import get_router
+
+CONCURRENCY = (10, 100, 1000)
+MESSAGES_PER_COLLECT = 3
+TIMEOUT = 0.2
+
+
+async def wait_with_wait_for(recorder: MessageRecorder):
+    try:
+        await asyncio.wait_for(
+            recorder.wait_until(lambda msgs: len(msgs) > 10), timeout=TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        pass
+
+
+async def wait_with_scheduler(recorder: MessageRecorder):
+    scheduler = get_scheduler()
+    try:
+        await scheduler.wait(recorder.wait_for_count(11), scheduler.now() + TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def bench_waits(wait, concurrency: int) -> float:
+    recorders = [MessageRecorder() for _ in range(concurrency)]
+    gc.collect()  # Don't charge the garbage of the previous run to this one
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(wait(r) for r in recorders))
+    assert time.perf_counter() - started >= TIMEOUT
+    return time.process_time() - cpu_started
+
+
+async def bench_collects(concurrency: int) -> float:
+    client = await started_client()
+    controller = BotController(client, 0)
+    router = await get_router(client)
+
+    async def run_collect(chat_id: int):
+        async with collect(
+            controller,
+            expectation=Expectation(min_messages=MESSAGES_PER_COLLECT),
+            timeouts=TimeoutSettings(max_wait=1, wait_consecutive=TIMEOUT / 4),
+            chat_id=chat_id,
+        ):
+            pass
+
+    async def feed():
+        for _ in range(MESSAGES_PER_COLLECT):
+            await asyncio.sleep(0.01)
+            for chat_id in range(concurrency):
+                await router._on_message(client, make_message(chat_id))
+
+    gc.collect()
+    cpu_started = time.process_time()
+    await asyncio.gather(feed(), *(run_collect(c) for c in range(concurrency)))
+    cpu = time.process_time() - cpu_started
+
+    await client.stop()
+    return cpu
+
+
+async def run():
+    print(f"{'concurrency':>12} {'variant':>10} {'cpu ms':>10} {'µs/collect':>12}")
+    for concurrency in CONCURRENCY:
+        results = {
+            "wait_for": await bench_waits(wait_with_wait_for, concurrency),
+            "scheduler": await bench_waits(wait_with_scheduler, concurrency),
+            "collect": await bench_collects(concurrency),
+        }
+        for variant, cpu in results.items():
+            print(
+                f"{concurrency:>12} {variant:>10} {cpu * 1e3:>10.2f} "
+                f"{cpu / concurrency * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+"""
+Stress benchmark for transient handler groups.
+
+Opens and closes `add_handlers_transient` many times in a row against an in-memory dispatcher and prints the
+average cost per collect for each slice of the run. With groups being reclaimed, the cost stays flat no matter how
+many collects came before.
+
+Usage: `python -m benchmarks.bench_handler_groups [num_collects]`
+"""
+import asyncio
+import sys
+import time
+
+from pyrogram.handlers import EditedMessageHandler
+from pyrogram.handlers import MessageHandler
+
+from benchmarks.utils import started_client
+from tgintegration.handler_utils import add_handlers_transient
+
+NUM_COLLECTS = 100_000
+NUM_SLICES = 10
+
+
+async def run(num_collects: int = NUM_COLLECTS, num_slices: int = NUM_SLICES):
+    client = await started_client()
+
+    async def noop(_, __):
+        pass
+
+    handlers = [MessageHandler(noop), EditedMessageHandler(noop)]
+    slice_size = max(num_collects // num_slices, 1)
+
+    print(f"{'collects':>10} {'µs/collect':>12} {'groups':>8}")
+    for n in range(num_slices):
+        started = time.perf_counter()
+        for _ in range(slice_size):
+            async with add_handlers_transient(client, handlers):
+                pass
+        elapsed = time.perf_counter() - started
+
+        print(
+            f"{(n + 1) * slice_size:>10} "
+            f"{elapsed / slice_size * 1e6:>12.2f} "
+            f"{len(client.dispatcher.groups):>8}"
+        )
+
+    await client.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_COLLECTS))
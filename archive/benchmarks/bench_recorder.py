@@ -0,0 +1,51 @@
+"""
+Microbenchmark for the per-message cost of `MessageRecorder.record_message`.
+
+Simulates a long collect: Before every message, a collector registers a count-based waiter for the next message and
+abandons another one (as happens on a timeout), and a few custom predicate waiters stay pending throughout. The
+average cost per recorded message is printed for each slice of the run and stays flat, as fired and abandoned
+waiters are dropped and predicates only look at the new message.
+
+Usage: `python -m benchmarks.bench_recorder [num_messages]`
+"""
+import asyncio
+import sys
+import time
+
+from pyrogram.types import Message
+
+from tgintegration.update_recorder import MessageRecorder
+
+NUM_MESSAGES = 50_000
+NUM_SLICES = 10
+NUM_PREDICATE_WAITERS = 5
+
+
+async def run(num_messages: int = NUM_MESSAGES, num_slices: int = NUM_SLICES):
+    recorder = MessageRecorder()
+    for n in range(NUM_PREDICATE_WAITERS):
+        recorder.waiter(lambda m, n=n: m.text == f"never {n}")
+
+    message = Message(id=1, text="hi")
+    slice_size = max(num_messages // num_slices, 1)
+
+    print(f"{'messages':>10} {'µs/message':>12} {'waiters':>8}")
+    for n in range(num_slices):
+        started = time.perf_counter()
+        for _ in range(slice_size):
+            recorder.wait_for_count(len(recorder.messages) + 1)
+            recorder.wait_for_count(len(recorder.messages) + 2).cancel()
+            await recorder.record_message(None, message)
+        elapsed = time.perf_counter() - started
+
+        await asyncio.sleep(0)  # Let the done callbacks of abandoned waiters run
+        num_waiters = len(recorder._count_waiters) + len(recorder._predicate_waiters)
+        print(
+            f"{(n + 1) * slice_size:>10} "
+            f"{elapsed / slice_size * 1e6:>12.2f} "
+            f"{num_waiters:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_MESSAGES))
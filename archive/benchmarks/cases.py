@@ -0,0 +1,196 @@
+"""
+The hot paths of tgintegration, measured offline against the `FakeClient`.
+"""
+from contextlib import asynccontextmanager
+
+from pyrogram.handlers import EditedMessageHandler
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import KeyboardButton
+from pyrogram.types import ReplyKeyboardMarkup
+
+from benchmarks.runner import benchmark
+from benchmarks.utils import make_message
+from benchmarks.utils import started_client
+from tgintegration import BotController
+from tgintegration import InlineKeyboard
+from tgintegration import InlineResult
+from tgintegration import InlineResultContainer
+from tgintegration import Response
+from tgintegration.collector import collect
+from tgintegration.expectation import Expectation
+from tgintegration.fake import FakeBot
+from tgintegration.handler_utils import add_handlers_transient
+from tgintegration.timeout_settings import TimeoutSettings
+from tgintegration.update_recorder import MessageRecorder
+from tgintegration.update_router import get_router
+from tgintegration.update_router import route_handlers_transient
+
+CHAT_ID = 42
+NUM_ROWS = 100
+BUTTONS_PER_ROW = 8
+NUM_INLINE_RESULTS = 1000
+NUM_RESPONSE_MESSAGES = 50
+
+
+async def _noop(_, __):
+    pass
+
+
+@benchmark("handlers.add_remove_group", iterations=10_000)
+@asynccontextmanager
+async def add_remove_handler_group():
+    """
+    Registers a message and an edited message handler in a new group and removes them again.
+    """
+    client = await started_client()
+    handlers = [MessageHandler(_noop), EditedMessageHandler(_noop)]
+
+    async def operation():
+        async with add_handlers_transient(client, handlers):
+            pass
+
+    yield operation
+    await client.stop()
+
+
+@benchmark("handlers.add_remove_route", iterations=10_000)
+@asynccontextmanager
+async def add_remove_route():
+    """
+    Routes a message and an edited message handler to a chat and removes them again.
+    """
+    client = await started_client()
+    await get_router(client)
+    handlers = [MessageHandler(_noop), EditedMessageHandler(_noop)]
+
+    async def operation():
+        async with route_handlers_transient(client, CHAT_ID, handlers):
+            pass
+
+    yield operation
+    await client.stop()
+
+
+@benchmark("recorder.record_message", iterations=20_000)
+@asynccontextmanager
+async def record_message():
+    """
+    Records a message while a collector waits for the next one.
+    """
+    recorder = MessageRecorder()
+    message = make_message(CHAT_ID)
+
+    async def operation():
+        recorder.wait_for_count(len(recorder.messages) + 1)
+        await recorder.record_message(None, message)
+
+    yield operation
+    recorder.stop()
+
+
+@benchmark("collect.setup_teardown", iterations=2_000)
+@asynccontextmanager
+async def collect_setup_teardown():
+    """
+    Runs a complete collect whose single expected message is routed to it right away.
+    """
+    client = await started_client()
+    controller = BotController(client, CHAT_ID)
+    router = await get_router(client)
+    message = make_message(CHAT_ID)
+    timeouts = TimeoutSettings(max_wait=10)
+
+    async def operation():
+        async with collect(
+            controller,
+            expectation=Expectation(min_messages=1, max_messages=1),
+            timeouts=timeouts,
+            chat_id=CHAT_ID,
+        ):
+            await router._on_message(client, message)
+
+    yield operation
+    await client.stop()
+
+
+@benchmark("inline_keyboard.find_button", iterations=500)
+@asynccontextmanager
+async def find_button():
+    """
+    Finds the last button of a keyboard with 800 buttons by pattern and by index.
+    """
+    rows = [
+        [
+            InlineKeyboardButton(f"Button {r}.{b}", callback_data=f"{r}.{b}")
+            for b in range(BUTTONS_PER_ROW)
+        ]
+        for r in range(NUM_ROWS)
+    ]
+    keyboard = InlineKeyboard(None, CHAT_ID, 1, rows)
+    last = f"Button {NUM_ROWS - 1}.{BUTTONS_PER_ROW - 1}"
+
+    def operation():
+        keyboard.find_button(last)
+        keyboard.find_button(index=-1)
+
+    yield operation
+
+
+@benchmark("inline_results.find_results", iterations=100)
+@asynccontextmanager
+async def find_results():
+    """
+    Searches 1000 inline results by title and description.
+    """
+    results = [
+        InlineResult(
+            None,
+            FakeBot.article(str(i), f"Title {i}", description=f"Description {i}"),
+            query_id=1,
+        )
+        for i in range(NUM_INLINE_RESULTS)
+    ]
+    container = InlineResultContainer(
+        None, "", None, None, results, gallery=False, switch_pm=None, users=[]
+    )
+
+    def operation():
+        container.find_results(
+            title_pattern=r"Title \d*7$", description_pattern=r"Description 99"
+        )
+
+    yield operation
+
+
+@benchmark("response.properties", iterations=1_000)
+@asynccontextmanager
+async def response_properties():
+    """
+    Reads the text and keyboards of a fresh response with 50 messages.
+    """
+    recorder = MessageRecorder()
+    for n in range(NUM_RESPONSE_MESSAGES):
+        if n % 10 == 0:
+            markup = InlineKeyboardMarkup(
+                [[InlineKeyboardButton(f"{n}", callback_data=f"{n}")]]
+            )
+        elif n % 10 == 5:
+            markup = ReplyKeyboardMarkup([[KeyboardButton(f"{n}")]])
+        else:
+            markup = None
+        await recorder.record_message(
+            None, make_message(CHAT_ID, f"Message {n}", reply_markup=markup)
+        )
+
+    def operation():
+        response = Response(None, recorder)
+        response.full_text
+        response.num_messages
+        response.inline_keyboards
+        response.reply_keyboard
+        response.keyboard_buttons
+        response.last_message_timestamp
+
+    yield operation
@@ -0,0 +1,144 @@
+"""
+Registry, timing loop and result files of the benchmark suite.
+"""
+import asyncio
+import gc
+import json
+import platform
+import re
+import statistics
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncContextManager
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+CaseFactory = Callable[[], AsyncContextManager[Callable]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    factory: CaseFactory
+    iterations: int
+    description: str
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    repeats: int
+    median_us: float
+    min_us: float
+    max_us: float
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_us: Optional[float]
+    current_us: float
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.current_us / self.baseline_us if self.baseline_us else None
+
+
+_registry: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, iterations: int = 1000):
+    """
+    Registers an async context manager factory as a benchmark case. It sets everything up, yields the operation to
+    be measured (a function or coroutine function without arguments), and tears everything down afterwards.
+    """
+
+    def decorator(factory: CaseFactory) -> CaseFactory:
+        if name in _registry:
+            raise ValueError(f"A benchmark named '{name}' is already registered.")
+        _registry[name] = Benchmark(
+            name, factory, iterations, (factory.__doc__ or "").strip()
+        )
+        return factory
+
+    return decorator
+
+
+def get_benchmarks(pattern: str = None) -> List[Benchmark]:
+    compiled = re.compile(pattern) if pattern else None
+    return [
+        b for b in _registry.values() if compiled is None or compiled.search(b.name)
+    ]
+
+
+async def measure(bench: Benchmark, repeats: int = 5, scale: float = 1.0) -> Result:
+    """
+    Runs the benchmark's operation `iterations * scale` times in a row, `repeats` times, and reports the time per
+    operation.
+    """
+    iterations = max(int(bench.iterations * scale), 1)
+    timings = []
+
+    async with bench.factory() as operation:
+        is_async = asyncio.iscoroutinefunction(operation)
+        for _ in range(repeats):
+            gc.collect()  # Don't charge the garbage of the previous repeat to this one
+            started = time.perf_counter()
+            if is_async:
+                for _ in range(iterations):
+                    await operation()
+            else:
+                for _ in range(iterations):
+                    operation()
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+
+    return Result(
+        name=bench.name,
+        iterations=iterations,
+        repeats=repeats,
+        median_us=statistics.median(timings),
+        min_us=min(timings),
+        max_us=max(timings),
+    )
+
+
+def write_results(path: Union[str, Path], results: List[Result]) -> None:
+    data = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {r.name: asdict(r) for r in results},
+    }
+    Path(path).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def read_results(path: Union[str, Path]) -> Dict[str, Result]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {name: Result(**r) for name, r in data["results"].items()}
+
+
+def compare(baseline: Dict[str, Result], results: List[Result]) -> List[Comparison]:
+    return [
+        Comparison(
+            r.name,
+            baseline[r.name].median_us if r.name in baseline else None,
+            r.median_us,
+        )
+        for r in results
+    ]
+
+
+def find_regressions(
+    comparisons: List[Comparison], threshold: float
+) -> List[Comparison]:
+    """
+    Returns the comparisons whose median time per operation grew by more than the `threshold` (e.g. 0.2 for 20%).
+    """
+    return [c for c in comparisons if c.ratio is not None and c.ratio > 1 + threshold]
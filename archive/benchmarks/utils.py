@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pyrogram.enums import ChatType
+from pyrogram.types import Chat
+from pyrogram.types import Message
+
+from tgintegration.fake import FakeClient
+
+
+async def started_client(workers: int = 4) -> FakeClient:
+    client = FakeClient(workers=workers)
+    await client.start()
+    return client
+
+
+def make_message(chat_id: int, text: str = "hi", reply_markup=None) -> Message:
+    return Message(
+        id=1,
+        chat=Chat(id=chat_id, type=ChatType.PRIVATE),
+        date=datetime.now(),
+        text=text,
+        reply_markup=reply_markup,
+    )
@@ -1,91 +1,81 @@
+"""
+Creates session strings for the test agent account(s).
+
+The first session of every account is logged in interactively (or taken from the `SESSION_STRING` setting for the
+first account). All further sessions are then logged in concurrently, with their login codes read from the service
+notifications that the first session of their account receives.
+
+Settings (environment or `.env`):
+    API_ID, API_HASH: The Telegram API credentials.
+    TEST_AGENT_PHONE: The phone number(s) of the agent account(s), separated by commas.
+    SESSION_STRING: Optional existing session of the first account.
+"""
 import asyncio
-import re
+import sys
 from typing import List
-from unittest.mock import Mock
 
 from decouple import config
+from decouple import Csv
 from pyrogram import Client
-from pyrogram.types import Message
-from pyrogram.types import SentCode
 
-from tgintegration import BotController
-from tgintegration.collector import collect
-from tgintegration.expectation import Expectation
-from tgintegration.timeout_settings import TimeoutSettings
+from tgintegration.provisioning import SessionProvisioner
 
-clients: List[Client] = []
 
-
-async def create_session_string(test_mode: bool = False):
-    memory_client = Client(
+def make_client(phone_number: str, test_mode: bool, session_string: str = None):
+    return Client(
         name=":memory:",
         in_memory=True,
         api_id=config("API_ID"),
         api_hash=config("API_HASH"),
         test_mode=test_mode,
-        phone_number=config("TEST_AGENT_PHONE"),
+        phone_number=phone_number,
+        session_string=session_string,
     )
 
-    if len(clients) == 0:
-        await memory_client.start()
-        result = await memory_client.export_session_string()
-    else:
-        intercept_client = clients[0]
-
-        async def tg_service_notifications_filter(_, __, m: Message):
-            print(m)
-            return bool(m.from_user and m.from_user.first_name == "Telegram")
-
-        # TODO: Use standalone `collect` (https://github.com/JosXa/tgintegration/issues/19)
-        controller = Mock(BotController)
-        controller.configure_mock(client=intercept_client)
 
-        # noinspection PydanticTypeChecker
-        async with collect(
-            controller,
-            tg_service_notifications_filter,
-            expectation=Expectation(min_messages=1, max_messages=1),
-            timeouts=TimeoutSettings(max_wait=120),
-        ) as res:
-            sent_code = await initiate_send_code(memory_client)
+async def create_session_strings(
+    sessions_per_account: int, test_mode: bool = False
+) -> List[str]:
+    phone_numbers = config("TEST_AGENT_PHONE", cast=Csv())
+    existing_session = config("SESSION_STRING", default=None)
 
-        code = re.findall(r".*([0-9]{5}).*", res.full_text, re.DOTALL)[0]
-
-        await memory_client.sign_in(
-            memory_client.phone_number, sent_code.phone_code_hash, code
+    interceptors = {}
+    strings = []
+    try:
+        for n, phone_number in enumerate(phone_numbers):
+            client = make_client(
+                phone_number, test_mode, existing_session if n == 0 else None
+            )
+            await client.start()  # Asks for the login code on the console if needed
+            interceptors[phone_number] = client
+            strings.append(await client.export_session_string())
+
+        provisioner = SessionProvisioner(
+            lambda phone: make_client(phone, test_mode),
+            interceptors,
+            test_mode=test_mode,
         )
-        result = await memory_client.export_session_string()
-
-    if len(clients) >= 1:
-        await memory_client.stop()
-
-    clients.append(memory_client)
-    return result
-
-
-async def initiate_send_code(client: Client) -> SentCode:
-    is_authorized = await client.connect()
-    assert not is_authorized
-
-    await client.authorize()
-    sent_code = await client.send_code(client.phone_number)
-    assert sent_code.type == "app"
+        results = await provisioner.provision_many(
+            [p for p in phone_numbers for _ in range(sessions_per_account - 1)]
+        )
+    finally:
+        for client in interceptors.values():
+            await client.stop()
 
-    return sent_code
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"Failed to create a session: {result!r}", file=sys.stderr)
+        else:
+            strings.append(result)
+    return strings
 
 
 if __name__ == "__main__":
     N = 2
     TEST_MODE = False
 
-    strings = []
+    strings = asyncio.run(create_session_strings(N, test_mode=TEST_MODE))
 
-    try:
-        for _ in range(N):
-            strings.append(asyncio.run(create_session_string(test_mode=TEST_MODE)))
-    finally:
-        print(
-            f"\n============ {len(strings)}/{N} session strings created: ============"
-        )
-        for s in strings:
-            print(s)
+    print(f"\n============ {len(strings)} session strings created: ============")
+    for s in strings:
+        print(s)
@@ -0,0 +1,144 @@
+from unittest.mock import Mock
+
+import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import KeyboardButton
+from pyrogram.types import Message
+from pyrogram.types import ReplyKeyboardMarkup
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.containers import InlineKeyboard
+from tgintegration.containers import ReplyKeyboard
+from tgintegration.containers.digest import Change
+from tgintegration.containers.digest import diff_messages
+from tgintegration.containers.digest import message_digest
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+BTN_A = InlineKeyboardButton("a", callback_data="a")
+BTN_B = InlineKeyboardButton("b", callback_data="b")
+BTN_C = InlineKeyboardButton("c", callback_data="c")
+
+
+def inline_keyboard(rows) -> InlineKeyboard:
+    return InlineKeyboard(
+        Mock(BotController), chat_id=1, message_id=1, button_rows=rows
+    )
+
+
+def test_inline_keyboard_equality():
+    keyboard = inline_keyboard([[BTN_A, BTN_B], [BTN_C]])
+    same = inline_keyboard(
+        [[InlineKeyboardButton("a", callback_data="a"), BTN_B], [BTN_C]]
+    )
+
+    assert keyboard == same
+    assert len({keyboard, same}) == 1
+    # Additional rows or buttons on either side make a difference
+    assert keyboard != inline_keyboard([[BTN_A, BTN_B], [BTN_C], [BTN_A]])
+    assert inline_keyboard([[BTN_A, BTN_B], [BTN_C]]) != inline_keyboard([[BTN_A]])
+    assert keyboard != inline_keyboard([[BTN_A], [BTN_B, BTN_C]])
+    assert keyboard != inline_keyboard(
+        [[BTN_A, InlineKeyboardButton("b", callback_data="x")], [BTN_C]]
+    )
+
+    keyboard.rows = [[BTN_A]]
+    assert keyboard == inline_keyboard([[BTN_A]])
+
+
+def test_reply_keyboard_buttons_given_as_strings():
+    def reply_keyboard(rows) -> ReplyKeyboard:
+        return ReplyKeyboard(
+            Mock(BotController), chat_id=1, message_id=1, button_rows=rows
+        )
+
+    assert reply_keyboard([["Yes", "No"]]) == reply_keyboard(
+        [[KeyboardButton("Yes"), KeyboardButton("No")]]
+    )
+    assert reply_keyboard([["Yes", "No"]]) != reply_keyboard([["Yes"], ["No"]])
+
+
+def test_message_digest_covers_visible_content_only():
+    message = Message(id=1, text="Hello")
+
+    assert message_digest(message) == message_digest(Message(id=2, text="Hello"))
+    assert message_digest(message) != message_digest(Message(id=1, caption="Hello"))
+    assert message_digest(message) != message_digest(
+        Message(id=1, text="Hello", reply_markup=InlineKeyboardMarkup([[BTN_A]]))
+    )
+    # Cached on the message without showing up in it
+    assert "_tgi_digest" in message.__dict__
+    assert "_tgi_digest" not in str(message)
+
+
+def test_diff_messages():
+    old = Message(
+        id=1, text="Menu", reply_markup=InlineKeyboardMarkup([[BTN_A, BTN_B]])
+    )
+    new = Message(
+        id=2,
+        text="Menu",
+        reply_markup=InlineKeyboardMarkup([[BTN_A, BTN_C], [BTN_A]]),
+    )
+
+    assert diff_messages(old, new) == [
+        Change("message.keyboard[0][1]", BTN_B, BTN_C),
+        Change("message.keyboard[1]", None, [BTN_A]),
+    ]
+    assert diff_messages(old, Message(id=3, text="Other")) == [
+        Change("message.text", "Menu", "Other"),
+        Change("message.reply_markup", old.reply_markup, None),
+    ]
+    assert diff_messages(new, new) == []
+
+
+@pytest.mark.asyncio
+async def test_response_digest():
+    bot = FakeBot("menu_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("Welcome", delay=1)
+        await conversation.reply(
+            "Menu",
+            reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Help")]]),
+            delay=1,
+        )
+
+    @bot.on_command("help")
+    async def help_(conversation, message):
+        await conversation.reply("Welcome", delay=1)
+        await conversation.reply("Help", delay=1)
+
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(client, "@menu_bot", global_action_delay=0)
+    try:
+        responses = []
+        for command in ("start", "help", "start"):
+            async with controller.collect(count=2) as response:
+                await controller.send_command(command)
+            responses.append(response)
+
+        async with controller.collect(count=1) as partial:
+            await controller.send_command("start")
+            # The digest is brought up to date as messages arrive
+            before = partial.digest
+            with pytest.raises(TypeError):
+                hash(partial)
+    finally:
+        await client.stop()
+
+    first, other, again = responses
+    assert first == again and hash(first) == hash(again)
+    assert first != other
+    assert len(set(responses)) == 2
+
+    assert before != partial.digest
+    assert partial != first
+
+    assert first.diff(again) == []
+    text, markup = first.diff(other)
+    assert text == Change("messages[1].text", "Menu", "Help")
+    assert markup.path == "messages[1].reply_markup" and markup.new is None
@@ -0,0 +1,44 @@
+import pytest
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.containers import ResponseTiming
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+
+def test_durations_of_incomplete_timing():
+    timing = ResponseTiming(started=1.0)
+
+    assert timing.time_to_first_message is None
+    assert timing.gaps == []
+    assert timing.duration is None
+
+
+@pytest.mark.asyncio
+async def test_collect_records_timing():
+    bot = FakeBot("timed_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("One", delay=2)
+        await conversation.reply("Two", delay=0.5)
+        await conversation.reply("Three", delay=1.5)
+
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(client, "@timed_bot", global_action_delay=0)
+    try:
+        async with controller.collect(
+            count=3, max_wait=10, wait_consecutive=3
+        ) as response:
+            await controller.send_command("start")
+    finally:
+        await client.stop()
+
+    timing = response.timing
+    assert timing.action_duration == 0
+    assert timing.time_to_first_message == pytest.approx(2)
+    assert timing.gaps == pytest.approx([0.5, 1.5])
+    # Including the consecutive wait that makes sure no more than three messages arrive
+    assert timing.duration == pytest.approx(2 + 0.5 + 1.5 + 3)
+    assert timing.to_dict()["duration"] == timing.duration
@@ -0,0 +1,142 @@
+import asyncio
+import random
+from datetime import datetime
+
+import pytest
+from pyrogram import filters
+from pyrogram.types import Message
+
+from tgintegration import BotController
+from tgintegration.adaptive_wait import AdaptiveWait
+from tgintegration.adaptive_wait import StreamingQuantile
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+
+def make_messages(*timestamps: float):
+    messages = []
+    for ts in timestamps:
+        m = Message(id=1)
+        m.exact_timestamp = ts
+        messages.append(m)
+    return messages
+
+
+@pytest.mark.parametrize("quantile", [0.5, 0.9, 0.95])
+def test_streaming_quantile_uniform(quantile: float):
+    rnd = random.Random(1337)
+    estimator = StreamingQuantile(quantile)
+    for _ in range(20_000):
+        estimator.add(rnd.random())
+    assert estimator.value == pytest.approx(quantile, abs=0.02)
+
+
+def test_streaming_quantile_few_samples():
+    estimator = StreamingQuantile(0.5)
+    assert estimator.value is None
+    for x in (3, 1, 2):
+        estimator.add(x)
+    assert estimator.value == 2
+
+
+def test_adaptive_wait_uses_default_until_min_samples():
+    adaptive = AdaptiveWait(0.5, headroom=1.0, min_samples=3, minimum=0)
+
+    adaptive.observe(1, "start", make_messages(0, 1, 2))
+    assert adaptive.get_wait_consecutive(1, "start", default=5) == 5
+
+    adaptive.observe(1, "start", make_messages(10, 11))
+    assert adaptive.get_wait_consecutive(1, "start", default=5) == 1
+    assert adaptive.get_wait_consecutive(1, "help", default=5) == 5
+    assert adaptive.get_wait_consecutive(2, "start", default=5) == 5
+
+
+def test_adaptive_wait_bounds():
+    adaptive = AdaptiveWait(0.5, headroom=2, min_samples=1, minimum=0.5, maximum=3)
+
+    adaptive.observe(1, None, make_messages(0, 0.1))
+    assert adaptive.get_wait_consecutive(1, None) == 0.5
+
+    adaptive.observe(2, None, make_messages(0, 10))
+    assert adaptive.get_wait_consecutive(2, None) == 3
+
+
+def test_adaptive_wait_ignores_edits():
+    adaptive = AdaptiveWait(0.5, headroom=1.0, min_samples=1, minimum=0)
+
+    messages = make_messages(0, 1, 1.1)
+    messages[2].edit_date = datetime.now()
+    adaptive.observe(1, None, messages)
+
+    assert adaptive.get_wait_consecutive(1, None) == 1
+
+
+def test_adaptive_wait_records_cut_off_as_censored_gap():
+    adaptive = AdaptiveWait(0.9, headroom=1.5, min_samples=1, minimum=0)
+
+    # All gaps far below the cut-off: the response was most likely complete
+    adaptive.observe(1, None, make_messages(0, 0.1), cut_off=1)
+    assert adaptive.get_wait_consecutive(1, None) == pytest.approx(0.15)
+
+    # The longest gap came close to the cut-off: the next message may have been missed
+    adaptive.observe(2, None, make_messages(0, 0.8), cut_off=1)
+    assert adaptive.get_wait_consecutive(2, None) == pytest.approx(1.5)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_collects_learn_for_their_own_command():
+    bot = FakeBot("gap_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("start a", delay=0.5)
+        await conversation.reply("start b", delay=1)
+
+    @bot.on_command("help")
+    async def help_(conversation, message):
+        await conversation.reply("help a", delay=0.5)
+        await conversation.reply("help b", delay=2)
+
+    adaptive = AdaptiveWait(0.5, headroom=1.0, min_samples=1, minimum=0)
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(
+        client,
+        "@gap_bot",
+        global_action_delay=0,
+        wait_consecutive=3,
+        adaptive_wait=adaptive,
+    )
+
+    async def interact(command: str, delay: float):
+        await controller.clock.sleep(delay)
+        async with controller.collect(filters.regex(f"^{command}"), count=2):
+            await controller.send_command(command)
+            # Overlaps with the other interaction
+            await controller.clock.sleep(0.5)
+
+    try:
+        await controller.initialize()
+        await asyncio.gather(interact("start", 0), interact("help", 0.1))
+    finally:
+        await client.stop()
+
+    assert adaptive.get_wait_consecutive(controller.peer_id, "start") == 1
+    assert adaptive.get_wait_consecutive(controller.peer_id, "help") == 2
+
+
+def test_adaptive_wait_persistence(tmp_path):
+    path = tmp_path / "gaps.json"
+    adaptive = AdaptiveWait(0.9, min_samples=1, path=path)
+    adaptive.observe(1, "start", make_messages(*range(10)))
+    adaptive.save()
+
+    restored = AdaptiveWait(0.9, min_samples=1, path=path)
+    assert restored.get_wait_consecutive(1, "start") == adaptive.get_wait_consecutive(
+        1, "start"
+    )
+
+    assert (
+        AdaptiveWait(0.5, min_samples=1, path=path).get_wait_consecutive(1, "start")
+        is None
+    )
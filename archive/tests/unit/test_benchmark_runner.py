@@ -0,0 +1,49 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from benchmarks.runner import Benchmark
+from benchmarks.runner import compare
+from benchmarks.runner import find_regressions
+from benchmarks.runner import measure
+from benchmarks.runner import read_results
+from benchmarks.runner import Result
+from benchmarks.runner import write_results
+
+
+def make_result(name: str, median_us: float) -> Result:
+    return Result(name, 10, 3, median_us, median_us, median_us)
+
+
+@pytest.mark.asyncio
+async def test_measure_runs_operation_and_tears_down():
+    calls = []
+
+    @asynccontextmanager
+    async def factory():
+        yield lambda: calls.append(1)
+        calls.append("teardown")
+
+    result = await measure(Benchmark("b", factory, 100, ""), repeats=3, scale=0.5)
+
+    assert calls.count(1) == 150
+    assert calls[-1] == "teardown"
+    assert result.iterations == 50
+    assert result.min_us <= result.median_us <= result.max_us
+
+
+def test_results_roundtrip(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(path, [make_result("a", 1.5)])
+
+    assert read_results(path) == {"a": make_result("a", 1.5)}
+
+
+def test_find_regressions():
+    baseline = {"a": make_result("a", 10), "b": make_result("b", 10)}
+    comparisons = compare(
+        baseline, [make_result("a", 11), make_result("b", 13), make_result("c", 99)]
+    )
+
+    assert [c.name for c in find_regressions(comparisons, threshold=0.2)] == ["b"]
+    assert comparisons[2].ratio is None
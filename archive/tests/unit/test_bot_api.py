@@ -0,0 +1,270 @@
+import asyncio
+import itertools
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+
+from tgintegration import BotController
+from tgintegration.fake import BotApiBot
+from tgintegration.fake import BotApiServer
+from tgintegration.fake import FakeClient
+from tgintegration.fake.bot_api import read_http_message
+from tgintegration.fake.bot_api import write_http_response
+
+pytestmark = pytest.mark.asyncio
+
+
+async def api(api_url: str, method: str, form: bool = False, **params):
+    """
+    Calls the Bot API like a bot would, with a blocking HTTP client in a thread.
+    """
+    if form:
+        data = urllib.parse.urlencode(
+            {
+                k: v if isinstance(v, (str, int)) else json.dumps(v)
+                for k, v in params.items()
+            }
+        ).encode()
+        content_type = "application/x-www-form-urlencoded"
+    else:
+        data = json.dumps(params).encode()
+        content_type = "application/json"
+    request = urllib.request.Request(
+        f"{api_url}/{method}", data=data, headers={"Content-Type": content_type}
+    )
+
+    def send():
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read())
+
+    return await asyncio.get_running_loop().run_in_executor(None, send)
+
+
+async def run_polling_bot(url: str):
+    offset = 0
+    while True:
+        updates = (await api(url, "getUpdates", offset=offset, timeout=1))["result"]
+        for update in updates:
+            offset = update["update_id"] + 1
+            if "message" in update:
+                message = update["message"]
+                await api(
+                    url,
+                    "sendMessage",
+                    chat_id=message["chat"]["id"],
+                    text=f"Hello {message['from']['first_name']}",
+                    reply_markup={
+                        "inline_keyboard": [[{"text": "More", "callback_data": "more"}]]
+                    },
+                )
+            elif "callback_query" in update:
+                query = update["callback_query"]
+                await api(
+                    url,
+                    "editMessageText",
+                    chat_id=query["message"]["chat"]["id"],
+                    message_id=query["message"]["message_id"],
+                    text=f"More about {query['data']}",
+                )
+                await api(
+                    url, "answerCallbackQuery", callback_query_id=query["id"], text="OK"
+                )
+            elif "inline_query" in update:
+                query = update["inline_query"]
+                start = int(query["offset"] or 0)
+                await api(
+                    url,
+                    "answerInlineQuery",
+                    inline_query_id=query["id"],
+                    results=[
+                        {
+                            "type": "article",
+                            "id": str(i),
+                            "title": f"{query['query']} {i}",
+                            "input_message_content": {"message_text": str(i)},
+                        }
+                        for i in range(start, start + 2)
+                    ],
+                    next_offset=str(start + 2) if start < 2 else "",
+                )
+
+
+@asynccontextmanager
+async def emulated_bot(bot: BotApiBot) -> AsyncIterator[BotController]:
+    async with BotApiServer(bot) as server, FakeClient(bot) as client:
+        url = server.get_api_url(bot)
+        await api(
+            url,
+            "setMyCommands",
+            form=True,
+            commands=[{"command": "start", "description": "Start"}],
+        )
+        controller = BotController(
+            client, "@real_bot", global_action_delay=0, max_wait=5
+        )
+        await controller.initialize(start_client=False)
+
+        polling = asyncio.ensure_future(run_polling_bot(url))
+        try:
+            yield controller
+        finally:
+            polling.cancel()
+
+
+async def test_long_polling_bot():
+    bot = BotApiBot("real_bot")
+    async with emulated_bot(bot) as controller:
+        assert [c.command for c in controller.command_list] == ["start"]
+
+        async with controller.collect(count=1) as response:
+            await controller.send_command("start")
+        assert response.full_text == "Hello Test"
+
+        answer = await response.inline_keyboards[0].click("More")
+        assert answer.full_text == "More about more"
+
+        results = await controller.query_inline("item", limit=3)
+        assert [r.result.title for r in results.results] == [
+            "item 0",
+            "item 1",
+            "item 2",
+        ]
+
+
+async def test_webhook_bot_replying_with_a_method():
+    bot = BotApiBot("real_bot")
+    received = []
+
+    async def webhook(reader, writer):
+        _, headers, body = await read_http_message(reader)
+        update = json.loads(body)
+        received.append(headers.get("x-telegram-bot-api-secret-token"))
+        chat_id = update["message"]["chat"]["id"]
+        write_http_response(
+            writer,
+            200,
+            {"method": "sendMessage", "chat_id": chat_id, "text": "Via webhook"},
+            keep_alive=False,
+        )
+        await writer.drain()
+        writer.close()
+
+    webhook_server = await asyncio.start_server(webhook, "127.0.0.1", 0)
+    port = webhook_server.sockets[0].getsockname()[1]
+    try:
+        async with BotApiServer(bot) as server, FakeClient(bot) as client:
+            url = server.get_api_url(bot)
+            result = await api(
+                url,
+                "setWebhook",
+                url=f"http://127.0.0.1:{port}/hook",
+                secret_token="secret",
+            )
+            assert result == {"ok": True, "result": True}
+            assert (await api(url, "getUpdates"))["error_code"] == 409
+
+            controller = BotController(client, "@real_bot", max_wait=5)
+            async with controller.collect(count=1) as response:
+                await client.send_message("@real_bot", "Hi")
+
+        assert response.full_text == "Via webhook"
+        assert received == ["secret"]
+    finally:
+        webhook_server.close()
+
+
+async def test_stalled_webhook_does_not_block_the_client():
+    bot = BotApiBot("real_bot", answer_timeout=0.1)
+    stalled = asyncio.Event()
+
+    async def webhook(reader, writer):
+        await read_http_message(reader)
+        stalled.set()
+        await asyncio.sleep(60)
+
+    webhook_server = await asyncio.start_server(webhook, "127.0.0.1", 0)
+    port = webhook_server.sockets[0].getsockname()[1]
+    try:
+        async with BotApiServer(bot) as server, FakeClient(bot) as client:
+            url = server.get_api_url(bot)
+            await api(url, "setWebhook", url=f"http://127.0.0.1:{port}/hook")
+
+            await client.send_message("@real_bot", "Hi")
+            await asyncio.wait_for(client.settle(), 5)
+            assert stalled.is_set()
+    finally:
+        webhook_server.close()
+
+
+async def test_webhook_receives_updates_in_order():
+    bot = BotApiBot("real_bot")
+    arrivals = itertools.count()
+    received = []
+
+    async def webhook(reader, writer):
+        _, _, body = await read_http_message(reader)
+        # Later requests are answered sooner, which would reorder concurrent deliveries
+        await asyncio.sleep(0.05 * max(0, 3 - next(arrivals)))
+        received.append(json.loads(body)["message"]["text"])
+        write_http_response(writer, 200, {}, keep_alive=False)
+        await writer.drain()
+        writer.close()
+
+    webhook_server = await asyncio.start_server(webhook, "127.0.0.1", 0)
+    port = webhook_server.sockets[0].getsockname()[1]
+    try:
+        async with FakeClient(bot) as client:
+            for text in ("1", "2", "3"):
+                await client.send_message("@real_bot", text)
+            await client.settle()
+
+            await bot.call("setWebhook", {"url": f"http://127.0.0.1:{port}/hook"})
+            await client.send_message("@real_bot", "4")
+            await asyncio.wait_for(client.settle(), 5)
+    finally:
+        webhook_server.close()
+
+    assert received == ["1", "2", "3", "4"]
+
+
+async def test_stalled_webhook_counts_towards_the_answer_timeout():
+    bot = BotApiBot("real_bot", answer_timeout=0.2)
+
+    async def webhook(reader, writer):
+        await read_http_message(reader)
+        await asyncio.sleep(60)
+
+    webhook_server = await asyncio.start_server(webhook, "127.0.0.1", 0)
+    port = webhook_server.sockets[0].getsockname()[1]
+    loop = asyncio.get_running_loop()
+    try:
+        await bot.call("setWebhook", {"url": f"http://127.0.0.1:{port}/hook"})
+        started = loop.time()
+        assert await bot._push_query("callback_query", {"id": "1"}) is None
+        assert loop.time() - started < 0.3
+    finally:
+        webhook_server.close()
+
+
+async def test_errors():
+    bot = BotApiBot("real_bot")
+    async with BotApiServer(bot) as server:
+        unauthorized = await api(f"{server.url}/bot123:wrong", "getMe")
+        assert unauthorized["error_code"] == 401
+
+        url = server.get_api_url(bot)
+        assert (await api(url, "getMe"))["result"]["username"] == "real_bot"
+        assert (await api(url, "sendMessage", chat_id=1, text="Hi")) == {
+            "ok": False,
+            "error_code": 400,
+            "description": "Bad Request: chat not found",
+        }
+        assert (await api(url, "unknownMethod"))["error_code"] == 404
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from pyrogram import Client
+
+from tgintegration import BotController
+from tgintegration.inline_cache import InlineResultCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_page(ids: List[str], next_offset: str = "") -> SimpleNamespace:
+    return SimpleNamespace(
+        results=[SimpleNamespace(id=i) for i in ids],
+        next_offset=next_offset,
+        query_id=1,
+        gallery=False,
+        switch_pm=None,
+        users=[],
+        cache_time=300,
+    )
+
+
+def make_controller(pages: Dict[str, SimpleNamespace], log: List[str]) -> BotController:
+    async def get_inline_bot_results(peer_id, query, offset="", **kwargs):
+        log.append(f"request {offset!r}")
+        await asyncio.sleep(0.01)
+        return pages[offset]
+
+    client = Mock(Client)
+    client.configure_mock(get_inline_bot_results=get_inline_bot_results)
+    client.name = "test"
+
+    controller = BotController(client, "@bot")
+    controller.peer_id = 1
+    controller.peer_user = SimpleNamespace(is_bot=True, username="bot")
+    return controller
+
+
+PAGES = {
+    "": make_page(["a", "b"], "2"),
+    "2": make_page(["b", "c"], "4"),
+    "4": make_page(["d", "e"]),
+}
+
+
+async def test_iter_inline_dedupes_and_follows_next_offset():
+    log = []
+    controller = make_controller(PAGES, log)
+
+    ids = [r.id async for r in controller.iter_inline("q")]
+
+    assert ids == ["a", "b", "c", "d", "e"]
+    assert [entry for entry in log if entry.startswith("request")] == [
+        "request ''",
+        "request '2'",
+        "request '4'",
+    ]
+
+
+async def test_iter_inline_prefetches_next_page():
+    log = []
+    controller = make_controller(PAGES, log)
+
+    async for result in controller.iter_inline("q"):
+        log.append(f"consume {result.id}")
+        await asyncio.sleep(0.02)
+
+    # The second page is requested while the consumer is still busy with the first one
+    assert log[:4] == ["request ''", "consume a", "request '2'", "consume b"]
+
+
+@pytest.mark.parametrize("limit,expected", [(1, 1), (3, 3), (100, 5)])
+async def test_query_inline_respects_limit(limit: int, expected: int):
+    controller = make_controller(PAGES, [])
+
+    container = await controller.query_inline("q", limit=limit)
+
+    assert len(container.results) == expected
+
+
+async def test_query_inline_cache():
+    log = []
+    controller = make_controller(PAGES, log)
+    controller.inline_cache = InlineResultCache()
+
+    first = await controller.query_inline("q")
+    assert await controller.query_inline("q") is first
+    assert len(log) == 3
+
+    assert await controller.query_inline("q", use_cache=False) is not first
+    refreshed = await controller.query_inline("q", refresh_cache=True)
+    assert refreshed is not first
+    assert await controller.query_inline("q") is refreshed
+
+    assert await controller.query_inline("q", limit=1) is not refreshed
+    assert (controller.inline_cache.hits, controller.inline_cache.misses) == (2, 2)
@@ -0,0 +1,143 @@
+import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+
+from tgintegration import BotController
+from tgintegration.cassette import Cassette
+from tgintegration.cassette import CassetteRecorder
+from tgintegration.cassette import decode
+from tgintegration.cassette import encode
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import CassetteMismatchError
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+from tgintegration.fake import ReplayClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_bot() -> FakeBot:
+    bot = FakeBot("example_bot", commands={"menu": "Show a menu"})
+
+    @bot.on_command("menu")
+    async def menu(conversation, message):
+        await conversation.reply("Loading", delay=1)
+        await conversation.reply(
+            "Menu",
+            reply_markup=InlineKeyboardMarkup(
+                [[InlineKeyboardButton("Details", callback_data="details")]]
+            ),
+            delay=2,
+        )
+
+    @bot.on_callback_query("^details$")
+    async def details(conversation, query):
+        await conversation.edit(query.message.id, "Details", delay=0.5)
+
+    @bot.on_inline_query()
+    async def inline(query):
+        return [FakeBot.article(str(i), f"{query} {i}") for i in range(3)]
+
+    return bot
+
+
+async def converse(controller: BotController):
+    await controller.initialize()
+    try:
+        async with controller.collect(count=2) as response:
+            await controller.send_command("menu")
+        edited = await response.inline_keyboards[0].click("Details")
+        results = await controller.query_inline("item")
+        return (
+            [m.text for m in response.messages],
+            edited.full_text,
+            [r.result.title for r in results.results],
+        )
+    finally:
+        await controller.client.stop()
+
+
+async def record(tmp_path, clock: VirtualClock) -> str:
+    recorder = CassetteRecorder(clock)
+    controller = BotController(
+        FakeClient(make_bot(), clock=clock),
+        "@example_bot",
+        global_action_delay=0,
+        max_wait=10,
+        cassette=recorder,
+    )
+    await converse(controller)
+
+    path = str(tmp_path / "menu.cassette.json")
+    recorder.save(path)
+    return path
+
+
+def make_replay_controller(client: ReplayClient) -> BotController:
+    return BotController(client, "@example_bot", global_action_delay=0, max_wait=10)
+
+
+async def test_encodes_messages_with_keyboards():
+    bot = make_bot()
+    client = FakeClient(bot)
+    async with client:
+        await client.send_message("@example_bot", "/menu")
+        await client.settle()
+    message = client.get_history(bot.user.id)[-1]
+
+    restored = decode(encode(message), client)
+
+    assert restored.text == "Menu"
+    assert restored.date == message.date
+    assert restored.chat.id == message.chat.id
+    assert restored.reply_markup.inline_keyboard[0][0].callback_data == "details"
+    assert restored._client is client
+
+
+async def test_records_calls_and_messages(tmp_path):
+    cassette = Cassette.load(await record(tmp_path, VirtualClock()))
+
+    assert "send_message" in [c["call"] for c in cassette.calls]
+    assert "request_callback_answer" in [c["call"] for c in cassette.calls]
+    assert [m["edited"] for m in cassette.messages] == [False, False, True]
+    assert cassette.messages[1]["t"] - cassette.messages[0]["t"] == pytest.approx(2)
+
+
+async def test_replays_at_original_speed(tmp_path):
+    clock = VirtualClock()
+    path = await record(tmp_path, clock)
+
+    client = ReplayClient(path, clock=clock)
+    started = clock.now()
+
+    assert await converse(make_replay_controller(client)) == (
+        ["Loading", "Menu"],
+        "Details",
+        ["item 0", "item 1", "item 2"],
+    )
+    assert clock.now() - started == pytest.approx(3.5)
+    assert client.remaining_calls == []
+
+
+async def test_replays_as_fast_as_possible(tmp_path):
+    clock = VirtualClock()
+    client = ReplayClient(await record(tmp_path, clock), speed=0, clock=clock)
+    started = clock.now()
+
+    texts, edited, _ = await converse(make_replay_controller(client))
+
+    assert texts == ["Loading", "Menu"]
+    assert edited == "Details"
+    assert clock.now() == started
+
+
+async def test_reports_unrecorded_calls(tmp_path):
+    clock = VirtualClock()
+    client = ReplayClient(await record(tmp_path, clock), speed=0, clock=clock)
+    controller = make_replay_controller(client)
+    await controller.initialize()
+    try:
+        with pytest.raises(CassetteMismatchError, match="send_message"):
+            await controller.send_command("help")
+    finally:
+        await client.stop()
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from tgintegration import BotController
+from tgintegration.client_pool import ClientPool
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_clients(num_clients: int, num_bots: int):
+    bots = []
+    for i in range(num_bots):
+        bot = FakeBot(f"shard_{i}_bot")
+
+        @bot.on_command("start")
+        async def start(conversation, message):
+            await conversation.reply(f"Hi {conversation.client.name}", delay=1)
+
+        bots.append(bot)
+
+    clock = VirtualClock()
+    return [
+        FakeClient(*bots, name=f"agent_{i}", clock=clock) for i in range(num_clients)
+    ]
+
+
+async def test_spreads_peers_evenly_and_sticks_to_them():
+    pool = ClientPool(make_clients(3, 6))
+
+    accounts = [pool.assign(f"@shard_{i}_bot") for i in range(6)]
+
+    assert sorted(accounts) == [
+        "agent_0",
+        "agent_0",
+        "agent_1",
+        "agent_1",
+        "agent_2",
+        "agent_2",
+    ]
+    assert [pool.assign(f"@shard_{i}_bot") for i in range(6)] == accounts
+
+    pool.release("@shard_0_bot")
+    assert len(pool.pools[accounts[0]]) == 1
+
+
+async def test_accounts_in_flood_wait_leave_rotation():
+    clients = make_clients(2, 4)
+    pool = ClientPool(clients)
+    clock = pool.rate_limiter.clock
+
+    pool.rate_limiter.on_flood_wait("agent_0", "@shard_0_bot", 30)
+    assert not pool.is_available("agent_0")
+    assert pool.assign("@shard_0_bot") == "agent_1"
+    assert pool.assign("@shard_1_bot") == "agent_1"
+
+    clock.advance(30)
+    assert pool.is_available("agent_0")
+    assert pool.assign("@shard_2_bot") == "agent_0"
+
+    # When all accounts are flooded, the one that recovers first is chosen
+    pool.rate_limiter.on_flood_wait("agent_0", None, 20)
+    pool.rate_limiter.on_flood_wait("agent_1", None, 10)
+    assert pool.assign("@shard_3_bot") == "agent_1"
+
+
+async def test_runs_interactions_on_assigned_accounts():
+    clients = make_clients(2, 4)
+    peers = [f"@shard_{i}_bot" for i in range(4)]
+
+    async def start(controller):
+        async with controller.collect(count=1) as response:
+            await controller.send_command("start")
+        return response.full_text
+
+    async with ClientPool(clients, max_concurrency_per_client=1) as pool:
+        results = await pool.run(start, peers)
+        assert all(c.is_connected for c in clients)
+
+        for peer in peers:
+            assert results[peer] == f"Hi {pool.assign(peer)}"
+            controller = await pool.get_controller(peer)
+            assert controller.client.name == pool.assign(peer)
+
+    assert not any(c.is_connected for c in clients)
+
+
+async def test_unknown_peer_only_fails_its_own_interaction():
+    clients = make_clients(2, 2)
+    peers = ["@shard_0_bot", "@unknown_bot", "@shard_1_bot"]
+
+    async def start(controller):
+        async with controller.collect(count=1) as response:
+            await controller.send_command("start")
+        return response.full_text
+
+    async with ClientPool(clients) as pool:
+        results = await pool.run(start, peers)
+
+    assert results["@shard_0_bot"] == f"Hi {pool.assign('@shard_0_bot')}"
+    assert results["@shard_1_bot"] == f"Hi {pool.assign('@shard_1_bot')}"
+    assert "USERNAME_NOT_OCCUPIED" in str(results["@unknown_bot"])
+
+
+async def test_concurrent_sessions_initialize_a_controller_once(monkeypatch):
+    initialized = []
+    initialize = BotController.initialize
+
+    async def count_initialize(self, *args, **kwargs):
+        initialized.append(self.peer)
+        await initialize(self, *args, **kwargs)
+
+    monkeypatch.setattr(BotController, "initialize", count_initialize)
+    pool = ClientPool(make_clients(1, 2), max_concurrency_per_client=1)
+    pool.assign("@shard_1_bot")
+    active = []
+
+    async def use(peer):
+        async with pool.session(peer) as controller:
+            assert controller.peer_id
+            active.append(pool._active["agent_0"])
+            await asyncio.sleep(0)
+
+    try:
+        await asyncio.gather(*(use("@shard_0_bot") for _ in range(3)))
+    finally:
+        await pool.close()
+
+    # Neither the other peer of the account is initialized, nor sessions waiting for a slot count as load
+    assert initialized == ["@shard_0_bot"]
+    assert active == [1, 1, 1]
+
+
+async def test_requires_distinct_client_names():
+    clock = VirtualClock()
+    with pytest.raises(ValueError):
+        ClientPool([FakeClient(clock=clock), FakeClient(clock=clock)])
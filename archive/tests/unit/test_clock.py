@@ -0,0 +1,111 @@
+import asyncio
+import gc
+import time
+import weakref
+
+import pytest
+
+from tgintegration import BotController
+from tgintegration import InvalidResponseError
+from tgintegration.clock import VirtualClock
+from tgintegration.deadline_scheduler import get_scheduler
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_virtual_sleeps_keep_their_order():
+    clock = VirtualClock()
+    woken = []
+
+    async def sleeper(name: str, delay: float):
+        await clock.sleep(delay)
+        woken.append((name, clock.now()))
+
+    started = time.monotonic()
+    await asyncio.gather(sleeper("c", 300), sleeper("a", 100), sleeper("b", 200))
+
+    assert woken == [("a", 100), ("b", 200), ("c", 300)]
+    assert time.monotonic() - started < 1
+
+
+async def test_virtual_time_stands_still_while_busy():
+    clock = VirtualClock(start=1000)
+
+    async def busy():
+        for _ in range(100):
+            await asyncio.sleep(0)
+        return clock.now()
+
+    assert await asyncio.gather(busy(), clock.sleep(5)) == [0, None]
+    assert clock.time() == 1005
+
+
+async def test_advance_runs_due_timers():
+    clock = VirtualClock()
+    fired = []
+    clock.call_at(1, lambda: fired.append(1))
+    clock.call_at(3, lambda: fired.append(3)).cancel()
+
+    clock.advance(5)
+
+    assert fired == [1]
+    assert clock.now() == 5
+
+
+async def test_scheduler_timeout_with_virtual_clock():
+    clock = VirtualClock()
+    scheduler = get_scheduler(clock)
+    assert get_scheduler(clock) is scheduler
+
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.wait(asyncio.get_running_loop().create_future(), 3600)
+
+    assert clock.now() == 3600
+
+
+async def test_schedulers_do_not_keep_clocks_alive():
+    clock = VirtualClock()
+    scheduler = get_scheduler(clock)
+    await scheduler.wait(clock.sleep(1), 3600)
+    refs = weakref.ref(clock), weakref.ref(scheduler)
+
+    del clock, scheduler
+    # Lets the clock's driver finish, as there are no timers left
+    await asyncio.sleep(0.01)
+    gc.collect()
+    gc.collect()
+
+    assert all(ref() is None for ref in refs)
+
+
+async def test_simulated_run_costs_no_wall_time():
+    bot = FakeBot("slow_bot")
+
+    @bot.on_command("slow")
+    async def slow(conversation, message):
+        await conversation.reply("Thinking...", delay=10)
+        await conversation.reply("Done", delay=30)
+
+    clock = VirtualClock()
+    client = FakeClient(bot, clock=clock)
+    controller = BotController(client, "@slow_bot", global_action_delay=5)
+    assert controller.clock is clock
+
+    started = time.monotonic()
+    try:
+        async with controller.collect(wait_consecutive=45) as response:
+            await controller.send_command("slow")
+        assert [m.text for m in response.messages] == ["Thinking...", "Done"]
+
+        with pytest.raises(InvalidResponseError):
+            async with controller.collect(max_wait=120):
+                await controller.send_command("unknown")
+    finally:
+        await client.stop()
+
+    assert time.monotonic() - started < 1
+    # Both replies and the full `max_wait` of the unanswered command. The peer's rate limit of one request per
+    # `global_action_delay` has been replenished long before the second command.
+    assert clock.now() == pytest.approx(10 + 30 + 120, abs=0.01)
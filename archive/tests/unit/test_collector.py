@@ -0,0 +1,187 @@
+import asyncio
+from collections import OrderedDict
+from unittest.mock import Mock
+
+import pytest
+from pyrogram import Client
+from pyrogram.dispatcher import Dispatcher
+from pyrogram.enums import ChatType
+from pyrogram.types import Chat
+from pyrogram.types import Message
+
+from tgintegration import BotController
+from tgintegration import InvalidResponseError
+from tgintegration.collector import collect
+from tgintegration.collector import stream
+from tgintegration.expectation import Expectation
+from tgintegration.expectation import MessageMatches
+from tgintegration.timeout_settings import TimeoutSettings
+from tgintegration.update_router import get_router
+
+pytestmark = pytest.mark.asyncio
+
+CHAT_ID = 42
+
+
+def make_controller() -> BotController:
+    dp = Mock(Dispatcher)
+    dp.configure_mock(groups=OrderedDict(), locks_list=[asyncio.Lock()])
+    client = Mock(Client)
+    client.configure_mock(dispatcher=dp, is_connected=True)
+    controller = Mock(BotController)
+    controller.configure_mock(client=client)
+    return controller
+
+
+async def send_later(controller: BotController, *texts: str, delay: float = 0.01):
+    router = await get_router(controller.client)
+    for text in texts:
+        await asyncio.sleep(delay)
+        await router._on_message(
+            controller.client,
+            Message(id=1, chat=Chat(id=CHAT_ID, type=ChatType.PRIVATE), text=text),
+        )
+
+
+async def test_collect_returns_once_content_is_met():
+    controller = make_controller()
+    loop = asyncio.get_running_loop()
+
+    async with collect(
+        controller,
+        expectation=Expectation(content=MessageMatches("^b")),
+        timeouts=TimeoutSettings(max_wait=5, wait_consecutive=5),
+        chat_id=CHAT_ID,
+    ) as response:
+        started = loop.time()
+        asyncio.create_task(send_later(controller, "a", "b"))
+
+    assert loop.time() - started < 1
+    assert [m.text for m in response.messages] == ["a", "b"]
+
+
+async def test_collect_raises_when_content_is_not_met():
+    controller = make_controller()
+
+    with pytest.raises(InvalidResponseError):
+        async with collect(
+            controller,
+            expectation=Expectation(content=MessageMatches("^c")),
+            timeouts=TimeoutSettings(
+                max_wait=0.1, wait_consecutive=0.02, raise_on_timeout=True
+            ),
+            chat_id=CHAT_ID,
+        ):
+            asyncio.create_task(send_later(controller, "a", "b"))
+
+
+async def test_concurrent_collects_share_an_expectation():
+    controller = make_controller()
+    expectation = Expectation(content=MessageMatches("^a") >> MessageMatches("^b"))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def first():
+        async with collect(
+            controller,
+            expectation=expectation,
+            timeouts=TimeoutSettings(max_wait=5, wait_consecutive=5),
+            chat_id=CHAT_ID,
+        ) as response:
+            await send_later(controller, "a")
+        return response
+
+    async def second():
+        await asyncio.sleep(0.05)
+        async with collect(
+            controller,
+            expectation=expectation,
+            timeouts=TimeoutSettings(max_wait=0.2, wait_consecutive=0.2),
+            chat_id=CHAT_ID,
+        ):
+            await send_later(controller, "b")
+
+    response, _ = await asyncio.gather(first(), second())
+
+    # Starting the second collect does not reset the progress of the first one
+    assert loop.time() - started < 1
+    assert [m.text for m in response.messages] == ["a", "b"]
+
+
+async def test_stream_yields_messages_as_they_arrive():
+    controller = make_controller()
+    received = []
+
+    async with stream(
+        controller,
+        expectation=Expectation(min_messages=3, max_messages=3),
+        timeouts=TimeoutSettings(max_wait=1),
+        chat_id=CHAT_ID,
+    ) as messages:
+        task = asyncio.create_task(send_later(controller, "a", "b", "c", "d"))
+        async for message in messages:
+            received.append(message.text)
+        await task
+
+    assert received == ["a", "b", "c"]
+
+
+async def test_stream_stops_early():
+    controller = make_controller()
+
+    async with stream(
+        controller,
+        timeouts=TimeoutSettings(max_wait=5, wait_consecutive=5),
+        chat_id=CHAT_ID,
+    ) as messages:
+        task = asyncio.create_task(send_later(controller, "a", "b"))
+        async for message in messages:
+            assert message.text == "a"
+            break
+
+    await task
+    assert messages.response.num_messages == 1
+
+
+async def test_stream_ends_after_wait_consecutive():
+    controller = make_controller()
+
+    async with stream(
+        controller,
+        timeouts=TimeoutSettings(max_wait=1, wait_consecutive=0.05),
+        chat_id=CHAT_ID,
+    ) as messages:
+        task = asyncio.create_task(send_later(controller, "a", "b"))
+        received = [m.text async for m in messages]
+        await task
+
+    assert received == ["a", "b"]
+
+
+async def test_stream_verifies_when_stopping_at_max_messages():
+    controller = make_controller()
+
+    with pytest.raises(InvalidResponseError):
+        async with stream(
+            controller,
+            expectation=Expectation(max_messages=2, content=MessageMatches("^c")),
+            timeouts=TimeoutSettings(max_wait=1, raise_on_timeout=True),
+            chat_id=CHAT_ID,
+        ) as messages:
+            task = asyncio.create_task(send_later(controller, "a", "b"))
+            async for _ in messages:
+                pass
+    await task
+
+
+async def test_stream_raises_without_reply():
+    controller = make_controller()
+
+    with pytest.raises(InvalidResponseError):
+        async with stream(
+            controller,
+            timeouts=TimeoutSettings(max_wait=0.05, raise_on_timeout=True),
+            chat_id=CHAT_ID,
+        ) as messages:
+            async for _ in messages:
+                pass
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from tgintegration import InvalidResponseError
+from tgintegration.clock import VirtualClock
+from tgintegration.controller_pool import ControllerPool
+from tgintegration.controller_pool import InitializationError
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_bots(n: int):
+    bots = []
+    for i in range(n):
+        bot = FakeBot(f"fleet_{i}_bot")
+
+        @bot.on_command("start")
+        async def start(conversation, message, i=i):
+            await conversation.reply(f"Bot {i}", delay=5)
+
+        bots.append(bot)
+    return bots
+
+
+async def test_runs_interactions_concurrently_within_limit():
+    bots = make_bots(60)
+    client = FakeClient(*bots, clock=VirtualClock())
+    running = 0
+    peak = 0
+
+    async def start(controller):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            async with controller.collect(count=1) as response:
+                await controller.send_command("start")
+            return response.full_text
+        finally:
+            running -= 1
+
+    pool = ControllerPool(
+        client, [f"@{b.user.username}" for b in bots], max_concurrency=20
+    )
+    async with pool:
+        assert client.is_connected
+        assert all(c.peer_id for c in pool)
+        started = client.clock.now()
+        results = await pool.run(start)
+    assert not client.is_connected
+
+    assert results == {f"@fleet_{i}_bot": f"Bot {i}" for i in range(60)}
+    assert peak == 20
+    # Three waves of 20 interactions of 5 seconds each, instead of 300 seconds one after another
+    assert 15 <= client.clock.now() - started < 20
+
+
+async def test_collects_errors_per_peer():
+    bots = make_bots(2)
+    client = FakeClient(*bots, clock=VirtualClock())
+
+    async def start(controller):
+        async with controller.collect(count=1, max_wait=10):
+            if controller.peer == "@fleet_1_bot":
+                await controller.send_command("unknown")
+            else:
+                await controller.send_command("start")
+
+    async with ControllerPool(client, ["@fleet_0_bot", "@fleet_1_bot"]) as pool:
+        results = await pool.run(start)
+
+        assert results["@fleet_0_bot"] is None
+        assert isinstance(results["@fleet_1_bot"], InvalidResponseError)
+
+        with pytest.raises(ValueError):
+            pool.add("@fleet_0_bot")
+
+
+async def test_runs_only_the_given_peers():
+    bots = make_bots(2)
+    client = FakeClient(*bots, clock=VirtualClock())
+    visited = []
+
+    async def visit(controller):
+        visited.append(controller.peer)
+
+    async with ControllerPool(client, ["@fleet_0_bot", "@fleet_1_bot"]) as pool:
+        assert await pool.run(visit, ["@fleet_1_bot"]) == {"@fleet_1_bot": None}
+        assert await pool.run(visit, []) == {}
+
+    assert visited == ["@fleet_1_bot"]
+
+
+async def test_initialize_reports_every_unknown_peer():
+    client = FakeClient(*make_bots(2), clock=VirtualClock())
+    peers = ["@unknown_0_bot", "@fleet_0_bot", "@unknown_1_bot", "@fleet_1_bot"]
+    pool = ControllerPool(client, peers, init_batch_size=1)
+    try:
+        with pytest.raises(InitializationError, match="USERNAME_NOT_OCCUPIED") as info:
+            await pool.initialize()
+        assert list(info.value.errors) == ["@unknown_0_bot", "@unknown_1_bot"]
+
+        # The healthy peers are initialized regardless
+        assert pool["@fleet_0_bot"].peer_id and pool["@fleet_1_bot"].peer_id
+        healthy = [p for p in peers if p not in info.value.errors]
+        assert list(await pool.run(lambda c: asyncio.sleep(0), healthy)) == healthy
+    finally:
+        await pool.close()
@@ -0,0 +1,142 @@
+import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import KeyboardButton
+from pyrogram.types import ReplyKeyboardMarkup
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.crawler import MenuCrawler
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+pytestmark = pytest.mark.asyncio
+
+# Screen name -> buttons (caption, target screen)
+SCREENS = {
+    "main": [("Settings", "settings"), ("Help", "help")],
+    "settings": [("Language", "language"), ("Back", "main")],
+    "language": [("English", "settings"), ("Delete account", "deleted")],
+    "help": [("Back", "main"), ("Noop", None)],
+    "deleted": [],
+}
+
+
+def make_bot() -> FakeBot:
+    bot = FakeBot("menu_bot")
+
+    def markup(screen: str) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup(
+            [
+                [InlineKeyboardButton(caption, callback_data=f"{screen}:{i}")]
+                for i, (caption, _) in enumerate(SCREENS[screen])
+            ]
+        )
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply(
+            "Choose",
+            reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Menu")]]),
+            delay=0.5,
+        )
+
+    @bot.on_message("^Menu$")
+    async def menu(conversation, message):
+        await conversation.reply("Screen main", reply_markup=markup("main"), delay=0.5)
+
+    @bot.on_callback_query()
+    async def click(conversation, query):
+        screen, index = query.data.split(":")
+        target = SCREENS[screen][int(index)][1]
+        if target is not None:
+            await conversation.edit(
+                query.message.id, f"Screen {target}", markup(target), delay=0.5
+            )
+
+    return bot
+
+
+def make_controllers(n: int, clock: VirtualClock):
+    bot = make_bot()
+    return [
+        BotController(
+            FakeClient(bot, name=f"agent_{i}", clock=clock),
+            "@menu_bot",
+            global_action_delay=0,
+            max_wait=2,
+            wait_consecutive=0.1,
+        )
+        for i in range(n)
+    ]
+
+
+async def crawl(n: int, clock: VirtualClock = None, **kwargs):
+    controllers = make_controllers(n, clock or VirtualClock())
+    started = controllers[0].clock.now()
+    graph = await MenuCrawler(controllers, skip="Delete", **kwargs).crawl("start")
+    duration = controllers[0].clock.now() - started
+    for controller in controllers:
+        await controller.client.stop()
+    return graph, duration
+
+
+async def test_discovers_each_screen_once():
+    graph, _ = await crawl(1)
+
+    texts = sorted(s.text for s in graph.states.values())
+    assert texts == [
+        "Choose",
+        "Screen help",
+        "Screen language",
+        "Screen main",
+        "Screen settings",
+    ]
+    assert not graph.truncated
+
+    by_text = {s.text: s for s in graph.states.values()}
+    assert [a.caption for a in by_text["Screen language"].path] == [
+        "Menu",
+        "Settings",
+        "Language",
+    ]
+    # "Back" leads to a known screen instead of a new one, the skipped button is never clicked
+    assert {(graph.states[e.source].text, e.action.caption) for e in graph.edges} == {
+        ("Choose", "Menu"),
+        ("Screen main", "Settings"),
+        ("Screen main", "Help"),
+        ("Screen settings", "Language"),
+        ("Screen settings", "Back"),
+        ("Screen language", "English"),
+        ("Screen help", "Back"),
+        ("Screen help", "Noop"),
+    }
+    [noop] = [e for e in graph.edges if e.action.caption == "Noop"]
+    assert noop.target is None and noop.error == "No response"
+
+    dot = graph.to_dot()
+    assert dot.startswith("digraph menu {")
+    assert '[label="Back"]' in dot
+
+
+async def test_parallel_workers_are_faster():
+    # Virtual clocks cannot be mixed within one event loop
+    clock = VirtualClock()
+    sequential_graph, sequential = await crawl(1, clock)
+    parallel_graph, parallel = await crawl(3, clock)
+
+    assert parallel_graph.states.keys() == sequential_graph.states.keys()
+    assert parallel < sequential
+
+
+async def test_limits():
+    clock = VirtualClock()
+    graph, _ = await crawl(2, clock, max_depth=2)
+    assert sorted(s.depth for s in graph.states.values()) == [0, 1, 2, 2]
+
+    graph, _ = await crawl(2, clock, max_states=2)
+    assert len(graph.states) == 2
+    assert graph.truncated
+    # Clicks leading to screens beyond the limit do not point to unknown states
+    assert all(e.target in graph.states for e in graph.edges if e.target is not None)
+    assert "truncated" in {e.error for e in graph.edges}
@@ -0,0 +1,89 @@
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from tgintegration.deadline_scheduler import DeadlineScheduler
+from tgintegration.deadline_scheduler import get_scheduler
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_wait_completes_before_deadline():
+    scheduler = DeadlineScheduler(asyncio.get_running_loop())
+    fut = asyncio.get_running_loop().create_future()
+    asyncio.get_running_loop().call_later(0.01, fut.set_result, 42)
+
+    assert await scheduler.wait(fut, scheduler.now() + 1) == 42
+    assert len(scheduler) == 0
+
+
+async def test_wait_times_out():
+    scheduler = DeadlineScheduler(asyncio.get_running_loop())
+    fut = asyncio.get_running_loop().create_future()
+
+    started = scheduler.now()
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.wait(fut, started + 0.05)
+
+    assert scheduler.now() - started >= 0.049
+    assert fut.cancelled()
+
+
+async def test_waits_share_one_timer():
+    loop = asyncio.get_running_loop()
+    scheduler = DeadlineScheduler(loop)
+    futures = [loop.create_future() for _ in range(100)]
+
+    tasks = [
+        asyncio.create_task(scheduler.wait(f, scheduler.now() + 0.05 + n * 0.001))
+        for n, f in enumerate(futures)
+    ]
+    await asyncio.sleep(0)
+    assert len(scheduler) == 100
+
+    for f in futures[::2]:
+        f.set_result(None)
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert [isinstance(r, asyncio.TimeoutError) for r in results] == [False, True] * 50
+    assert len(scheduler) == 0
+
+
+async def test_cancellation_from_outside_propagates():
+    scheduler = DeadlineScheduler(asyncio.get_running_loop())
+    fut = asyncio.get_running_loop().create_future()
+
+    task = asyncio.create_task(scheduler.wait(fut, scheduler.now() + 5))
+    await asyncio.sleep(0)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert len(scheduler) == 0
+
+
+async def test_shared_schedulers_do_not_keep_loops_alive():
+    async def use_scheduler():
+        scheduler = get_scheduler()
+        await scheduler.wait(asyncio.sleep(0), scheduler.now() + 1)
+        return weakref.ref(scheduler)
+
+    def run_session():
+        loop = asyncio.new_event_loop()
+        try:
+            scheduler = loop.run_until_complete(use_scheduler())
+        finally:
+            loop.close()
+        return weakref.ref(loop), scheduler
+
+    # Each session runs on its own loop, which cannot be started from within the running one
+    sessions = [
+        await asyncio.get_running_loop().run_in_executor(None, run_session)
+        for _ in range(3)
+    ]
+    gc.collect()
+    gc.collect()
+
+    assert all(loop() is None and scheduler() is None for loop, scheduler in sessions)
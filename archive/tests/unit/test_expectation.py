@@ -1,9 +1,15 @@
 from unittest.mock import Mock
 
 import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
 from pyrogram.types import Message
 
 from tgintegration.expectation import Expectation
+from tgintegration.expectation import HasInlineKeyboard
+from tgintegration.expectation import InSequence
+from tgintegration.expectation import MessageMatches
+from tgintegration.expectation import MessageSatisfies
 
 
 @pytest.mark.parametrize(
@@ -22,3 +28,61 @@ def test_expectation(
     msgs = [Mock(Message)] * num_msgs
     assert obj.is_sufficient(msgs) == is_sufficient
     assert obj._is_match(msgs) == is_match
+
+
+def make_message(text: str = None, reply_markup=None) -> Message:
+    return Message(id=1, text=text, reply_markup=reply_markup)
+
+
+KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("a", callback_data="a")]])
+
+
+@pytest.mark.parametrize(
+    "content,texts,is_sufficient",
+    [
+        (MessageMatches("^Done"), ["Loading", "Done!"], True),
+        (MessageMatches("^Done"), ["Loading", "Not done"], False),
+        (HasInlineKeyboard(), ["a", None], True),
+        (HasInlineKeyboard(), ["a", "b"], False),
+        (InSequence("^a", "^b"), ["a", "b"], True),
+        (InSequence("^a", "^b"), ["b", "a"], False),
+        (MessageMatches("^a") >> MessageMatches("^b"), ["x", "a", "x", "b"], True),
+        (MessageMatches("^a") & MessageMatches("^b"), ["b", "a"], True),
+        (MessageMatches("^a") & MessageMatches("^b"), ["a", "a"], False),
+        (MessageMatches("^a") | HasInlineKeyboard(), [None], True),
+    ],
+)
+def test_content_expectation(content, texts, is_sufficient: bool):
+    messages = [
+        make_message(text) if text else make_message(reply_markup=KEYBOARD)
+        for text in texts
+    ]
+    obj = Expectation(content=content)
+    assert obj.is_sufficient(messages) == is_sufficient
+    assert obj.is_complete(messages) == is_sufficient
+
+
+def test_content_expectation_inspects_each_message_once():
+    seen = []
+
+    def record(message: Message) -> bool:
+        seen.append(message)
+        return False
+
+    check = Expectation(content=MessageSatisfies(record)).new_check()
+    messages = []
+    for n in range(5):
+        messages.append(make_message(str(n)))
+        assert not check.is_sufficient(messages)
+
+    assert seen == messages
+
+
+def test_checks_are_independent():
+    obj = Expectation(content=InSequence("^a", "^b"))
+    first, second = obj.new_check(), obj.new_check()
+
+    assert not first.is_sufficient([make_message("a")])
+    assert not second.is_sufficient([make_message("b")])
+    assert first.is_sufficient([make_message("a"), make_message("b")])
+    assert obj == Expectation(content=obj.content)
@@ -0,0 +1,110 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import KeyboardButton
+from pyrogram.types import ReplyKeyboardMarkup
+
+from tgintegration import BotController
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_bot() -> FakeBot:
+    bot = FakeBot("example_bot", commands={"start": "Start", "menu": "Show a menu"})
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("Hello!")
+        await conversation.reply("How can I help?", delay=0.01)
+
+    @bot.on_command("menu")
+    async def menu(conversation, message):
+        await conversation.reply(
+            "Menu",
+            reply_markup=InlineKeyboardMarkup(
+                [[InlineKeyboardButton("Details", callback_data="details")]]
+            ),
+        )
+        await conversation.reply(
+            "Choose",
+            reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Yes")]]),
+        )
+
+    @bot.on_message("^Yes$")
+    async def yes(conversation, message):
+        await conversation.reply("Okay")
+
+    @bot.on_callback_query("^details$")
+    async def details(conversation, query):
+        await conversation.edit(query.message.id, "Details")
+        return "Showing details"
+
+    @bot.on_inline_query()
+    async def inline(query):
+        return [FakeBot.article(str(i), f"{query} {i}") for i in range(7)]
+
+    bot.inline_page_size = 3
+    return bot
+
+
+@asynccontextmanager
+async def running_controller() -> AsyncIterator[BotController]:
+    client = FakeClient(make_bot())
+    controller = BotController(
+        client, "@example_bot", global_action_delay=0, max_wait=1, wait_consecutive=0.1
+    )
+    await controller.initialize()
+    try:
+        yield controller
+    finally:
+        await client.stop()
+
+
+async def test_initialize():
+    async with running_controller() as controller:
+        assert controller.peer_user.username == "example_bot"
+        assert [c.command for c in controller.command_list] == ["start", "menu"]
+
+
+async def test_collect_command_response():
+    async with running_controller() as controller:
+        async with controller.collect(count=2) as response:
+            await controller.send_command("start")
+
+        assert [m.text for m in response.messages] == ["Hello!", "How can I help?"]
+
+
+async def test_keyboard_clicks():
+    async with running_controller() as controller:
+        async with controller.collect(count=2) as response:
+            await controller.send_command("menu")
+
+        edited = await response.inline_keyboards[0].click("Details")
+        assert edited.full_text == "Details"
+
+        reply = await response.reply_keyboard.click("Yes")
+        assert reply.full_text == "Okay"
+
+
+async def test_query_inline_paginates():
+    async with running_controller() as controller:
+        results = await controller.query_inline("item", limit=5)
+
+        assert [r.result.title for r in results.results] == [
+            f"item {i}" for i in range(5)
+        ]
+
+
+async def test_clear_chat():
+    async with running_controller() as controller:
+        async with controller.collect(count=2):
+            await controller.send_command("start")
+
+        await controller.clear_chat()
+
+        assert controller.client.get_history(controller.peer_id) == []
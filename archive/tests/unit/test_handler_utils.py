@@ -1,9 +1,13 @@
+import asyncio
 from collections import OrderedDict
 from unittest.mock import Mock
 
 import pytest
+from pyrogram import Client
 from pyrogram.dispatcher import Dispatcher
+from pyrogram.handlers import MessageHandler
 
+from tgintegration.handler_utils import add_handlers_transient
 from tgintegration.handler_utils import find_free_group
 
 
@@ -22,3 +26,35 @@ def test_find_free_group(group_indices, expected):
     groups = OrderedDict({k: None for k in group_indices})
     dp.configure_mock(groups=groups)
     assert find_free_group(dp, -1000) == expected
+
+
+def make_client() -> Client:
+    dp = Mock(Dispatcher)
+    dp.configure_mock(groups=OrderedDict({0: []}), locks_list=[asyncio.Lock()])
+    client = Mock(Client)
+    client.configure_mock(dispatcher=dp)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_add_handlers_transient_reclaims_group():
+    client = make_client()
+    handler = MessageHandler(Mock())
+
+    for _ in range(3):
+        async with add_handlers_transient(client, [handler]):
+            assert client.dispatcher.groups == OrderedDict({-1000: [handler], 0: []})
+
+    assert client.dispatcher.groups == OrderedDict({0: []})
+
+
+@pytest.mark.asyncio
+async def test_add_handlers_transient_releases_on_error():
+    client = make_client()
+
+    with pytest.raises(RuntimeError):
+        async with add_handlers_transient(client, [MessageHandler(Mock())]):
+            raise RuntimeError
+
+    assert client.dispatcher.groups == OrderedDict({0: []})
+    assert not client.dispatcher.locks_list[0].locked()
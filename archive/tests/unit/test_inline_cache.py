@@ -0,0 +1,69 @@
+from unittest.mock import Mock
+
+import pytest
+from pyrogram import Client
+
+from tgintegration import BotController
+from tgintegration import InlineResultContainer
+from tgintegration.clock import VirtualClock
+from tgintegration.inline_cache import InlineResultCache
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_ttl():
+    clock = VirtualClock()
+    cache = InlineResultCache(clock=clock)
+    container = Mock(InlineResultContainer)
+
+    cache.put("q", container, ttl=10)
+    assert cache.get("q") is container
+
+    clock.advance(10)
+    assert cache.get("q") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_zero_ttl_is_not_cached():
+    cache = InlineResultCache()
+    cache.put("q", Mock(InlineResultContainer), ttl=0)
+    assert cache.get("q") is None
+
+
+async def test_lru_eviction():
+    cache = InlineResultCache(max_size=2)
+    a, b, c = (Mock(InlineResultContainer) for _ in range(3))
+
+    cache.put("a", a, ttl=60)
+    cache.put("b", b, ttl=60)
+    cache.get("a")
+    cache.put("c", c, ttl=60)
+
+    assert cache.get("a") is a
+    assert cache.get("b") is None
+    assert cache.get("c") is c
+
+
+async def test_invalidate():
+    cache = InlineResultCache()
+    for key in ("a", "b", "c"):
+        cache.put(key, Mock(InlineResultContainer), ttl=60)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert len(cache) == 2
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+async def test_defaults_to_the_clock_of_the_controller():
+    clock = VirtualClock()
+    cache = InlineResultCache()
+    controller = BotController(Mock(Client), "@bot", clock=clock, inline_cache=cache)
+    assert cache.clock is controller.clock
+
+    own = InlineResultCache(clock=VirtualClock())
+    BotController(Mock(Client), "@bot", clock=clock, inline_cache=own)
+    assert own.clock is not clock
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+from tgintegration.load_test import LoadTest
+from tgintegration.load_test import percentile
+from tgintegration.load_test import ramp_up
+from tgintegration.load_test import spike
+from tgintegration.load_test import steady
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_clients(n: int):
+    bot = FakeBot("load_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("Hi", delay=1)
+
+    clock = VirtualClock()
+    return [FakeClient(bot, name=f"agent_{i}", clock=clock) for i in range(n)]
+
+
+async def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) is None
+
+
+async def test_runs_phases_with_concurrent_users(tmp_path):
+    clients = make_clients(8)
+    running = 0
+    peaks = []
+
+    async def scenario(controller):
+        nonlocal running
+        running += 1
+        peaks.append(running)
+        try:
+            async with controller.collect(count=1):
+                await controller.send_command("start")
+        finally:
+            running -= 1
+
+    output = tmp_path / "load.jsonl"
+    load_test = LoadTest.from_clients(
+        clients,
+        "@load_bot",
+        scenario,
+        [ramp_up(10, 4), steady(10, 4), spike(5, 8), steady(5, 2)],
+        controller_kwargs=dict(global_action_delay=0),
+        output=output,
+        report_interval=5,
+    )
+    result = await load_test.run()
+    for client in clients:
+        await client.stop()
+
+    ramp, steady_state, spiked, after = result.phases
+    assert max(peaks) == 8
+    assert steady_state.users == 4
+    # Every user completes about one iteration per second
+    assert steady_state.throughput == pytest.approx(4, rel=0.15)
+    assert spiked.throughput == pytest.approx(8, rel=0.15)
+    assert ramp.iterations < steady_state.iterations
+    assert result.total.latency_p50 == pytest.approx(1)
+    assert result.total.timeouts == result.total.errors == 0
+    assert result.total.interactions == result.total.iterations
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["type"] for r in records].count("phase") == 4
+    assert [r["type"] for r in records].count("interval") >= 6
+    assert records[-1]["type"] == "total"
+    assert records[-1]["iterations"] == result.total.iterations
+
+
+async def test_counts_timeouts():
+    clients = make_clients(2)
+
+    async def scenario(controller):
+        async with controller.collect(count=1, max_wait=3):
+            await controller.send_command("unknown")
+
+    result = await LoadTest.from_clients(
+        clients,
+        "@load_bot",
+        scenario,
+        [steady(10, 2)],
+        controller_kwargs=dict(global_action_delay=0),
+    ).run()
+    for client in clients:
+        await client.stop()
+
+    assert result.total.timeouts == result.total.interactions > 0
+    assert result.total.timeout_rate == 1
+    assert result.total.errors == 0
+    assert result.total.latency_p50 is None
+
+
+async def test_requires_a_controller_per_user():
+    with pytest.raises(ValueError):
+        LoadTest.from_clients(
+            make_clients(2), "@load_bot", lambda c: None, [spike(1, 3)]
+        )
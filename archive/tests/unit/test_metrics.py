@@ -0,0 +1,150 @@
+import json
+
+import pytest
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+
+from tgintegration import BotController
+from tgintegration import InvalidResponseError
+from tgintegration.adaptive_wait import AdaptiveWait
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+from tgintegration.metrics import MetricsRegistry
+
+
+def test_render_openmetrics():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Number of requests.", ("peer",))
+    histogram = registry.histogram(
+        "latency_seconds", "Latency.", ("peer",), buckets=(0.1, 1)
+    )
+
+    counter.inc(peer="a")
+    counter.inc(2, peer='b"')
+    histogram.observe(0.05, peer="a")
+    histogram.observe(0.1, peer="a")
+    histogram.observe(5, peer="a")
+
+    assert registry.to_openmetrics().splitlines() == [
+        "# TYPE requests counter",
+        "# HELP requests Number of requests.",
+        'requests_total{peer="a"} 1',
+        'requests_total{peer="b\\""} 2',
+        "# TYPE latency_seconds histogram",
+        "# HELP latency_seconds Latency.",
+        'latency_seconds_bucket{peer="a",le="0.1"} 2',
+        'latency_seconds_bucket{peer="a",le="1.0"} 2',
+        'latency_seconds_bucket{peer="a",le="+Inf"} 3',
+        'latency_seconds_count{peer="a"} 3',
+        'latency_seconds_sum{peer="a"} 5.15',
+        "# EOF",
+    ]
+    assert json.loads(registry.to_json())["latency_seconds"]["samples"][0][
+        "buckets"
+    ] == {"0.1": 2, "1.0": 2, "+Inf": 3}
+
+
+def test_registry_rejects_conflicting_metrics():
+    registry = MetricsRegistry()
+    assert registry.counter("c", "", ("a",)) is registry.counter("c", "", ("a",))
+
+    with pytest.raises(ValueError):
+        registry.histogram("c", "", ("a",))
+    with pytest.raises(ValueError):
+        registry.counter("c", "").inc(b=1)
+
+
+@pytest.mark.asyncio
+async def test_controller_records_interactions():
+    bot = FakeBot("metrics_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply(
+            "Hi",
+            reply_markup=InlineKeyboardMarkup(
+                [[InlineKeyboardButton("Go", callback_data="go")]]
+            ),
+            delay=0.3,
+        )
+
+    @bot.on_callback_query("go")
+    async def go(conversation, query):
+        await conversation.reply("Went", delay=2)
+
+    @bot.on_inline_query()
+    async def inline(query):
+        return [FakeBot.article("1", "Result")]
+
+    registry = MetricsRegistry()
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(
+        client, "@metrics_bot", global_action_delay=0, metrics=registry
+    )
+    try:
+        async with controller.collect(count=1, wait_consecutive=1) as response:
+            await controller.send_command("start")
+        await response.inline_keyboards[0].click("Go")
+        await controller.query_inline("q")
+
+        with pytest.raises(InvalidResponseError):
+            async with controller.collect(max_wait=5):
+                await controller.send_command("unknown")
+    finally:
+        await client.stop()
+
+    metrics = controller.metrics
+    peer = "@metrics_bot"
+    assert metrics.interactions.get(peer=peer, command="start", kind="collect") == 1
+    assert (
+        metrics.messages_received.get(peer=peer, command="start", kind="collect") == 1
+    )
+    assert metrics.latency.get_sum(
+        peer=peer, command="start", kind="collect"
+    ) == pytest.approx(0.3, abs=0.01)
+
+    assert metrics.interactions.get(peer=peer, command="Go", kind="inline_click") == 1
+    assert metrics.latency.get_sum(
+        peer=peer, command="Go", kind="inline_click"
+    ) == pytest.approx(2, abs=0.01)
+
+    assert metrics.interactions.get(peer=peer, command=None, kind="inline_query") == 1
+    assert metrics.timeouts.get(peer=peer, command="unknown", kind="collect") == 1
+    assert "tgintegration_timeouts_total" in registry.to_openmetrics()
+
+
+@pytest.mark.asyncio
+async def test_streamed_interactions_are_observed():
+    bot = FakeBot("stream_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("a", delay=0.5)
+        await conversation.reply("b", delay=1)
+
+    adaptive = AdaptiveWait(0.5, headroom=1.0, min_samples=1, minimum=0)
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(
+        client,
+        "@stream_bot",
+        global_action_delay=0,
+        wait_consecutive=3,
+        adaptive_wait=adaptive,
+        metrics=MetricsRegistry(),
+    )
+    try:
+        async with controller.stream() as messages:
+            await controller.send_command("start")
+            assert [m.text async for m in messages] == ["a", "b"]
+    finally:
+        await client.stop()
+
+    metrics = controller.metrics
+    peer = "@stream_bot"
+    assert metrics.interactions.get(peer=peer, command="start", kind="stream") == 1
+    assert metrics.messages_received.get(peer=peer, command="start", kind="stream") == 2
+    assert metrics.latency.get_sum(
+        peer=peer, command="start", kind="stream"
+    ) == pytest.approx(0.5, abs=0.01)
+    assert adaptive.get_wait_consecutive(controller.peer_id, "start") == 1
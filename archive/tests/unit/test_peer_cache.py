@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock
+from unittest.mock import Mock
+
+import pytest
+from pyrogram import Client
+from pyrogram.raw.types import BotCommand
+from pyrogram.raw.types import InputPeerUser
+from pyrogram.types import User
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.peer_cache import CachedPeer
+from tgintegration.peer_cache import PeerCache
+
+CACHED = CachedPeer(
+    input_peer=InputPeerUser(user_id=42, access_hash=1337),
+    user=User(id=42, is_bot=True, first_name="Bot", username="some_bot"),
+    command_list=[BotCommand(command="start", description="Starts the bot")],
+)
+
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / "peers.sqlite"
+    PeerCache(path).put("account", "@some_bot", CACHED)
+
+    cached = PeerCache(path).get("account", "@some_bot")
+
+    assert cached.input_peer == CACHED.input_peer
+    assert cached.user.id == 42
+    assert cached.user.username == "some_bot"
+    assert cached.user.is_bot
+    assert cached.command_list == CACHED.command_list
+
+
+def test_entries_are_per_account(tmp_path):
+    cache = PeerCache(tmp_path / "peers.sqlite")
+    cache.put("account", "@some_bot", CACHED)
+
+    assert cache.get("other", "@some_bot") is None
+
+
+def test_ttl_and_invalidate(tmp_path):
+    clock = VirtualClock(start=1000)
+    cache = PeerCache(tmp_path / "peers.sqlite", ttl=60, clock=clock)
+    cache.put("account", "@some_bot", CACHED)
+
+    clock.advance(59)
+    assert cache.get("account", "@some_bot") is not None
+    clock.advance(1)
+    assert cache.get("account", "@some_bot") is None
+
+    cache.put("account", "@some_bot", CACHED)
+    cache.invalidate("account", "@some_bot")
+    assert cache.get("account", "@some_bot") is None
+
+
+def test_invalidate_by_account_or_peer(tmp_path):
+    cache = PeerCache(tmp_path / "peers.sqlite")
+    for account in ("a", "b"):
+        for peer in ("@one_bot", "@two_bot"):
+            cache.put(account, peer, CACHED)
+
+    cache.invalidate(peer="@one_bot")
+    assert cache.get("a", "@one_bot") is None and cache.get("b", "@one_bot") is None
+    assert cache.get("a", "@two_bot") is not None
+
+    cache.invalidate(account="a")
+    assert cache.get("a", "@two_bot") is None
+    assert cache.get("b", "@two_bot") is not None
+
+    cache.invalidate()
+    assert cache.get("b", "@two_bot") is None
+
+
+@pytest.mark.asyncio
+async def test_warm_initialize_makes_no_requests(tmp_path):
+    cache = PeerCache(tmp_path / "peers.sqlite")
+    cache.put("account", "@some_bot", CACHED)
+
+    client = Mock(Client)
+    client.configure_mock(name="account", is_connected=True)
+    client.resolve_peer = AsyncMock()
+    client.get_users = AsyncMock()
+    client.invoke = AsyncMock()
+
+    controller = BotController(client, "@some_bot", peer_cache=cache)
+    await controller.initialize()
+
+    assert controller.peer_id == 42
+    assert controller.command_list == CACHED.command_list
+    client.resolve_peer.assert_not_called()
+    client.get_users.assert_not_called()
+    client.invoke.assert_not_called()
+
+
+def test_defaults_to_the_clock_of_the_controller(tmp_path):
+    clock = VirtualClock()
+    cache = PeerCache(tmp_path / "peers.sqlite")
+    controller = BotController(Mock(Client), "@bot", clock=clock, peer_cache=cache)
+    assert cache.clock is controller.clock
@@ -0,0 +1,72 @@
+import pytest
+
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeAuthServer
+from tgintegration.provisioning import get_test_login_code
+from tgintegration.provisioning import LoginCodeDemultiplexer
+from tgintegration.provisioning import SessionProvisioner
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_test_login_codes():
+    assert get_test_login_code("+99966 2 1234") == "22222"
+    assert get_test_login_code("+4912345678") is None
+
+
+async def test_demultiplexer_skips_tried_codes():
+    demultiplexer = LoginCodeDemultiplexer(VirtualClock())
+    demultiplexer.feed("+1", "11111")
+    demultiplexer.feed("+1", "22222")
+
+    assert await demultiplexer.next_code("+1", {"11111"}, timeout=1) == "22222"
+    assert await demultiplexer.next_code("+1", set(), timeout=1) == "11111"
+
+    with pytest.raises(TimeoutError):
+        await demultiplexer.next_code("+2", set(), timeout=1)
+
+
+async def test_provisions_sessions_concurrently():
+    clock = VirtualClock()
+    auth = FakeAuthServer(code_delay=30)
+    phones = ["+100", "+200"]
+    interceptors = {p: auth.create_session(p, clock=clock) for p in phones}
+    names = iter(range(100))
+
+    provisioner = SessionProvisioner(
+        lambda phone: auth.create_client(f"new_{next(names)}", clock=clock),
+        interceptors,
+        max_concurrency=10,
+    )
+    results = await provisioner.provision_many(phones * 3)
+
+    assert [r.split(":")[1] for r in results] == phones * 3
+    assert len(set(results)) == 6
+    # All codes were requested at once, instead of one login after another
+    assert clock.now() == pytest.approx(30)
+    assert not any(c.is_connected for c in interceptors.values())
+
+
+async def test_reports_accounts_without_interceptor():
+    clock = VirtualClock()
+    auth = FakeAuthServer()
+    provisioner = SessionProvisioner(
+        lambda phone: auth.create_client("new", clock=clock),
+        {"+100": auth.create_session("+100", clock=clock)},
+        code_timeout=5,
+    )
+
+    [result] = await provisioner.provision_many(["+200"])
+
+    assert isinstance(result, ValueError)
+
+
+async def test_test_mode_uses_fixed_codes():
+    clock = VirtualClock()
+    auth = FakeAuthServer()
+    client = auth.create_client("new", clock=clock)
+    provisioner = SessionProvisioner(lambda phone: client, test_mode=True)
+
+    # The fake server does not know the fixed test codes
+    with pytest.raises(Exception, match="PHONE_CODE_INVALID"):
+        await provisioner.provision("+9996621234")
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from pyrogram.errors import FloodWait
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+from tgintegration.rate_limiter import RateLimiter
+from tgintegration.retry import RetryPolicy
+
+
+def test_bucket_allows_burst_then_paces():
+    clock = VirtualClock()
+    limiter = RateLimiter(account_rate=2, account_burst=3, peer_rate=None, clock=clock)
+
+    assert [limiter.reserve("acc") for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+
+    clock.advance(10)
+    assert limiter.reserve("acc") == 0
+
+
+def test_peer_buckets_are_separate_but_share_the_account():
+    clock = VirtualClock()
+    limiter = RateLimiter(
+        account_rate=10, account_burst=2, peer_rate=1, peer_burst=1, clock=clock
+    )
+
+    assert limiter.reserve("acc", "a") == 0
+    assert limiter.reserve("acc", "b") == 0
+    assert limiter.reserve("acc", "a") == pytest.approx(1)
+    # The account bucket is exhausted as well, regardless of the peer
+    assert limiter.reserve("acc", "c") == pytest.approx(0.2)
+    assert limiter.reserve("other", "a") == 0
+
+
+def test_flood_wait_blocks_and_lowers_rate_until_recovered():
+    clock = VirtualClock()
+    limiter = RateLimiter(
+        account_rate=4, peer_rate=None, backoff=0.5, recovery=0.25, clock=clock
+    )
+
+    limiter.on_flood_wait("acc", None, 30)
+    assert limiter.get_rate("acc") == 2
+    assert limiter.reserve("acc") == pytest.approx(30)
+
+    limiter.on_flood_wait("acc", None, 5)
+    assert limiter.get_rate("acc") == 1
+
+    for expected in (2, 3, 4, 4):
+        limiter.on_success("acc")
+        assert limiter.get_rate("acc") == expected
+
+
+@pytest.mark.asyncio
+async def test_acquire_sleeps_on_the_clock():
+    clock = VirtualClock()
+    limiter = RateLimiter(account_rate=None, peer_rate=0.5, clock=clock)
+
+    await asyncio.gather(*(limiter.acquire("acc", "peer") for _ in range(3)))
+
+    assert clock.now() == pytest.approx(4)
+
+
+@pytest.mark.asyncio
+async def test_controller_feeds_back_flood_waits():
+    bot = FakeBot("limited_bot")
+    client = FakeClient(bot, clock=VirtualClock())
+    limiter = RateLimiter(clock=client.clock)
+    controller = BotController(
+        client,
+        "@limited_bot",
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(max_retries=0),
+    )
+
+    async def flood(*args, **kwargs):
+        raise FloodWait(value=12)
+
+    try:
+        await controller.initialize()
+        with pytest.raises(FloodWait):
+            await controller._call(controller.peer_id, flood)
+        started = client.clock.now()
+        await controller.send_command("start")
+        await client.settle()
+    finally:
+        await client.stop()
+
+    assert client.clock.now() - started == pytest.approx(12)
+    assert limiter.get_rate(client.name, controller.peer_id) == pytest.approx(
+        0.5 + 0.01
+    )
+
+
+@pytest.mark.asyncio
+async def test_controller_only_limits_what_the_peer_sees_per_peer():
+    bot = FakeBot("limited_bot")
+
+    @bot.on_inline_query()
+    async def inline(query):
+        return [FakeBot.article("1", "Result")]
+
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(client, "@limited_bot", global_action_delay=5)
+
+    try:
+        await controller.initialize()
+        started = client.clock.now()
+        await asyncio.gather(*(controller.query_inline(str(i)) for i in range(3)))
+        assert client.clock.now() == started
+
+        await controller.send_command("start")
+        await controller.send_command("start")
+        await client.settle()
+    finally:
+        await client.stop()
+
+    assert client.clock.now() - started == pytest.approx(5)
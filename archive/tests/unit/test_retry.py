@@ -0,0 +1,114 @@
+from typing import List
+
+import pytest
+from pyrogram.errors import BadRequest
+from pyrogram.errors import FloodWait
+from pyrogram.errors import InternalServerError
+
+from tgintegration import BotController
+from tgintegration.clock import VirtualClock
+from tgintegration.fake import FakeBot
+from tgintegration.fake import FakeClient
+from tgintegration.retry import call_with_retry
+from tgintegration.retry import retry_budget
+from tgintegration.retry import RetryPolicy
+
+pytestmark = pytest.mark.asyncio
+
+
+def failing(errors: List[Exception], result="ok"):
+    calls = []
+
+    async def call(*args, **kwargs):
+        calls.append(args)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    call.calls = calls
+    return call
+
+
+async def test_policy_backs_off_exponentially_with_bounded_jitter():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    error = InternalServerError()
+    assert [policy.get_delay(error, n) for n in range(5)] == [1, 2, 4, 5, 5]
+
+    jittered = RetryPolicy(base_delay=4, jitter=0.5)
+    assert all(2 <= jittered.get_delay(error, 0) <= 4 for _ in range(100))
+
+    assert policy.get_delay(FloodWait(value=17), 3) == 17
+    assert policy.get_delay(FloodWait(value=121), 0) is None
+    assert policy.get_delay(BadRequest(), 0) is None
+
+
+async def test_retries_transient_errors_with_exact_flood_wait():
+    clock = VirtualClock()
+    call = failing([FloodWait(value=7), InternalServerError()])
+
+    assert await call_with_retry(call, RetryPolicy(jitter=0), clock) == "ok"
+
+    assert len(call.calls) == 3
+    assert clock.now() == pytest.approx(7 + 2)
+
+
+async def test_gives_up_after_max_retries_and_on_other_errors():
+    clock = VirtualClock()
+    policy = RetryPolicy(max_retries=2, jitter=0)
+
+    call = failing([InternalServerError()] * 3)
+    with pytest.raises(InternalServerError):
+        await call_with_retry(call, policy, clock)
+    assert len(call.calls) == 3
+
+    call = failing([BadRequest()])
+    with pytest.raises(BadRequest):
+        await call_with_retry(call, policy, clock)
+    assert len(call.calls) == 1
+
+
+async def test_budget_is_shared_by_all_calls_of_an_interaction():
+    clock = VirtualClock()
+    policy = RetryPolicy(max_retries=3, jitter=0)
+
+    with retry_budget(2) as budget:
+        assert await call_with_retry(failing([FloodWait(value=1)]), policy, clock)
+        with pytest.raises(FloodWait):
+            await call_with_retry(
+                failing([FloodWait(value=1), FloodWait(value=1)]), policy, clock
+            )
+
+    assert budget.used == 2
+    assert budget.remaining == 0
+
+
+async def test_controller_retries_failed_requests():
+    bot = FakeBot("flaky_bot")
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("Hi")
+
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(
+        client, "@flaky_bot", global_action_delay=0, retry_policy=RetryPolicy(jitter=0)
+    )
+    send_message = failing([InternalServerError(), FloodWait(value=3)])
+    original_send_message = client.send_message
+
+    async def flaky_send_message(*args, **kwargs):
+        await send_message()
+        return await original_send_message(*args, **kwargs)
+
+    client.send_message = flaky_send_message
+    try:
+        await controller.initialize()
+        started = client.clock.now()
+        async with controller.collect(count=1, wait_consecutive=0) as response:
+            await controller.send_command("start")
+    finally:
+        await client.stop()
+
+    assert response.full_text == "Hi"
+    assert len(send_message.calls) == 3
+    assert client.clock.now() - started == pytest.approx(1 + 3)
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from pyrogram.types import Message
+
+from tgintegration.update_recorder import MessageRecorder
+
+pytestmark = pytest.mark.asyncio
+
+
+async def record(recorder: MessageRecorder, *texts: str):
+    for text in texts:
+        await recorder.record_message(None, Message(id=1, text=text))
+
+
+async def test_wait_for_count():
+    recorder = MessageRecorder()
+    waiters = [recorder.wait_for_count(n) for n in (3, 1, 2)]
+
+    await record(recorder, "a")
+    assert [w.done() for w in waiters] == [False, True, False]
+
+    await record(recorder, "b", "c")
+    assert all(w.done() for w in waiters)
+    assert not recorder._count_waiters
+    assert recorder.wait_for_count(3).done()
+
+
+async def test_abandoned_count_waiters_are_dropped():
+    recorder = MessageRecorder()
+    for n in range(10):
+        recorder.wait_for_count(100 + n).cancel()
+    await asyncio.sleep(0)
+
+    assert len(recorder._count_waiters) < 10
+
+
+async def test_abandoned_count_waiters_popped_before_their_callback():
+    recorder = MessageRecorder()
+    first, *abandoned, pending = [
+        recorder.wait_for_count(n) for n in (1, 100, 101, 102, 103, 104)
+    ]
+    remaining = [recorder.wait_for_count(n) for n in (200, 201)]
+    for fut in abandoned:
+        fut.cancel()
+    await asyncio.sleep(0)
+
+    # The first waiter is popped for its count before its done-callback runs, and the other one compacts the heap
+    pending.cancel()
+    first.cancel()
+    await record(recorder, "a")
+    await asyncio.sleep(0)
+
+    assert [w[2] for w in recorder._count_waiters] == remaining
+    assert not recorder._abandoned
+
+    remaining[0].cancel()
+    await asyncio.sleep(0)
+    assert len(recorder._count_waiters) == 2
+
+
+async def test_predicate_only_sees_new_messages():
+    recorder = MessageRecorder()
+    await record(recorder, "a")
+
+    seen = []
+
+    def predicate(message: Message) -> bool:
+        seen.append(message.text)
+        return message.text == "c"
+
+    waiter = recorder.waiter(predicate)
+    await record(recorder, "b", "c", "d")
+
+    assert waiter.done()
+    assert seen == ["a", "b", "c"]
+    assert not recorder._predicate_waiters
+
+
+async def test_wait_until():
+    recorder = MessageRecorder()
+    task = asyncio.create_task(recorder.wait_until(lambda msgs: len(msgs) == 2))
+
+    await record(recorder, "a")
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    await record(recorder, "b")
+    await asyncio.wait_for(task, 1)
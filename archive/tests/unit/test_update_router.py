@@ -0,0 +1,117 @@
+import asyncio
+import gc
+import weakref
+from collections import OrderedDict
+from unittest.mock import Mock
+
+import pytest
+from pyrogram import Client
+from pyrogram import filters
+from pyrogram.dispatcher import Dispatcher
+from pyrogram.enums import ChatType
+from pyrogram.handlers import EditedMessageHandler
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import Chat
+from pyrogram.types import Message
+
+from tgintegration.update_router import get_router
+from tgintegration.update_router import route_handlers_transient
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_client() -> Client:
+    dp = Mock(Dispatcher)
+    dp.configure_mock(groups=OrderedDict({0: []}), locks_list=[asyncio.Lock()])
+    client = Mock(Client)
+    client.configure_mock(dispatcher=dp)
+    return client
+
+
+def make_message(chat_id: int, text: str = "hi") -> Message:
+    return Message(id=1, chat=Chat(id=chat_id, type=ChatType.PRIVATE), text=text)
+
+
+async def test_router_installed_once():
+    client = make_client()
+
+    router = await get_router(client)
+    assert await get_router(client) is router
+    assert list(client.dispatcher.groups.keys()) == [router.group, 0]
+
+    async with route_handlers_transient(client, 1, [MessageHandler(Mock())]):
+        async with route_handlers_transient(client, 2, [MessageHandler(Mock())]):
+            assert len(client.dispatcher.groups) == 2
+
+
+async def test_router_reinstalled_after_groups_cleared():
+    client = make_client()
+    router = await get_router(client)
+
+    client.dispatcher.groups.clear()
+    assert not router.is_installed
+
+    assert await get_router(client) is router
+    assert router.is_installed
+
+
+async def test_router_does_not_keep_client_alive():
+    client = make_client()
+    router = weakref.ref(await get_router(client))
+    client_ref = weakref.ref(client)
+
+    del client
+    gc.collect()
+    assert client_ref() is None
+    # The router becomes garbage once the collected client's entry has been removed
+    gc.collect()
+    assert router() is None
+
+
+async def test_routes_by_chat_id():
+    client = make_client()
+    router = await get_router(client)
+    received = []
+
+    async def record(_, message):
+        received.append(message.chat.id)
+
+    handlers = [MessageHandler(record), EditedMessageHandler(record)]
+    async with route_handlers_transient(client, 42, handlers):
+        await router._on_message(client, make_message(42))
+        await router._on_edited_message(client, make_message(42))
+        await router._on_message(client, make_message(43))
+
+    await router._on_message(client, make_message(42))
+
+    assert received == [42, 42]
+    assert router.num_routes(42) == 0
+
+
+async def test_wildcard_route_and_filters():
+    client = make_client()
+    router = await get_router(client)
+    received = []
+
+    async def record(_, message):
+        received.append(message.text)
+
+    async with route_handlers_transient(
+        client, None, [MessageHandler(record, filters.regex("^yes"))]
+    ):
+        await router._on_message(client, make_message(1, "yes"))
+        await router._on_message(client, make_message(2, "no"))
+        await router._on_message(client, make_message(3, "yes, too"))
+
+    assert received == ["yes", "yes, too"]
+
+
+async def test_routes_removed_when_body_raises():
+    client = make_client()
+    router = await get_router(client)
+
+    with pytest.raises(RuntimeError):
+        async with route_handlers_transient(client, 1, [MessageHandler(Mock())]):
+            raise RuntimeError
+
+    assert router.num_routes(1) == 0
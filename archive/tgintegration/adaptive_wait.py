@@ -0,0 +1,225 @@
+"""
+Learns how long to wait for consecutive messages from the gaps observed in previous interactions.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from pyrogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+GapKey = Tuple[Optional[int], Optional[str]]
+
+
+class StreamingQuantile:
+    """
+    Estimates a single quantile of a stream of observations in constant memory using the P² algorithm
+    (Jain & Chlamtac, 1985).
+    """
+
+    def __init__(self, quantile: float):
+        if not 0 < quantile < 1:
+            raise ValueError("The quantile must be between 0 and 1 (exclusive).")
+        self.quantile = quantile
+        self.count = 0
+
+        p = quantile
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        q = self._heights
+
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._positions
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> Optional[float]:
+        """
+        The current estimate, or `None` if nothing has been observed yet.
+        """
+        if not self._heights:
+            return None
+        if self.count < 5:
+            return self._heights[round(self.quantile * (len(self._heights) - 1))]
+        return self._heights[2]
+
+    def to_dict(self) -> dict:
+        return {
+            "quantile": self.quantile,
+            "count": self.count,
+            "heights": self._heights,
+            "positions": self._positions,
+            "desired": self._desired,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StreamingQuantile":
+        obj = cls(data["quantile"])
+        obj.count = data["count"]
+        obj._heights = list(data["heights"])
+        obj._positions = list(data["positions"])
+        obj._desired = list(data["desired"])
+        return obj
+
+
+class AdaptiveWait:
+    """
+    Learns the `wait_consecutive` duration for each peer and command from the gaps between the consecutive messages
+    that have been received in previous interactions.
+
+    The learned duration is the configured `percentile` of all observed gaps, multiplied by `headroom` and kept
+    within `minimum` and `maximum`. Until `min_samples` gaps have been observed for a peer and command, the fixed
+    fallback value is used instead.
+
+    Pass a `path` to persist the statistics between runs: They are loaded on creation (if the file exists) and
+    written by `save`.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        *,
+        headroom: float = 1.2,
+        min_samples: int = 10,
+        minimum: float = 0.1,
+        maximum: Optional[float] = None,
+        path: Union[str, Path] = None,
+    ):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.minimum = minimum
+        self.maximum = maximum
+        self.path = Path(path) if path else None
+
+        self._estimators: Dict[GapKey, StreamingQuantile] = {}
+
+        if self.path and self.path.exists():
+            self.load()
+
+    def observe(
+        self,
+        peer: Optional[int],
+        command: Optional[str],
+        messages: List[Message],
+        cut_off: Optional[float] = None,
+    ) -> None:
+        """
+        Records the gaps between the `exact_timestamp`s of the given consecutive `messages`. Edits of earlier
+        messages are no new messages and are ignored.
+
+        `cut_off` is the consecutive wait after which the collector stopped listening, if it did. Longer gaps can
+        never be observed, so the learned wait would only ever see gaps shorter than itself and drift downwards.
+        When the longest observed gap came within the `headroom` of the cut-off, the response was likely cut short
+        and the cut-off is recorded as a (censored) gap of at least that length.
+        """
+        timestamps = [
+            m.exact_timestamp
+            for m in messages
+            if hasattr(m, "exact_timestamp") and not getattr(m, "edit_date", None)
+        ]
+        gaps = [
+            current - previous for previous, current in zip(timestamps, timestamps[1:])
+        ]
+        if cut_off is not None and gaps and max(gaps) * self.headroom >= cut_off:
+            gaps.append(cut_off)
+        if not gaps:
+            return
+
+        estimator = self._estimators.get((peer, command))
+        if estimator is None:
+            estimator = self._estimators[(peer, command)] = StreamingQuantile(
+                self.percentile
+            )
+
+        for gap in gaps:
+            estimator.add(gap)
+
+    def get_wait_consecutive(
+        self,
+        peer: Optional[int],
+        command: Optional[str],
+        default: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        Returns the learned consecutive wait for the given `peer` and `command`, or the `default` if not enough gaps
+        have been observed yet.
+        """
+        estimator = self._estimators.get((peer, command))
+        if estimator is None or estimator.count < self.min_samples:
+            return default
+
+        wait = max(estimator.value * self.headroom, self.minimum)
+        if self.maximum is not None:
+            wait = min(wait, self.maximum)
+        return wait
+
+    def save(self, path: Union[str, Path] = None) -> None:
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("No path given to save the learned statistics to.")
+
+        data = [
+            {"peer": peer, "command": command, "estimator": estimator.to_dict()}
+            for (peer, command), estimator in self._estimators.items()
+        ]
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+    def load(self, path: Union[str, Path] = None) -> None:
+        path = Path(path) if path else self.path
+        data = json.loads(path.read_text(encoding="utf-8"))
+
+        for entry in data:
+            estimator = StreamingQuantile.from_dict(entry["estimator"])
+            if estimator.quantile != self.percentile:
+                logger.debug(
+                    f"Discarding gaps learned for the {estimator.quantile} quantile."
+                )
+                continue
+            self._estimators[(entry["peer"], entry["command"])] = estimator
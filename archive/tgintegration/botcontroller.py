@@ -4,16 +4,19 @@ Entry point to {{tgi}} features.
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from time import time
+from contextvars import ContextVar
 from typing import AsyncGenerator
+from typing import Callable
 from typing import cast
 from typing import List
 from typing import Optional
+from typing import Pattern
 from typing import Union
 
 from pyrogram import Client
 from pyrogram import filters
 from pyrogram.errors import FloodWait
+from pyrogram.errors import RPCError
 from pyrogram.filters import Filter
 from pyrogram.handlers.handler import Handler
 from pyrogram.raw.base import BotCommand
@@ -26,16 +29,48 @@ from pyrogram.types import Message
 from pyrogram.types import User
 from typing_extensions import AsyncContextManager
 
+from tgintegration.adaptive_wait import AdaptiveWait
+from tgintegration.cassette import CassetteRecorder
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
 from tgintegration.collector import collect
+from tgintegration.collector import MessageStream
+from tgintegration.collector import stream
 from tgintegration.containers.inlineresults import InlineResult
 from tgintegration.containers.inlineresults import InlineResultContainer
+from tgintegration.containers.responses import InvalidResponseError
 from tgintegration.containers.responses import Response
+from tgintegration.expectation import as_content_expectation
+from tgintegration.expectation import ContentExpectation
 from tgintegration.expectation import Expectation
 from tgintegration.handler_utils import add_handlers_transient
+from tgintegration.inline_cache import InlineResultCache
+from tgintegration.metrics import current_interaction
+from tgintegration.metrics import interaction
+from tgintegration.metrics import InteractionMetrics
+from tgintegration.metrics import MetricsRegistry
+from tgintegration.peer_cache import CachedPeer
+from tgintegration.peer_cache import PeerCache
+from tgintegration.rate_limiter import RateLimiter
+from tgintegration.retry import call_with_retry
+from tgintegration.retry import retry_budget
+from tgintegration.retry import RetryPolicy
 from tgintegration.timeout_settings import TimeoutSettings
 from tgintegration.utils.frame_utils import get_caller_function_name
 from tgintegration.utils.sentinel import NotSet
 
+# The timeout settings of the interaction that is being performed in the current task, which the command sent during
+# the interaction gets recorded in
+_current_timeouts: ContextVar[Optional[TimeoutSettings]] = ContextVar(
+    "tgintegration_current_timeouts", default=None
+)
+
+# The requests whose outcome the peer gets to see. Only these wait for the limit per peer of the `rate_limiter`, while
+# lookups like inline queries are merely limited per account.
+_PEER_LIMITED_METHODS = frozenset(
+    {"send_message", "send_inline_bot_result", "request_callback_answer"}
+)
+
 
 class BotController:
     """
@@ -54,6 +89,14 @@ class BotController:
         wait_consecutive: Optional[Union[int, float]] = 2.0,
         raise_no_response: bool = True,
         global_action_delay: Union[int, float] = 0.8,
+        adaptive_wait: Optional[AdaptiveWait] = None,
+        inline_cache: Optional[InlineResultCache] = None,
+        peer_cache: Optional[PeerCache] = None,
+        clock: Optional[Clock] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cassette: Optional[CassetteRecorder] = None,
     ):
         """
         Creates a new `BotController`.
@@ -65,7 +108,26 @@ class BotController:
             wait_consecutive: Additional time in seconds to wait for _additional_ messages upon receiving a response
                 (even when `max_wait` is exceeded).
             raise_no_response: Whether to raise an exception on timeout/invalid response or to log silently.
-            global_action_delay: The time to wait in between `collect` calls.
+            global_action_delay: The minimum time in seconds between two messages or button clicks sent to the same
+                peer. The delay runs from one request to the next, and no longer from the last response the peer
+                gave. Only used to configure the default `rate_limiter`.
+            adaptive_wait: Learns `wait_consecutive` per peer and command from previous responses. Applies to
+                `collect` calls that do not pass an explicit `wait_consecutive`.
+            inline_cache: Caches the results of `query_inline` for as long as the bot allows. Measures expiry with
+                the controller's `clock` unless the cache was given a clock of its own.
+            peer_cache: Persists the information fetched by `initialize` between runs. Measures the age of entries
+                with the controller's `clock` unless the cache was given a clock of its own.
+            clock: The clock that all timeouts and delays are measured with. Defaults to the `client`'s clock if it
+                has one (like the `FakeClient`), otherwise to real time.
+            metrics: Records counters and histograms about all interactions of this controller.
+            rate_limiter: Throttles every request that the controller (and its containers) send to Telegram, and
+                slows down when Telegram responds with a `FloodWait`. Only messages, inline result sends and button
+                clicks count towards the limit per peer. Defaults to a limiter that allows one of these per
+                `global_action_delay` and peer. Pass the same instance to several controllers of an account to
+                throttle them together.
+            retry_policy: How requests that fail with a `FloodWait` or an `InternalServerError` are retried.
+                Pass `RetryPolicy(max_retries=0)` to disable retrying.
+            cassette: Records all calls to Telegram and all collected messages, to be replayed by a `ReplayClient`.
         """
         self.client = client
         self.peer = peer
@@ -73,13 +135,27 @@ class BotController:
         self.min_wait_consecutive = wait_consecutive
         self.raise_no_response = raise_no_response
         self.global_action_delay = global_action_delay
+        self.adaptive_wait = adaptive_wait
+        self.inline_cache = inline_cache
+        self.peer_cache = peer_cache
+        self.clock = clock or getattr(client, "clock", None) or REAL_CLOCK
+        if inline_cache is not None and inline_cache.clock is None:
+            inline_cache.clock = self.clock
+        if peer_cache is not None and peer_cache.clock is None:
+            peer_cache.clock = self.clock
+        self.metrics = InteractionMetrics(metrics) if metrics is not None else None
+        self.rate_limiter = rate_limiter or RateLimiter(
+            peer_rate=1 / global_action_delay if global_action_delay else None,
+            clock=self.clock,
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cassette = cassette
 
         self._input_peer: Optional[InputPeerUser] = None
         self.peer_user: Optional[User] = None
         self.peer_id: Optional[int] = None
         self.command_list: List[BotCommand] = []
 
-        self._last_response_ts: Optional[time] = None
         self.logger = logging.getLogger(self.__class__.__name__)
 
     async def initialize(self, start_client: bool = True) -> None:
@@ -98,13 +174,31 @@ class BotController:
         if start_client and not self.client.is_connected:
             await self.client.start()
 
-        self._input_peer = await self.client.resolve_peer(self.peer)
-        self.peer_user = await self.client.get_users(self.peer)
+        cached = (
+            self.peer_cache.get(self.client.name, self.peer)
+            if self.peer_cache
+            else None
+        )
+        if cached is not None:
+            self._input_peer, self.peer_user, self.command_list = cached
+            self.peer_id = self.peer_user.id
+            return
+
+        # Looking up the peer only counts towards the limit of the account
+        self._input_peer = await self._call(None, self.client.resolve_peer, self.peer)
+        self.peer_user = await self._call(None, self.client.get_users, self.peer)
         self.peer_id = self.peer_user.id
 
         if self.peer_user.is_bot:
             self.command_list = await self._get_command_list()
 
+        if self.peer_cache:
+            self.peer_cache.put(
+                self.client.name,
+                self.peer,
+                CachedPeer(self._input_peer, self.peer_user, self.command_list),
+            )
+
     async def _ensure_preconditions(self, *, bots_only: bool = False):
         if not self.peer_id:
             await self.initialize()
@@ -121,13 +215,18 @@ class BotController:
         chat_filter = filters.chat(override_peer or self.peer_id) & filters.incoming
         return None if user_filters is None else user_filters & chat_filter
 
+    def _get_chat_id(self, override_peer: Union[int, str] = None) -> Optional[int]:
+        # Usernames cannot be resolved synchronously, so such collectors listen to all chats and rely on the filters
+        peer = override_peer or self.peer_id
+        return peer if isinstance(peer, int) else None
+
     async def _get_command_list(self) -> List[BotCommand]:
         return list(
             cast(
                 BotInfo,
                 (
-                    await self.client.invoke(
-                        GetFullUser(id=await self.client.resolve_peer(self.peer_id))
+                    await self._call(
+                        None, self.client.invoke, GetFullUser(id=self._input_peer)
                     )
                 ).full_user.bot_info,
             ).commands
@@ -141,16 +240,52 @@ class BotController:
             Be careful as this will completely drop your mutual message history.
         """
         await self._ensure_preconditions()
-        await self.client.invoke(
-            DeleteHistory(peer=self._input_peer, max_id=0, just_clear=False)
+        await self._call(
+            self.peer_id,
+            self.client.invoke,
+            DeleteHistory(peer=self._input_peer, max_id=0, just_clear=False),
         )
 
-    async def _wait_global(self):
-        if self.global_action_delay and self._last_response_ts:
-            # Sleep for as long as the global delay prescribes
-            sleep = self.global_action_delay - (time() - self._last_response_ts.started)
-            if sleep > 0:
-                await asyncio.sleep(sleep)
+    async def _call(
+        self, peer: Optional[Union[int, str]], method: Callable, *args, **kwargs
+    ):
+        """
+        Performs a request to Telegram regarding the given `peer` (if any). Every attempt passes the controller's
+        `rate_limiter`, which learns from any `FloodWait`, and transient errors are retried according to the
+        `retry_policy`.
+        """
+        account = self.client.name
+        limited_peer = peer if method.__name__ in _PEER_LIMITED_METHODS else None
+
+        async def attempt():
+            await self.rate_limiter.acquire(account, limited_peer)
+            try:
+                result = await method(*args, **kwargs)
+            except FloodWait as e:
+                self.rate_limiter.on_flood_wait(account, peer, e.value)
+                if self.metrics:
+                    self.metrics.observe_flood_wait(
+                        str(self.peer if peer in (None, self.peer_id) else peer),
+                        current_interaction()[0],
+                    )
+                raise
+            self.rate_limiter.on_success(account, peer)
+            return result
+
+        if self.cassette is None:
+            return await call_with_retry(attempt, self.retry_policy, self.clock)
+
+        event = self.cassette.start_call(peer, method.__name__, args, kwargs)
+        try:
+            result = await call_with_retry(attempt, self.retry_policy, self.clock)
+        except RPCError as e:
+            self.cassette.finish_call(event, error=e)
+            raise
+        except BaseException:
+            self.cassette.discard_call(event)
+            raise
+        self.cassette.finish_call(event, result)
+        return result
 
     @asynccontextmanager
     async def add_handler_transient(
@@ -176,7 +311,7 @@ class BotController:
                     await asyncio.sleep(3)  # Wait 3 seconds for a reply
             ```
         """
-        async with add_handlers_transient(self.client, handler):
+        async with add_handlers_transient(self.client, [handler]):
             yield
 
     @asynccontextmanager
@@ -189,6 +324,7 @@ class BotController:
         max_wait: Union[int, float] = 15,
         wait_consecutive: Optional[Union[int, float]] = None,
         raise_: Optional[bool] = None,
+        expect: Union[ContentExpectation, Pattern, str] = None,
     ) -> AsyncContextManager[Response]:
         """
 
@@ -199,42 +335,143 @@ class BotController:
             max_wait ():
             wait_consecutive ():
             raise_ ():
+            expect: What the response needs to contain, e.g. `HasInlineKeyboard()` or a regular expression.
+                The collector returns as soon as it is met instead of waiting for consecutive messages.
 
         Returns:
 
         """
         await self._ensure_preconditions()
-        await self._wait_if_necessary()
 
-        async with collect(
-            self,
-            self._merge_default_filters(filters, peer),
-            expectation=Expectation(
-                min_messages=count or NotSet, max_messages=count or NotSet
-            ),
-            timeouts=TimeoutSettings(
-                max_wait=max_wait,
-                wait_consecutive=wait_consecutive,
-                raise_on_timeout=raise_
-                if raise_ is not None
-                else self.raise_no_response,
-            ),
-        ) as response:
-            yield response
-
-        self._last_response_ts = response.last_message_timestamp
-
-    async def _wait_if_necessary(self):
-        if not self.global_action_delay or not self._last_response_ts:
-            return
+        adaptive = self.adaptive_wait if wait_consecutive is None else None
+        timeouts = TimeoutSettings(
+            max_wait=max_wait,
+            wait_consecutive=self.min_wait_consecutive
+            if adaptive
+            else wait_consecutive,
+            raise_on_timeout=raise_ if raise_ is not None else self.raise_no_response,
+            adaptive_wait=adaptive,
+            clock=self.clock,
+        )
+        kind, command = current_interaction()
+
+        async with self._observe(kind, timeouts, peer, command) as observe:
+            async with collect(
+                self,
+                self._merge_default_filters(filters, peer),
+                expectation=Expectation(
+                    min_messages=count or NotSet,
+                    max_messages=count or NotSet,
+                    content=as_content_expectation(expect) if expect else None,
+                ),
+                timeouts=timeouts,
+                chat_id=self._get_chat_id(peer),
+            ) as response:
+                yield response
+            observe(response)
 
-        wait_for = (self.global_action_delay + self._last_response_ts) - time()
-        if wait_for > 0:
-            # noinspection PyUnboundLocalVariable
-            self.logger.debug(
-                f"Waiting {wait_for} seconds to respect global action delay..."
-            )
-            await asyncio.sleep(wait_for)
+    @asynccontextmanager
+    async def stream(
+        self,
+        filters: Filter = None,
+        count: int = None,
+        *,
+        peer: Union[int, str] = None,
+        max_wait: Union[int, float] = 15,
+        wait_consecutive: Optional[Union[int, float]] = None,
+        raise_: Optional[bool] = None,
+        expect: Union[ContentExpectation, Pattern, str] = None,
+    ) -> AsyncContextManager[MessageStream]:
+        """
+        Like `collect`, but instead of waiting for the complete response, the yielded `MessageStream` hands out
+        every message of the `peer` as soon as it arrives. Breaking out of the loop or leaving the context manager
+        stops listening immediately. The streamed response is recorded in the `metrics` (as kind `"stream"`) and
+        the `adaptive_wait` like a collected one.
+
+        Args:
+            filters: Additional filters that incoming messages need to match.
+            count: Stop the stream after this many messages.
+            peer: Overrides the controller's `peer` for this interaction.
+            max_wait: Maximum time in seconds to wait for the first message (and for `count` messages).
+            wait_consecutive: Time in seconds to wait for each further message. Learned by the `adaptive_wait`
+                (if any) when not given.
+            raise_: Whether to raise an `InvalidResponseError` when the peer does not reply.
+            expect: What the response needs to contain. The stream ends right after the message that meets it.
+
+        Yields:
+            A `MessageStream` that can be iterated with `async for`.
+
+        Examples:
+            ``` python
+            async with controller.stream() as messages:
+                await controller.send_command("start")
+                async for message in messages:
+                    if message.reply_markup:
+                        break
+            ```
+        """
+        await self._ensure_preconditions()
+
+        adaptive = self.adaptive_wait if wait_consecutive is None else None
+        timeouts = TimeoutSettings(
+            max_wait=max_wait,
+            wait_consecutive=self.min_wait_consecutive
+            if adaptive
+            else wait_consecutive,
+            raise_on_timeout=raise_ if raise_ is not None else self.raise_no_response,
+            adaptive_wait=adaptive,
+            clock=self.clock,
+        )
+
+        async with self._observe("stream", timeouts, peer) as observe:
+            async with stream(
+                self,
+                self._merge_default_filters(filters, peer),
+                expectation=Expectation(
+                    min_messages=count or NotSet,
+                    max_messages=count or NotSet,
+                    content=as_content_expectation(expect) if expect else None,
+                ),
+                timeouts=timeouts,
+                chat_id=self._get_chat_id(peer),
+            ) as message_stream:
+                yield message_stream
+            observe(message_stream.response)
+
+    @asynccontextmanager
+    async def _observe(
+        self,
+        kind: str,
+        timeouts: TimeoutSettings,
+        peer: Union[int, str] = None,
+        command: str = None,
+    ) -> AsyncGenerator[Callable[[Response], None], None]:
+        """
+        Records the outcome of the interaction in the body in the controller's `metrics` (if any). The yielded
+        function needs to be called with the `Response` upon success.
+
+        The requests made within the body share the retry budget of the `retry_policy`, and a command sent within
+        the body is recorded as the `adaptive_key` of the interaction's `timeouts`.
+        """
+
+        def labels():
+            # The command may only be known once the interaction has been performed
+            return str(peer or self.peer), command or timeouts.adaptive_key, kind
+
+        def observe(response: Response) -> None:
+            if self.metrics:
+                self.metrics.observe_response(*labels(), response)
+
+        token = _current_timeouts.set(timeouts)
+        try:
+            with retry_budget(self.retry_policy.budget):
+                yield observe
+        except InvalidResponseError:
+            if self.metrics:
+                self.metrics.observe_timeout(*labels())
+            raise
+        finally:
+            _current_timeouts.reset(token)
 
     async def ping_bot(
         self,
@@ -254,27 +491,24 @@ class BotController:
 
         async def send_pings():
             for n, m in enumerate(messages):
-                try:
-                    if n >= 1:
-                        await asyncio.sleep(1)
-                    await self.send_command(m, peer=peer)
-                except FloodWait as e:
-                    if e.x > 5:
-                        self.logger.warning(
-                            "send_message flood: waiting {} seconds".format(e.x)
-                        )
-                    await asyncio.sleep(e.x)
-                    continue
+                if n >= 1:
+                    await self.clock.sleep(1)
+                await self.send_command(m, peer=peer)
 
-        async with collect(
-            self,
-            self._merge_default_filters(override_filters, peer),
-            expectation=Expectation(min_messages=1),
-            timeouts=TimeoutSettings(
-                max_wait=max_wait, wait_consecutive=wait_consecutive
-            ),
-        ) as response:
-            await send_pings()
+        timeouts = TimeoutSettings(
+            max_wait=max_wait, wait_consecutive=wait_consecutive, clock=self.clock
+        )
+        with interaction("ping"):
+            async with self._observe("ping", timeouts, peer) as observe:
+                async with collect(
+                    self,
+                    self._merge_default_filters(override_filters, peer),
+                    expectation=Expectation(min_messages=1),
+                    timeouts=timeouts,
+                    chat_id=self._get_chat_id(peer),
+                ) as response:
+                    await send_pings()
+                observe(response)
 
         return response
 
@@ -288,7 +522,13 @@ class BotController:
         """
         Send a slash-command with corresponding parameters.
         """
-        text = "/" + command.lstrip("/")
+        command = command.lstrip("/")
+        text = "/" + command
+
+        # Associates the response with the command, e.g. for learning the gaps between its messages
+        timeouts = _current_timeouts.get()
+        if timeouts is not None:
+            timeouts.adaptive_key = command
 
         if add_bot_name and self.peer_user.username:
             text += f"@{self.peer_user.username}"
@@ -297,35 +537,118 @@ class BotController:
             text += " "
             text += " ".join(args)
 
-        return await self.client.send_message(peer or self.peer_id, text)
+        peer = peer or self.peer_id
+        return await self._call(peer, self.client.send_message, peer, text)
+
+    async def _get_inline_bot_results(
+        self,
+        query: str,
+        offset: str = "",
+        latitude: float = None,
+        longitude: float = None,
+    ) -> BotResults:
+        return await self._call(
+            self.peer_id,
+            self.client.get_inline_bot_results,
+            self.peer_id,
+            query,
+            offset=offset,
+            latitude=latitude,
+            longitude=longitude,
+        )
 
-    async def _iter_bot_results(
+    async def _iter_inline_pages(
         self,
-        bot_results: BotResults,
         query: str,
         latitude: float = None,
         longitude: float = None,
         limit: int = 200,
-        current_offset: str = "",
+        first_page: BotResults = None,
+    ) -> AsyncGenerator[BotResults, None]:
+        # While a page is being processed by the consumer, the request for the next one is already in flight
+        offset = ""
+        num_fetched = 0
+        next_page: Optional[asyncio.Future] = None
+        page = first_page
+
+        try:
+            while True:
+                if page is None:
+                    if next_page is None:
+                        next_page = asyncio.ensure_future(
+                            self._get_inline_bot_results(
+                                query, offset, latitude, longitude
+                            )
+                        )
+                    page = await next_page
+                    next_page = None
+
+                num_fetched += len(page.results)
+                has_more = bool(page.next_offset) and page.next_offset != offset
+                offset = page.next_offset
+
+                # Duplicates may make further pages necessary, but prefetching only pays off while below the limit
+                if has_more and num_fetched < limit:
+                    next_page = asyncio.ensure_future(
+                        self._get_inline_bot_results(query, offset, latitude, longitude)
+                    )
+
+                yield page
+
+                if not has_more:
+                    return
+                page = None
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    async def _iter_inline_results(
+        self, pages: AsyncGenerator[BotResults, None], limit: int
     ) -> AsyncGenerator[InlineResult, None]:
-        num_returned: int = 0
-        while num_returned <= limit:
-
-            for result in bot_results.results:
-                yield InlineResult(self, result, bot_results.query_id)
-                num_returned += 1
-
-            if not bot_results.next_offset or current_offset == bot_results.next_offset:
-                break  # no more results
-
-            bot_results: BotResults = await self.client.get_inline_bot_results(
-                self.peer_id,
-                query,
-                offset=current_offset,
-                latitude=latitude,
-                longitude=longitude,
-            )
-            current_offset = bot_results.next_offset
+        seen_ids = set()
+        try:
+            async for page in pages:
+                for result in page.results:
+                    if result.id in seen_ids:
+                        continue  # Bots may return the same result on several pages
+                    seen_ids.add(result.id)
+
+                    yield InlineResult(self, result, page.query_id)
+
+                    if len(seen_ids) >= limit:
+                        return
+        finally:
+            await pages.aclose()
+
+    async def iter_inline(
+        self,
+        query: str,
+        latitude: float = None,
+        longitude: float = None,
+        limit: int = 200,
+    ) -> AsyncGenerator[InlineResult, None]:
+        """
+        Iterates over the inline results of the `peer` (which needs to be a bot), requesting further pages in the
+        background while the current one is being consumed. Results with an `id` that has been seen on a previous
+        page are skipped.
+
+        Args:
+            query: The query text.
+            latitude: Latitude of a geo point.
+            longitude: Longitude of a geo point.
+            limit: The maximum number of results to yield.
+
+        Yields:
+            Each `InlineResult` as soon as its page has arrived.
+        """
+        await self._ensure_preconditions(bots_only=True)
+
+        if limit <= 0:
+            raise ValueError("Cannot get 0 or less results.")
+
+        pages = self._iter_inline_pages(query, latitude, longitude, limit)
+        async for result in self._iter_inline_results(pages, limit):
+            yield result
 
     async def query_inline(
         self,
@@ -333,6 +656,9 @@ class BotController:
         latitude: float = None,
         longitude: float = None,
         limit: int = 200,
+        *,
+        use_cache: bool = True,
+        refresh_cache: bool = False,
     ) -> InlineResultContainer:
         """
         Requests inline results from the `peer` (which needs to be a bot).
@@ -343,6 +669,8 @@ class BotController:
             longitude: Longitude of a geo point.
             limit: When result pages get iterated automatically, specifies the maximum number of results to return
                 from the bot.
+            use_cache: Set to `False` to bypass the controller's `inline_cache` (if any) for this call.
+            refresh_cache: Set to `True` to skip looking up cached results, but store the fresh ones.
 
         Returns:
             A container for convenient access to the inline results.
@@ -352,38 +680,48 @@ class BotController:
         if limit <= 0:
             raise ValueError("Cannot get 0 or less results.")
 
-        start_offset = ""
-        first_batch: BotResults = await self.client.get_inline_bot_results(
-            self.peer_id,
-            query,
-            offset=start_offset,
-            latitude=latitude,
-            longitude=longitude,
-        )
+        cache = self.inline_cache if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(self.peer_id, query, latitude, longitude, limit)
+            if not refresh_cache:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        started = self.clock.now()
+        with interaction("inline_query"), retry_budget(self.retry_policy.budget):
+            first_page = await self._get_inline_bot_results(
+                query, latitude=latitude, longitude=longitude
+            )
+            latency = self.clock.now() - started
 
-        gallery = first_batch.gallery
-        switch_pm = first_batch.switch_pm
-        users = first_batch.users
-
-        results = [
-            x
-            async for x in self._iter_bot_results(
-                first_batch,
-                query,
-                latitude=latitude,
-                longitude=longitude,
-                limit=limit,
-                current_offset=start_offset,
+            pages = self._iter_inline_pages(
+                query, latitude, longitude, limit, first_page=first_page
+            )
+            results = [x async for x in self._iter_inline_results(pages, limit)]
+
+        if self.metrics:
+            self.metrics.observe_interaction(
+                str(self.peer),
+                None,
+                "inline_query",
+                latency=latency,
+                duration=self.clock.now() - started,
             )
-        ]
 
-        return InlineResultContainer(
+        container = InlineResultContainer(
             self,
             query,
             latitude=latitude,
             longitude=longitude,
             results=results,
-            gallery=gallery,
-            switch_pm=switch_pm,
-            users=users,
+            gallery=first_page.gallery,
+            switch_pm=first_page.switch_pm,
+            users=first_page.users,
         )
+
+        if cache is not None:
+            cache.put(cache_key, container, ttl=first_page.cache_time)
+
+        return container
@@ -0,0 +1,247 @@
+"""
+Records the conversations of `BotController`s into cassettes that a `ReplayClient` can play back without a network.
+"""
+import base64
+import inspect
+import json
+import logging
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from enum import Enum
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+import pyrogram
+from pyrogram import enums
+from pyrogram import errors
+from pyrogram.errors import RPCError
+from pyrogram.raw.core import TLObject
+from pyrogram.types import Message
+from pyrogram.types import Object
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+_SKIP = object()
+
+
+def encode(value: Any) -> Any:
+    """
+    Converts the given value into JSON-compatible data that `decode` restores it from.
+
+    Raw API objects are stored in their binary TL representation. High-level Pyrogram types are stored as the
+    arguments to their constructor, leaving out everything that is `None`.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [v for v in (encode(x) for x in value) if v is not _SKIP]
+    if isinstance(value, bytes):
+        return {"$bytes": base64.b64encode(value).decode()}
+    if isinstance(value, datetime):
+        return {"$datetime": value.timestamp()}
+    if isinstance(value, Enum) and hasattr(enums, value.__class__.__name__):
+        return {"$enum": f"{value.__class__.__name__}.{value.name}"}
+    if isinstance(value, TLObject):
+        return {"$tl": base64.b64encode(value.write()).decode()}
+    if isinstance(value, Object) and hasattr(pyrogram.types, value.__class__.__name__):
+        data = {"$type": value.__class__.__name__}
+        for name in _get_parameters(value.__class__):
+            attr = getattr(value, name, None)
+            if attr is None:
+                continue
+            encoded = encode(attr)
+            if encoded is not _SKIP:
+                data[name] = encoded
+        return data
+    return _SKIP
+
+
+def decode(data: Any, client: Any = None) -> Any:
+    """
+    Restores a value from data created by `encode`, binding Pyrogram types to the given `client`.
+    """
+    if isinstance(data, list):
+        return [decode(x, client) for x in data]
+    if not isinstance(data, dict):
+        return data
+    if "$bytes" in data:
+        return base64.b64decode(data["$bytes"])
+    if "$datetime" in data:
+        return datetime.fromtimestamp(data["$datetime"])
+    if "$enum" in data:
+        enum_name, member = data["$enum"].split(".")
+        return getattr(getattr(enums, enum_name), member)
+    if "$tl" in data:
+        return TLObject.read(BytesIO(base64.b64decode(data["$tl"])))
+    if "$type" in data:
+        cls = getattr(pyrogram.types, data["$type"])
+        kwargs = {k: decode(v, client) for k, v in data.items() if k != "$type"}
+        if "client" in inspect.signature(cls.__init__).parameters:
+            kwargs["client"] = client
+        return cls(**kwargs)
+    return {k: decode(v, client) for k, v in data.items()}
+
+
+def encode_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Encodes the values of keyword arguments, leaving out those that cannot be encoded.
+    """
+    return {
+        k: v for k, v in ((k, encode(v)) for k, v in kwargs.items()) if v is not _SKIP
+    }
+
+
+_parameters: Dict[type, Tuple[str, ...]] = {}
+
+
+def _get_parameters(cls: type) -> Tuple[str, ...]:
+    params = _parameters.get(cls)
+    if params is None:
+        params = _parameters[cls] = tuple(
+            name
+            for name in inspect.signature(cls.__init__).parameters
+            if name not in ("self", "client")
+        )
+    return params
+
+
+def encode_error(error: RPCError) -> dict:
+    return {"$error": error.__class__.__name__, "value": encode(error.value)}
+
+
+def decode_error(data: dict) -> RPCError:
+    return getattr(errors, data["$error"])(value=decode(data["value"]))
+
+
+@dataclass
+class Cassette:
+    """
+    The outgoing calls of a recorded session and the messages received in response to them, in the order they
+    happened. Every event has a `t`ime in seconds relative to the first one.
+
+    Calls look like `{"t": 0.0, "call": "send_message", "args": [...], "kwargs": {...}, "result": ...}` and messages
+    like `{"t": 0.4, "message": {...}, "edited": false, "after": 0}`, where `after` is the index of the call that
+    the message answered (the latest call to the message's chat).
+    """
+
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def calls(self) -> List[Dict[str, Any]]:
+        return [e for e in self.events if "call" in e]
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        return [e for e in self.events if "message" in e]
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(
+            json.dumps(
+                {"version": CASSETTE_VERSION, "events": self.events},
+                separators=(",", ":"),
+            )
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        data = json.loads(Path(path).read_text())
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')}.")
+        return cls(data["events"])
+
+
+class CassetteRecorder:
+    """
+    Records a `Cassette` while being assigned to the `cassette` of `BotController`s, which then report every call
+    they make to Telegram (from `send_command`, clicks, `query_inline` etc.) and every message they collect.
+
+    ``` python
+    recorder = CassetteRecorder()
+    controller = BotController(client, "@bot", cassette=recorder)
+    ...
+    recorder.save("start.cassette.json")
+    ```
+    """
+
+    def __init__(self, clock: Clock = None):
+        self.clock = clock or REAL_CLOCK
+        self.cassette = Cassette()
+
+        self._started: Optional[float] = None
+        self._last_call: Optional[int] = None
+        self._last_call_by_chat: Dict[int, int] = {}
+        self._recorded_messages: Set[Tuple[int, int, Optional[float]]] = set()
+
+    def _now(self) -> float:
+        now = self.clock.now()
+        if self._started is None:
+            self._started = now
+        return round(now - self._started, 6)
+
+    def start_call(
+        self, peer: Union[int, str, None], method: str, args: tuple, kwargs: dict
+    ) -> Dict[str, Any]:
+        """
+        Records the beginning of a call, so that the messages that arrive while it is in progress are ordered after
+        it. Returns the event, to be completed with `finish_call` (or dropped with `discard_call`).
+        """
+        event = {
+            "t": self._now(),
+            "call": method,
+            "args": encode(args),
+            "kwargs": encode_kwargs(kwargs),
+        }
+        self._last_call = len(self.cassette.events)
+        if isinstance(peer, int):
+            self._last_call_by_chat[peer] = self._last_call
+        self.cassette.events.append(event)
+        return event
+
+    def finish_call(
+        self, event: Dict[str, Any], result: Any = None, error: RPCError = None
+    ) -> None:
+        event["duration"] = round(self._now() - event["t"], 6)
+        if error is not None:
+            event["error"] = encode_error(error)
+        else:
+            encoded = encode(result)
+            event["result"] = None if encoded is _SKIP else encoded
+
+    def discard_call(self, event: Dict[str, Any]) -> None:
+        """
+        Marks a call that failed with an error that cannot be replayed. It is kept for the order of the events, but
+        skipped on replay.
+        """
+        event["discarded"] = True
+
+    def record_message(self, message: Message) -> None:
+        edit_date = message.edit_date.timestamp() if message.edit_date else None
+        key = (message.chat.id if message.chat else 0, message.id, edit_date)
+        if key in self._recorded_messages:
+            return  # Collected by several collectors at once
+        self._recorded_messages.add(key)
+
+        self.cassette.events.append(
+            {
+                "t": self._now(),
+                "message": encode(message),
+                "edited": edit_date is not None,
+                "after": self._last_call_by_chat.get(key[0], self._last_call),
+            }
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        self.cassette.save(path)
@@ -0,0 +1,250 @@
+"""
+Spreads the interactions with many peers across several accounts.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+from typing import TypeVar
+from typing import Union
+
+from pyrogram import Client
+
+from tgintegration.botcontroller import BotController
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.controller_pool import ControllerPool
+from tgintegration.controller_pool import InitializationError
+from tgintegration.controller_pool import Peer
+from tgintegration.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ClientPool:
+    """
+    Distributes peers across several user clients (accounts), each driving its peers through a `ControllerPool`, so
+    that the throughput of a test run is not capped by the limits Telegram imposes on a single account.
+
+    Every peer is assigned to an account on first use and sticks to it, as the conversation state (and the access
+    hash of the peer) belongs to that account. New peers go to the least loaded account: The one with the fewest
+    running interactions and then the fewest assigned peers. Accounts that are waiting out a `FloodWait` are taken
+    out of rotation until it has passed, unless all of them are.
+
+    Controllers are initialized on first use, so a peer that cannot be resolved only fails its own interactions.
+
+    Args:
+        clients: The user clients, with distinct names.
+        max_concurrency_per_client: The maximum number of interactions per account at once.
+        rate_limiter: Throttles the requests of all accounts, keeping separate limits per account (client name).
+            Defaults to a limiter with the default rate per account and one request per `global_action_delay` and
+            peer.
+        controller_kwargs: Keyword arguments for every `BotController`.
+
+    Examples:
+        ``` python
+        clients = [Client(f"agent_{i}", session_string=s) for i, s in enumerate(session_strings)]
+
+        async with ClientPool(clients) as pool:
+            results = await pool.run(check_start, bot_usernames)
+        ```
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[Client],
+        *,
+        max_concurrency_per_client: int = 10,
+        rate_limiter: Optional[RateLimiter] = None,
+        **controller_kwargs,
+    ):
+        if not clients:
+            raise ValueError("At least one client is required.")
+        names = [c.name for c in clients]
+        if len(set(names)) != len(names):
+            raise ValueError(f"The clients need distinct names, got {names}.")
+
+        if rate_limiter is None:
+            global_action_delay = controller_kwargs.get("global_action_delay", 0.8)
+            rate_limiter = RateLimiter(
+                peer_rate=1 / global_action_delay if global_action_delay else None,
+                clock=controller_kwargs.get("clock")
+                or getattr(clients[0], "clock", None)
+                or REAL_CLOCK,
+            )
+        self.rate_limiter = rate_limiter
+
+        self.pools: Dict[str, ControllerPool] = {
+            client.name: ControllerPool(
+                client,
+                max_concurrency=max_concurrency_per_client,
+                rate_limiter=rate_limiter,
+                **controller_kwargs,
+            )
+            for client in clients
+        }
+        self._assignments: Dict[Peer, str] = {}
+        self._active: Dict[str, int] = {name: 0 for name in self.pools}
+        self._starting: Dict[Hashable, asyncio.Future] = {}
+
+    def is_available(self, account: str) -> bool:
+        """
+        Whether the `account` is not waiting out a `FloodWait`.
+        """
+        return (
+            self.rate_limiter.get_blocked_until(account)
+            <= self.rate_limiter.clock.now()
+        )
+
+    def _select_account(self) -> str:
+        candidates = [a for a in self.pools if self.is_available(a)]
+        if not candidates:
+            # Every account is flooded, so the one that becomes available first takes the peer
+            return min(self.pools, key=self.rate_limiter.get_blocked_until)
+        return min(candidates, key=lambda a: (self._active[a], len(self.pools[a])))
+
+    def assign(self, peer: Peer) -> str:
+        """
+        Returns the name of the account that interacts with the `peer`, assigning one if necessary.
+        """
+        account = self._assignments.get(peer)
+        if account is None:
+            account = self._assignments[peer] = self._select_account()
+            self.pools[account].add(peer)
+            logger.debug(f"Assigned {peer} to account {account}.")
+        return account
+
+    def release(self, peer: Peer) -> None:
+        """
+        Removes the `peer` from its account, so that its next interaction is assigned to an account anew.
+        """
+        account = self._assignments.pop(peer)
+        self.pools[account].remove(peer)
+
+    async def get_controller(self, peer: Peer) -> BotController:
+        """
+        Returns the initialized controller of the account assigned to the `peer`, starting the account's client and
+        initializing the controller if necessary.
+        """
+        account = self.assign(peer)
+        pool = self.pools[account]
+        controller = pool[peer]
+        if not controller.peer_id:
+            await self._once(("client", account), pool.start)
+            await self._once(
+                ("peer", account, peer),
+                lambda: controller.initialize(start_client=False),
+            )
+        return controller
+
+    async def _once(self, key: Hashable, start: Callable[[], Awaitable[Any]]) -> None:
+        # Concurrent callers wait for the same attempt, while a failed attempt is repeated by the next caller
+        future = self._starting.get(key)
+        if future is None or future.done():
+            future = self._starting[key] = asyncio.ensure_future(start())
+        try:
+            await asyncio.shield(future)
+        finally:
+            if future.done() and self._starting.get(key) is future:
+                del self._starting[key]
+
+    @asynccontextmanager
+    async def session(self, peer: Peer) -> AsyncIterator[BotController]:
+        """
+        Yields the controller for the `peer` once its account has a free slot, counting the body towards the load of
+        the account.
+        """
+        controller = await self.get_controller(peer)
+        account = self._assignments[peer]
+        pool = self.pools[account]
+
+        async with pool.slot():
+            self._active[account] += 1
+            try:
+                yield controller
+            finally:
+                self._active[account] -= 1
+
+    async def run(
+        self,
+        interaction: Callable[[BotController], Awaitable[T]],
+        peers: Iterable[Peer],
+        *,
+        return_exceptions: bool = True,
+    ) -> Dict[Peer, Union[T, BaseException]]:
+        """
+        Performs the `interaction` with each of the `peers` concurrently, spread across the accounts.
+
+        All peers that have not been assigned yet are assigned before any of the interactions start, i.e. they are
+        spread across the accounts by their numbers of assigned peers and the interactions already running. The
+        assignment does not change while the interactions are performed.
+
+        Args:
+            interaction: A coroutine function that takes a `BotController`.
+            peers: The peers to interact with.
+            return_exceptions: Whether errors of single interactions (including the initialization of their
+                controller) are returned in place of their result. Otherwise the first error is raised once all
+                interactions have finished.
+
+        Returns:
+            The result (or error) of every interaction by peer, in the order of the `peers`.
+        """
+        peers = list(peers)
+        for peer in peers:
+            self.assign(peer)
+
+        async def run_one(peer: Peer) -> T:
+            async with self.session(peer) as controller:
+                return await interaction(controller)
+
+        results = await asyncio.gather(
+            *(run_one(p) for p in peers), return_exceptions=True
+        )
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+        return dict(zip(peers, results))
+
+    async def initialize(self) -> None:
+        """
+        Starts all clients and initializes the controllers of all assigned peers, for all accounts concurrently.
+
+        Raises:
+            InitializationError: With the errors of the controllers of all accounts that could not be initialized,
+                once all others are.
+        """
+        results = await asyncio.gather(
+            *(pool.initialize() for pool in self.pools.values()),
+            return_exceptions=True,
+        )
+
+        errors = {}
+        for result in results:
+            if isinstance(result, InitializationError):
+                errors.update(result.errors)
+            elif isinstance(result, BaseException):
+                raise result
+        if errors:
+            raise InitializationError(errors)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+
+    async def __aenter__(self) -> "ClientPool":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
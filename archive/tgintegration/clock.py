@@ -0,0 +1,177 @@
+"""
+Sources of time for everything in {{tgi}} that waits: Collector timeouts, action delays and pauses between pings.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+
+# Number of event loop iterations to yield on loops that do not expose their queue of ready callbacks
+_FALLBACK_IDLE_ITERATIONS = 50
+
+
+class TimerHandle(ABC):
+    @abstractmethod
+    def cancel(self) -> None:
+        ...
+
+
+class Clock(ABC):
+    """
+    The interface of a clock: A monotonic `now` to measure timeouts with, the wall-clock `time` (as a UNIX
+    timestamp), and the means to wait for a point in time.
+    """
+
+    @abstractmethod
+    def now(self) -> float:
+        ...
+
+    @abstractmethod
+    def time(self) -> float:
+        ...
+
+    @abstractmethod
+    def call_at(self, when: float, callback: Callable[[], Any]) -> TimerHandle:
+        """
+        Schedules the `callback` to be run once `when` (in terms of `now`) has passed.
+        """
+
+    @abstractmethod
+    async def sleep(self, delay: float) -> None:
+        ...
+
+
+class RealClock(Clock):
+    """
+    Real time as measured by the running event loop.
+    """
+
+    def now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def time(self) -> float:
+        return time.time()
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> TimerHandle:
+        return asyncio.get_running_loop().call_at(when, callback)
+
+    async def sleep(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+
+
+# The clock used unless another one is configured
+REAL_CLOCK = RealClock()
+
+
+class VirtualTimer(TimerHandle):
+    __slots__ = ("when", "_seq", "callback", "cancelled")
+
+    def __init__(self, when: float, seq: int, callback: Callable[[], Any]):
+        self.when = when
+        self._seq = seq
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def __lt__(self, other: "VirtualTimer") -> bool:
+        return (self.when, self._seq) < (other.when, other._seq)
+
+
+class VirtualClock(Clock):
+    """
+    A clock whose time stands still while there is work to do and that jumps straight to the next timer as soon as
+    the event loop becomes idle. Sleeping and timing out therefore cost no wall time, but everything still happens
+    in the same order as it would in real time.
+
+    This is only meant for simulated runs (e.g. against a `FakeClient` using the same clock), because the clock
+    cannot tell whether the loop is idle or waiting for the network.
+
+    Args:
+        start: The UNIX timestamp that `time` starts at. Defaults to the current time.
+    """
+
+    def __init__(self, start: float = None):
+        self._now = 0.0
+        self._epoch = time.time() if start is None else start
+        self._timers: List[VirtualTimer] = []
+        self._counter = itertools.count()
+        self._driver: Optional[asyncio.Future] = None
+
+    def now(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self._epoch + self._now
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> VirtualTimer:
+        timer = VirtualTimer(when, next(self._counter), callback)
+        heapq.heappush(self._timers, timer)
+        self._ensure_driver()
+        return timer
+
+    async def sleep(self, delay: float) -> None:
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        timer = self.call_at(
+            self._now + delay, lambda: future.done() or future.set_result(None)
+        )
+        try:
+            await future
+        finally:
+            timer.cancel()
+
+    def advance(self, seconds: float) -> None:
+        """
+        Moves the clock forward by the given number of `seconds` right away, running all timers that become due.
+        """
+        self._advance_to(self._now + seconds)
+
+    def _advance_to(self, when: float) -> None:
+        while self._timers and self._timers[0].when <= when:
+            timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            self._now = max(self._now, timer.when)
+            timer.cancelled = True  # Fired timers cannot be cancelled anymore
+            timer.callback()
+        self._now = max(self._now, when)
+
+    def _ensure_driver(self) -> None:
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.ensure_future(self._drive())
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await _wait_until_idle(loop)
+
+            while self._timers and self._timers[0].cancelled:
+                heapq.heappop(self._timers)
+            if not self._timers:
+                return  # Restarted by the next `call_at`
+
+            self._advance_to(self._timers[0].when)
+
+
+async def _wait_until_idle(loop: asyncio.AbstractEventLoop) -> None:
+    ready = getattr(loop, "_ready", None)
+    if ready is None:
+        for _ in range(_FALLBACK_IDLE_ITERATIONS):
+            await asyncio.sleep(0)
+        return
+
+    # Everything else that is ready to run gets to do so before time moves on
+    await asyncio.sleep(0)
+    while ready:
+        await asyncio.sleep(0)
@@ -4,19 +4,21 @@ Standalone `collector` utilities.
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from datetime import datetime
-from datetime import timedelta
 from typing import AsyncContextManager
+from typing import Optional
 from typing import TYPE_CHECKING
 
-from pyrogram.errors import InternalServerError
 from pyrogram.filters import Filter
 from pyrogram.handlers import EditedMessageHandler
 from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message
 
+from tgintegration.deadline_scheduler import get_scheduler
 from tgintegration.expectation import Expectation
-from tgintegration.handler_utils import add_handlers_transient
+from tgintegration.expectation import ExpectationCheck
 from tgintegration.timeout_settings import TimeoutSettings
+from tgintegration.update_router import route_handlers_transient
+from tgintegration.utils.sentinel import NotSet
 
 if TYPE_CHECKING:
     from tgintegration.botcontroller import BotController
@@ -27,17 +29,23 @@ from tgintegration.update_recorder import MessageRecorder
 logger = logging.getLogger(__name__)
 
 
+def _get_cassette_hook(controller: "BotController"):
+    cassette = getattr(controller, "cassette", None)
+    return cassette.record_message if cassette else None
+
+
 @asynccontextmanager
 async def collect(
     controller: "BotController",
     filters: Filter = None,
     expectation: Expectation = None,
     timeouts: TimeoutSettings = None,
+    chat_id: Optional[int] = None,
 ) -> AsyncContextManager[Response]:
-    expectation = expectation or Expectation()
+    check = (expectation or Expectation()).new_check()
     timeouts = timeouts or TimeoutSettings()
 
-    recorder = MessageRecorder()
+    recorder = MessageRecorder(timeouts.clock, on_record=_get_cassette_hook(controller))
     message_handler = MessageHandler(recorder.record_message, filters=filters)
     edited_message_handler = EditedMessageHandler(
         recorder.record_message, filters=filters
@@ -45,72 +53,82 @@ async def collect(
 
     assert controller.client.is_connected
 
-    async with add_handlers_transient(
-        controller.client, [message_handler, edited_message_handler]
+    # Only updates from `chat_id` get routed to the recorder (or all updates if it is `None`)
+    async with route_handlers_transient(
+        controller.client, chat_id, [message_handler, edited_message_handler]
     ):
         response = Response(controller, recorder)
+        scheduler = get_scheduler(timeouts.clock)
 
         logger.debug("Collector set up. Executing user-defined interaction...")
+        response.timing.started = scheduler.now()
         yield response  # Start user-defined interaction
+        response.timing.action_finished = scheduler.now()
         logger.debug("interaction complete.")
 
+        wait_consecutive = timeouts.wait_consecutive
+        if timeouts.adaptive_wait:
+            wait_consecutive = timeouts.adaptive_wait.get_wait_consecutive(
+                chat_id, timeouts.adaptive_key, default=wait_consecutive
+            )
+
         num_received = 0
-        # last_received_timestamp = (
-        #     None  # TODO: work with the message's timestamp instead of utcnow()
-        # )
-        timeout_end = datetime.utcnow() + timedelta(seconds=timeouts.max_wait)
+        timeout_end = scheduler.now() + timeouts.max_wait
+        # The consecutive wait after which the collector stopped listening, if it did
+        cut_off: Optional[float] = None
 
         try:
-            seconds_remaining = (timeout_end - datetime.utcnow()).total_seconds()
+            seconds_remaining = timeout_end - scheduler.now()
 
             while True:
                 if seconds_remaining > 0:
                     # Wait until we receive any message or time out
                     logger.debug(f"Waiting for message #{num_received + 1}")
-                    await asyncio.wait_for(
-                        recorder.wait_until(
-                            lambda msgs: expectation.is_sufficient(msgs)
-                            or len(msgs) > num_received
-                        ),
-                        timeout=seconds_remaining,
+                    # The expectation can only become sufficient with a new message
+                    await scheduler.wait(
+                        recorder.wait_for_count(num_received + 1), timeout_end
                     )
 
                 num_received = len(recorder.messages)  # TODO: this is ugly
 
-                if timeouts.wait_consecutive:
+                if check.is_complete(recorder.messages):
+                    # No need to wait for consecutive messages, we've got what we came for
+                    check.verify(recorder.messages, timeouts)
+                    return
+
+                waited_in_vain = False
+                if wait_consecutive:
                     # Always wait for at least `wait_consecutive` seconds for another message
                     try:
                         logger.debug(
                             f"Checking for consecutive message to #{num_received}..."
                         )
-                        await asyncio.wait_for(
-                            recorder.wait_until(lambda msgs: len(msgs) > num_received),
+                        await scheduler.wait(
+                            recorder.wait_for_count(num_received + 1),
                             # The consecutive end may go over the max wait timeout,
                             # which is a design decision.
-                            timeout=timeouts.wait_consecutive,
+                            scheduler.now() + wait_consecutive,
                         )
                         logger.debug("received 1.")
-                    except TimeoutError:
+                    except asyncio.TimeoutError:
                         logger.debug("none received.")
+                        waited_in_vain = True
 
                 num_received = len(recorder.messages)  # TODO: this is ugly
 
-                if expectation.is_sufficient(recorder.messages):
-                    expectation.verify(recorder.messages, timeouts)
+                if check.is_sufficient(recorder.messages):
+                    if waited_in_vain:
+                        cut_off = wait_consecutive
+                    check.verify(recorder.messages, timeouts)
                     return
 
-                seconds_remaining = (timeout_end - datetime.utcnow()).total_seconds()
-
-                assert seconds_remaining is not None
+                seconds_remaining = timeout_end - scheduler.now()
 
                 if seconds_remaining <= 0:
-                    expectation.verify(recorder.messages, timeouts)
+                    check.verify(recorder.messages, timeouts)
                     return
 
-        except InternalServerError as e:
-            logger.warning(e)
-            await asyncio.sleep(60)  # Internal Telegram error
-        except asyncio.exceptions.TimeoutError as te:
+        except asyncio.TimeoutError as te:
             if timeouts.raise_on_timeout:
                 raise InvalidResponseError() from te
             else:
@@ -118,3 +136,158 @@ async def collect(
                 logger.warning("Peer did not reply.")
         finally:
             recorder.stop()
+            response.timing.finished = scheduler.now()
+            if timeouts.adaptive_wait:
+                timeouts.adaptive_wait.observe(
+                    chat_id, timeouts.adaptive_key, recorder.messages, cut_off=cut_off
+                )
+
+
+class MessageStream:
+    """
+    Asynchronous iterator over the messages of a peer's reaction, yielding each message as soon as it has been
+    recorded.
+
+    Messages are handed out in the order they arrived and are only pulled from the recorder when the consumer asks
+    for the next one, so a slow consumer never loses messages and an early `break` ends the stream right away.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        check: ExpectationCheck,
+        timeouts: TimeoutSettings,
+        chat_id: Optional[int] = None,
+    ):
+        self.response = response
+        self._recorder = response._recorder
+        self._check = check
+        self._timeouts = timeouts
+        self._chat_id = chat_id
+
+        self._num_yielded = 0
+        self._deadline: Optional[float] = None
+        self._wait_consecutive = timeouts.wait_consecutive
+        self._scheduler = get_scheduler(timeouts.clock)
+
+        self.cut_off: Optional[float] = None
+        """
+        The consecutive wait that ran out if the stream ended by timing out after a sufficient response.
+        """
+
+    def __aiter__(self) -> "MessageStream":
+        return self
+
+    async def __anext__(self) -> Message:
+        if self._deadline is None:
+            # The clock starts with the first request for a message, i.e. after the interaction
+            self.response.timing.action_finished = self._scheduler.now()
+            self._deadline = self._scheduler.now() + self._timeouts.max_wait
+
+            if self._timeouts.adaptive_wait:
+                self._wait_consecutive = (
+                    self._timeouts.adaptive_wait.get_wait_consecutive(
+                        self._chat_id,
+                        self._timeouts.adaptive_key,
+                        default=self._wait_consecutive,
+                    )
+                )
+
+        max_messages = self._check.expectation.max_messages
+        if max_messages is not NotSet and self._num_yielded >= max_messages:
+            self._check.verify(self._recorder.messages, self._timeouts)
+            raise StopAsyncIteration
+
+        if self._num_yielded >= len(self._recorder.messages):
+            # All recorded messages have been handed out at this point
+            if self._check.is_complete(self._recorder.messages):
+                self._check.verify(self._recorder.messages, self._timeouts)
+                raise StopAsyncIteration
+
+            timeout = self._next_timeout()
+            if timeout <= 0:
+                self._finish()
+
+            try:
+                await self._scheduler.wait(
+                    self._recorder.wait_for_count(self._num_yielded + 1),
+                    self._scheduler.now() + timeout,
+                )
+            except asyncio.TimeoutError:
+                self._finish()
+
+        message = self._recorder.messages[self._num_yielded]
+        self._num_yielded += 1
+        return message
+
+    def _next_timeout(self) -> float:
+        seconds_remaining = self._deadline - self._scheduler.now()
+
+        if self._num_yielded == 0:
+            return seconds_remaining
+
+        if not self._check.is_sufficient(self._recorder.messages):
+            # Like in `collect`, the consecutive wait may go over the max wait timeout
+            return max(seconds_remaining, self._wait_consecutive or 0)
+
+        return self._wait_consecutive or 0
+
+    def _finish(self):
+        if self._num_yielded == 0:
+            if self._timeouts.raise_on_timeout:
+                raise InvalidResponseError(
+                    f"Peer did not reply within {self._timeouts.max_wait} seconds."
+                )
+            logger.warning("Peer did not reply.")
+            raise StopAsyncIteration
+
+        if self._check.is_sufficient(self._recorder.messages):
+            self.cut_off = self._wait_consecutive
+        self._check.verify(self._recorder.messages, self._timeouts)
+        raise StopAsyncIteration
+
+
+@asynccontextmanager
+async def stream(
+    controller: "BotController",
+    filters: Filter = None,
+    expectation: Expectation = None,
+    timeouts: TimeoutSettings = None,
+    chat_id: Optional[int] = None,
+) -> AsyncContextManager[MessageStream]:
+    """
+    Like `collect`, but yields a `MessageStream` that can be iterated over inside the context manager body to
+    process messages while the peer is still responding. Leaving the body stops recording.
+    """
+    check = (expectation or Expectation()).new_check()
+    timeouts = timeouts or TimeoutSettings()
+
+    recorder = MessageRecorder(timeouts.clock, on_record=_get_cassette_hook(controller))
+    message_handler = MessageHandler(recorder.record_message, filters=filters)
+    edited_message_handler = EditedMessageHandler(
+        recorder.record_message, filters=filters
+    )
+
+    assert controller.client.is_connected
+
+    async with route_handlers_transient(
+        controller.client, chat_id, [message_handler, edited_message_handler]
+    ):
+        response = Response(controller, recorder)
+        scheduler = get_scheduler(timeouts.clock)
+
+        response.timing.started = scheduler.now()
+        message_stream = MessageStream(response, check, timeouts, chat_id)
+        try:
+            yield message_stream
+        finally:
+            recorder.stop()
+            response.timing.finished = scheduler.now()
+
+            if timeouts.adaptive_wait:
+                timeouts.adaptive_wait.observe(
+                    chat_id,
+                    timeouts.adaptive_key,
+                    recorder.messages,
+                    cut_off=message_stream.cut_off,
+                )
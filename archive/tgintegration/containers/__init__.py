@@ -8,11 +8,13 @@ from .inlineresults import InlineResultContainer
 from .reply_keyboard import ReplyKeyboard
 from .responses import InvalidResponseError
 from .responses import Response
+from .timing import ResponseTiming
 
 __all__ = [
     "InlineResultContainer",
     "InlineResult",
     "Response",
+    "ResponseTiming",
     "InvalidResponseError",
     "NoButtonFound",
     "InlineKeyboard",
@@ -0,0 +1,212 @@
+"""
+Stable content digests of messages and keyboards, and structural diffs between them.
+
+Digests only cover what a user sees (texts, media and buttons), not message ids, dates or chats, so the same screen
+shown twice has the same digest. They are stable across processes and Python versions.
+"""
+import hashlib
+import itertools
+from dataclasses import dataclass
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from pyrogram.types import ForceReply
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import Message
+from pyrogram.types import ReplyKeyboardMarkup
+from pyrogram.types import ReplyKeyboardRemove
+
+DIGEST_SIZE = 16
+
+# Name of the attribute that caches the digest on a message. Pyrogram skips attributes starting with an underscore
+# when printing or comparing objects.
+_MESSAGE_DIGEST_ATTR = "_tgi_digest"
+
+
+def new_hash() -> "hashlib.blake2b":
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def feed(digest: "hashlib.blake2b", *values: Any) -> None:
+    """
+    Adds the `values` to the `digest`, length-prefixed so that e.g. ("ab", "c") and ("a", "bc") differ.
+    """
+    for value in values:
+        if value is None:
+            digest.update(b"\x00")
+            continue
+        if isinstance(value, bytes):
+            tag, data = b"\x02", value
+        else:
+            tag, data = b"\x01", str(value).encode()
+        digest.update(tag + len(data).to_bytes(4, "big") + data)
+
+
+def button_fields(button: Any) -> Tuple:
+    """
+    Returns the fields that make up the identity of an inline or reply keyboard button. Reply keyboard buttons given
+    as plain strings are equivalent to a `KeyboardButton` with that caption.
+    """
+    if isinstance(button, InlineKeyboardButton):
+        return (
+            "inline",
+            button.text,
+            button.callback_data,
+            button.url,
+            button.switch_inline_query,
+            button.switch_inline_query_current_chat,
+            button.user_id,
+        )
+    if isinstance(button, str):
+        return "reply", button, None, None
+    return (
+        "reply",
+        button.text,
+        getattr(button, "request_contact", None),
+        getattr(button, "request_location", None),
+    )
+
+
+def keyboard_digest(rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Digests the layout of a keyboard: the number of rows, the number of buttons per row and every button.
+    """
+    digest = new_hash()
+    feed(digest, "keyboard", len(rows))
+    for row in rows:
+        feed(digest, len(row))
+        for button in row:
+            feed(digest, *button_fields(button))
+    return digest.digest()
+
+
+def markup_digest(markup: Any) -> Optional[bytes]:
+    if markup is None:
+        return None
+    if isinstance(markup, InlineKeyboardMarkup):
+        return b"inline" + keyboard_digest(markup.inline_keyboard)
+    if isinstance(markup, ReplyKeyboardMarkup):
+        return b"reply" + keyboard_digest(markup.keyboard)
+    if isinstance(markup, ReplyKeyboardRemove):
+        return b"remove"
+    if isinstance(markup, ForceReply):
+        return b"force_reply"
+    return type(markup).__name__.encode()
+
+
+def _media_fields(message: Message) -> Tuple[Optional[str], Optional[str]]:
+    if not message.media:
+        return None, None
+    kind = getattr(message.media, "value", str(message.media))
+    media = getattr(message, kind, None)
+    return kind, getattr(media, "file_unique_id", None)
+
+
+def message_digest(message: Message) -> bytes:
+    """
+    Digests the visible content of a `message`: its text or caption, media and reply markup. The result is cached on
+    the message.
+    """
+    cached = message.__dict__.get(_MESSAGE_DIGEST_ATTR)
+    if cached is not None:
+        return cached
+
+    digest = new_hash()
+    feed(
+        digest,
+        "message",
+        message.text,
+        message.caption,
+        *_media_fields(message),
+        markup_digest(message.reply_markup),
+    )
+    result = digest.digest()
+    setattr(message, _MESSAGE_DIGEST_ATTR, result)
+    return result
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    A difference between two responses at `path` (e.g. `messages[0].keyboard[1][0]`). `old` is `None` for
+    additions, `new` is `None` for removals.
+    """
+
+    path: str
+    old: Any
+    new: Any
+
+
+def diff_keyboards(
+    old_rows: Sequence[Sequence[Any]], new_rows: Sequence[Sequence[Any]], path: str
+) -> List[Change]:
+    changes = []
+    for r, (old_row, new_row) in enumerate(itertools.zip_longest(old_rows, new_rows)):
+        if old_row is None or new_row is None:
+            changes.append(Change(f"{path}[{r}]", old_row, new_row))
+            continue
+        for b, (old_button, new_button) in enumerate(
+            itertools.zip_longest(old_row, new_row)
+        ):
+            if (
+                old_button is None
+                or new_button is None
+                or button_fields(old_button) != button_fields(new_button)
+            ):
+                changes.append(Change(f"{path}[{r}][{b}]", old_button, new_button))
+    return changes
+
+
+def _keyboard_rows(markup: Any) -> Optional[List[List[Any]]]:
+    if isinstance(markup, InlineKeyboardMarkup):
+        return markup.inline_keyboard
+    if isinstance(markup, ReplyKeyboardMarkup):
+        return markup.keyboard
+    return None
+
+
+def diff_messages(old: Message, new: Message, path: str = "message") -> List[Change]:
+    """
+    Lists the differences in the visible content of two messages, down to single keyboard buttons.
+    """
+    if message_digest(old) == message_digest(new):
+        return []
+
+    changes = []
+    for attr in ("text", "caption"):
+        if getattr(old, attr) != getattr(new, attr):
+            changes.append(
+                Change(f"{path}.{attr}", getattr(old, attr), getattr(new, attr))
+            )
+    if _media_fields(old) != _media_fields(new):
+        changes.append(Change(f"{path}.media", old.media, new.media))
+
+    old_markup, new_markup = old.reply_markup, new.reply_markup
+    if markup_digest(old_markup) != markup_digest(new_markup):
+        if type(old_markup) is type(new_markup) and _keyboard_rows(old_markup):
+            changes.extend(
+                diff_keyboards(
+                    _keyboard_rows(old_markup),
+                    _keyboard_rows(new_markup),
+                    f"{path}.keyboard",
+                )
+            )
+        else:
+            changes.append(Change(f"{path}.reply_markup", old_markup, new_markup))
+    return changes
+
+
+def diff_message_lists(
+    old: Sequence[Message], new: Sequence[Message], path: str = "messages"
+) -> List[Change]:
+    changes = []
+    for n, (old_message, new_message) in enumerate(itertools.zip_longest(old, new)):
+        if old_message is None or new_message is None:
+            changes.append(Change(f"{path}[{n}]", old_message, new_message))
+        else:
+            changes.extend(diff_messages(old_message, new_message, f"{path}[{n}]"))
+    return changes
@@ -13,7 +13,9 @@ from typing import Union
 from pyrogram import filters as f
 from pyrogram.types import InlineKeyboardButton
 
+from tgintegration.containers.digest import keyboard_digest
 from tgintegration.containers.exceptions import NoButtonFound
+from tgintegration.metrics import interaction
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,24 @@ class InlineKeyboard:
         self._peer_id = chat_id
         self.rows = button_rows
 
+    @property
+    def rows(self) -> List[List[InlineKeyboardButton]]:
+        return self._rows
+
+    @rows.setter
+    def rows(self, value: List[List[InlineKeyboardButton]]) -> None:
+        self._rows = value
+        self._digest: Optional[str] = None
+
+    @property
+    def digest(self) -> str:
+        """
+        A stable hex digest of the layout and the buttons of this keyboard, computed once.
+        """
+        if self._digest is None:
+            self._digest = keyboard_digest(self._rows).hex()
+        return self._digest
+
     def find_button(
         self, pattern: Pattern = None, index: int = None
     ) -> Optional[InlineKeyboardButton]:
@@ -99,40 +119,29 @@ class InlineKeyboard:
         """
         button = self.find_button(pattern, index)
 
-        async with self._controller.collect(
-            filters=f.chat(self._peer_id)
-        ) as res:  # type: Response
-            logger.debug(f"Clicking button with caption '{button.text}'...")
-            await self._controller.client.request_callback_answer(
-                chat_id=self._peer_id,
-                message_id=self._message_id,
-                callback_data=button.callback_data,
-                timeout=30,
-            )
+        with interaction("inline_click", button.text):
+            async with self._controller.collect(
+                filters=f.chat(self._peer_id)
+            ) as res:  # type: Response
+                logger.debug(f"Clicking button with caption '{button.text}'...")
+                await self._controller._call(
+                    self._peer_id,
+                    self._controller.client.request_callback_answer,
+                    chat_id=self._peer_id,
+                    message_id=self._message_id,
+                    callback_data=button.callback_data,
+                    timeout=30,
+                )
 
         return res
 
     def __eq__(self, other):
         if not isinstance(other, InlineKeyboard):
             return False
-        try:
-            for r_n, row in enumerate(self.rows):
-                other_row = other.rows[r_n]
-                for b_n, btn in enumerate(row):
-                    other_btn = other_row[b_n]
-                    if (
-                        btn.text != other_btn.text
-                        or btn.switch_inline_query_current_chat
-                        != other_btn.switch_inline_query_current_chat
-                        or btn.switch_inline_query != other_btn.switch_inline_query
-                        or btn.callback_data != other_btn.callback_data
-                        or btn.url != other_btn.url
-                    ):
-                        return False
-        except KeyError:
-            return False
+        return self.digest == other.digest
 
-        return True
+    def __hash__(self):
+        return hash(self.digest)
 
     @property
     def num_buttons(self):
@@ -29,13 +29,15 @@ class InlineResult:
         self.result = result
         self._query_id = query_id
 
-    def send(
+    async def send(
         self,
         chat_id: Union[int, str],
         disable_notification: Optional[bool] = None,
         reply_to_message_id: Optional[int] = None,
     ):
-        return self._controller.client.send_inline_bot_result(
+        return await self._controller._call(
+            chat_id,
+            self._controller.client.send_inline_bot_result,
             chat_id,
             self._query_id,
             self.result.id,
@@ -110,8 +112,9 @@ class InlineResultContainer:
         if not self.can_switch_pm:
             raise AttributeError("This inline query does not allow switching to PM.")
         text = "/start {}".format(self._switch_pm.start_param or "").strip()
-        return await self._controller.client.send_message(
-            self._controller.peer_id, text
+        peer_id = self._controller.peer_id
+        return await self._controller._call(
+            peer_id, self._controller.client.send_message, peer_id, text
         )
 
     def _match(self, pattern: Pattern, getter: attrgetter) -> List[InlineResult]:
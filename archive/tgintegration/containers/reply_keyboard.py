@@ -3,6 +3,7 @@
 """
 import re
 from typing import List
+from typing import Optional
 from typing import Pattern
 from typing import TYPE_CHECKING
 from typing import Union
@@ -13,6 +14,8 @@ from pyrogram.types import KeyboardButton
 from pyrogram.types import Message
 
 from tgintegration.containers import NoButtonFound
+from tgintegration.containers.digest import keyboard_digest
+from tgintegration.metrics import interaction
 
 if TYPE_CHECKING:
     from tgintegration.botcontroller import BotController
@@ -39,6 +42,24 @@ class ReplyKeyboard:
         self._peer_id = chat_id
         self.rows = button_rows
 
+    @property
+    def rows(self) -> List[List[KeyboardButton]]:
+        return self._rows
+
+    @rows.setter
+    def rows(self, value: List[List[KeyboardButton]]) -> None:
+        self._rows = value
+        self._digest: Optional[str] = None
+
+    @property
+    def digest(self) -> str:
+        """
+        A stable hex digest of the layout and the buttons of this keyboard, computed once.
+        """
+        if self._digest is None:
+            self._digest = keyboard_digest(self._rows).hex()
+        return self._digest
+
     def find_button(self, pattern: Pattern) -> KeyboardButton:
         """
         Attempts to retrieve a clickable button anywhere in the underlying `rows` by matching the button captions with
@@ -61,7 +82,9 @@ class ReplyKeyboard:
     async def _click_nowait(self, pattern, quote=False) -> Message:
         button = self.find_button(pattern)
 
-        return await self._controller.client.send_message(
+        return await self._controller._call(
+            self._peer_id,
+            self._controller.client.send_message,
             self._peer_id,
             button.text,
             reply_to_message_id=self._message_id if quote else None,
@@ -86,7 +109,7 @@ class ReplyKeyboard:
         Args:
             pattern: The button caption to look for (by `re.match`).
             filters: Additional filters to be given to `collect`. Will be merged with a "same chat" filter and
-                `filters.text | filters.edited`.
+                `filters.text` (edits are collected as well).
             quote: Whether to reply to the message containing the buttons.
 
         Returns:
@@ -96,13 +119,27 @@ class ReplyKeyboard:
 
         filters = (
             filters & f.chat(self._peer_id) if filters else f.chat(self._peer_id)
-        ) & (f.text | f.edited)
-
-        async with self._controller.collect(filters=filters) as res:  # type: Response
-            await self._controller.client.send_message(
-                self._controller.peer,
-                button.text if hasattr(button, "text") else button,
-                reply_to_message_id=self._message_id if quote else None,
-            )
+        ) & f.text
+
+        caption = button.text if hasattr(button, "text") else button
+        with interaction("reply_click", caption):
+            async with self._controller.collect(
+                filters=filters
+            ) as res:  # type: Response
+                await self._controller._call(
+                    self._peer_id,
+                    self._controller.client.send_message,
+                    self._controller.peer,
+                    caption,
+                    reply_to_message_id=self._message_id if quote else None,
+                )
 
         return res
+
+    def __eq__(self, other):
+        if not isinstance(other, ReplyKeyboard):
+            return False
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
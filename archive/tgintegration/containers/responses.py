@@ -14,6 +14,11 @@ from pyrogram.types import ReplyKeyboardMarkup
 
 from tgintegration.containers import InlineKeyboard
 from tgintegration.containers import ReplyKeyboard
+from tgintegration.containers.digest import Change
+from tgintegration.containers.digest import diff_message_lists
+from tgintegration.containers.digest import message_digest
+from tgintegration.containers.digest import new_hash
+from tgintegration.containers.timing import ResponseTiming
 from tgintegration.update_recorder import MessageRecorder
 
 if TYPE_CHECKING:
@@ -25,13 +30,22 @@ class Response:
         self._controller = controller
         self._recorder = recorder
 
-        self.started: Optional[float] = None
         self.action_result: Any = None
+        self.timing = ResponseTiming(message_times=recorder.receive_times)
 
         # cached properties
         self.__reply_keyboard: Optional[ReplyKeyboard] = None
         self.__inline_keyboards: List[InlineKeyboard] = []
 
+        # Running digest over the messages recorded so far, which are only ever appended
+        self.__digest_state = new_hash()
+        self.__digested_messages = 0
+        self.__digest = self.__digest_state.hexdigest()
+
+    @property
+    def started(self) -> Optional[float]:
+        return self.timing.started
+
     @property
     def messages(self) -> List[Message]:
         return self._recorder.messages
@@ -48,6 +62,33 @@ class Response:
     def full_text(self) -> str:
         return "\n".join(x.text for x in self.messages if x.text) or ""
 
+    @property
+    def digest(self) -> str:
+        """
+        A stable hex digest of the visible content of all messages in order (texts, media and keyboards, but not
+        message ids or dates). Messages that arrive later are folded into the digest on the next access, so the digest
+        of a response that is still being collected may change.
+
+        Responses compare equal by their digests. For the same reason, they can only be hashed (e.g. put in a set)
+        once they have been collected completely.
+        """
+        messages = self.messages
+        if self.__digested_messages < len(messages):
+            for message in messages[self.__digested_messages :]:
+                self.__digest_state.update(message_digest(message))
+            self.__digested_messages = len(messages)
+            self.__digest = self.__digest_state.hexdigest()
+        return self.__digest
+
+    def diff(self, other: "Response") -> List[Change]:
+        """
+        Lists what changed from this response to the `other`, message by message and button by button. Identical
+        responses and messages are skipped by their digests.
+        """
+        if self.digest == other.digest:
+            return []
+        return diff_message_lists(self.messages, other.messages)
+
     @property
     def reply_keyboard(self) -> Optional[ReplyKeyboard]:
         if self.__reply_keyboard:
@@ -103,7 +144,9 @@ class Response:
             if markup and hasattr(markup, "keyboard"):
                 for row in markup.keyboard:
                     for button in row:
-                        all_buttons.add(button)
+                        all_buttons.add(
+                            button.text if hasattr(button, "text") else button
+                        )
         return all_buttons
 
     @property
@@ -128,19 +171,26 @@ class Response:
 
     async def delete_all_messages(self, revoke: bool = True):
         peer_id = self.messages[0].chat.id
-        await self._controller.client.delete_messages(
-            peer_id, [x.id for x in self.messages], revoke=revoke
+        await self._controller._call(
+            peer_id,
+            self._controller.client.delete_messages,
+            peer_id,
+            [x.id for x in self.messages],
+            revoke=revoke,
         )
 
     def __eq__(self, other):
         if not isinstance(other, Response):
             return False
+        return self.digest == other.digest
 
-        return (
-            self.full_text == other.full_text
-            and self.inline_keyboards == other.inline_keyboards
-            # TODO: self.keyboard == other.keyboard
-        )
+    def __hash__(self):
+        # The digest changes with every message that arrives, so the hash would change along with it
+        if self.timing.finished is None:
+            raise TypeError(
+                "A response is only hashable once all of its messages have been collected."
+            )
+        return hash(self.digest)
 
     def __getitem__(self, item):
         return self.messages[item]
@@ -0,0 +1,78 @@
+"""
+​
+"""
+from dataclasses import dataclass
+from dataclasses import field
+from typing import List
+from typing import Optional
+
+
+@dataclass
+class ResponseTiming:
+    """
+    Records when the phases of an interaction happened, as points in time of the collector's monotonic clock (in
+    seconds). Durations are derived from these points on access, so recording only costs a clock reading per event.
+    """
+
+    started: Optional[float] = None
+    """
+    When the collector was ready and the action (e.g. sending a command) began.
+    """
+
+    action_finished: Optional[float] = None
+    """
+    When the action, i.e. the body of the `collect` context manager, completed.
+    """
+
+    finished: Optional[float] = None
+    """
+    When collecting ended.
+    """
+
+    message_times: List[float] = field(default_factory=list)
+    """
+    When each of the response's messages was recorded.
+    """
+
+    @property
+    def action_duration(self) -> Optional[float]:
+        """
+        How long performing the action took.
+        """
+        if self.started is None or self.action_finished is None:
+            return None
+        return self.action_finished - self.started
+
+    @property
+    def time_to_first_message(self) -> Optional[float]:
+        """
+        The latency of the peer: The duration from the start of the action until the first message was recorded.
+        """
+        if self.started is None or not self.message_times:
+            return None
+        return self.message_times[0] - self.started
+
+    @property
+    def gaps(self) -> List[float]:
+        """
+        The durations between each pair of consecutive messages.
+        """
+        times = self.message_times
+        return [current - previous for previous, current in zip(times, times[1:])]
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        The total duration of the interaction, including the time spent waiting for further messages.
+        """
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "time_to_first_message": self.time_to_first_message,
+            "gaps": self.gaps,
+            "action_duration": self.action_duration,
+            "duration": self.duration,
+        }
@@ -0,0 +1,243 @@
+"""
+Runs interactions with many peers concurrently over a single client.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
+from typing import Union
+
+from pyrogram import Client
+
+from tgintegration.botcontroller import BotController
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.rate_limiter import RateLimiter
+from tgintegration.update_router import get_router
+
+logger = logging.getLogger(__name__)
+
+Peer = Union[int, str]
+T = TypeVar("T")
+
+
+class InitializationError(Exception):
+    """
+    Raised when the controllers of some peers could not be initialized. The controllers of all other peers are
+    initialized regardless and can be used as usual.
+    """
+
+    def __init__(self, errors: Dict[Peer, BaseException]):
+        self.errors = errors
+        """
+        The error of every peer that could not be initialized.
+        """
+        super().__init__(
+            f"Could not initialize {len(errors)} peer(s): "
+            + ", ".join(f"{peer} ({error!r})" for peer, error in errors.items())
+        )
+
+
+class ControllerPool:
+    """
+    Creates a `BotController` per peer that all share the `client`, its update router and one `RateLimiter`, and
+    schedules interactions with these peers concurrently.
+
+    Collectors only receive the updates of their own peer's chat, so the interactions of different peers do not
+    interfere with each other. At most `max_concurrency` interactions run at the same time, and the shared rate
+    limiter keeps the account as a whole within its limits.
+
+    Args:
+        client: The user client that controls all peers.
+        peers: The peers to create controllers for right away. More can be added with `add`.
+        max_concurrency: The maximum number of interactions that `run` performs at once.
+        init_batch_size: The number of controllers that `initialize` initializes concurrently.
+        rate_limiter: Throttles the requests of all controllers. Defaults to a limiter with the default rate per
+            account and one request per `global_action_delay` and peer.
+        controller_kwargs: Keyword arguments for every `BotController`, e.g. `max_wait` or `metrics`.
+
+    Examples:
+        ``` python
+        async def check_start(controller: BotController) -> Response:
+            async with controller.collect(count=1) as response:
+                await controller.send_command("start")
+            return response
+
+        async with ControllerPool(client, bot_usernames, max_concurrency=20) as pool:
+            results = await pool.run(check_start)
+        ```
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        peers: Iterable[Peer] = (),
+        *,
+        max_concurrency: int = 10,
+        init_batch_size: int = 20,
+        rate_limiter: Optional[RateLimiter] = None,
+        **controller_kwargs,
+    ):
+        if max_concurrency < 1 or init_batch_size < 1:
+            raise ValueError("The concurrency and batch size need to be at least 1.")
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.init_batch_size = init_batch_size
+        self.controller_kwargs = controller_kwargs
+
+        if rate_limiter is None:
+            global_action_delay = controller_kwargs.get("global_action_delay", 0.8)
+            rate_limiter = RateLimiter(
+                peer_rate=1 / global_action_delay if global_action_delay else None,
+                clock=controller_kwargs.get("clock")
+                or getattr(client, "clock", None)
+                or REAL_CLOCK,
+            )
+        self.rate_limiter = rate_limiter
+
+        self.controllers: Dict[Peer, BotController] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._started_client = False
+
+        for peer in peers:
+            self.add(peer)
+
+    def add(self, peer: Peer, **kwargs) -> BotController:
+        """
+        Creates the controller for the `peer`, with `kwargs` overriding the pool's controller arguments.
+        """
+        if peer in self.controllers:
+            raise ValueError(f"The pool already contains a controller for {peer}.")
+
+        controller = BotController(
+            self.client,
+            peer,
+            **{**self.controller_kwargs, "rate_limiter": self.rate_limiter, **kwargs},
+        )
+        self.controllers[peer] = controller
+        return controller
+
+    def remove(self, peer: Peer) -> BotController:
+        return self.controllers.pop(peer)
+
+    def __getitem__(self, peer: Peer) -> BotController:
+        return self.controllers[peer]
+
+    def __iter__(self) -> Iterator[BotController]:
+        return iter(self.controllers.values())
+
+    def __len__(self) -> int:
+        return len(self.controllers)
+
+    async def start(self) -> None:
+        """
+        Starts the client (if necessary) and installs its update router, without initializing any controllers.
+        """
+        if not self.client.is_connected:
+            await self.client.start()
+            self._started_client = True
+
+        # Installing the router up front spares the first collectors of all peers from racing to do so
+        await get_router(self.client)
+
+    async def initialize(self, start_client: bool = True) -> None:
+        """
+        Starts the client (if necessary) and initializes all controllers that are not initialized yet, in batches of
+        `init_batch_size` concurrent `BotController.initialize` calls.
+
+        Raises:
+            InitializationError: With the errors of all controllers that could not be initialized, once all others
+                are.
+        """
+        if start_client:
+            await self.start()
+        else:
+            await get_router(self.client)
+
+        errors: Dict[Peer, BaseException] = {}
+        pending = [c for c in self.controllers.values() if not c.peer_id]
+        for i in range(0, len(pending), self.init_batch_size):
+            batch = pending[i : i + self.init_batch_size]
+            results = await asyncio.gather(
+                *(c.initialize(start_client=False) for c in batch),
+                return_exceptions=True,
+            )
+            for controller, result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Could not initialize {controller.peer}: {result!r}")
+                    errors[controller.peer] = result
+
+        if errors:
+            raise InitializationError(errors)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Waits until fewer than `max_concurrency` interactions are running and counts the body as one of them.
+        """
+        if self._semaphore is None:
+            # Created lazily to bind it to the running event loop (before Python 3.10)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            yield
+
+    async def run(
+        self,
+        interaction: Callable[[BotController], Awaitable[T]],
+        peers: Iterable[Peer] = None,
+        *,
+        return_exceptions: bool = True,
+    ) -> Dict[Peer, Union[T, BaseException]]:
+        """
+        Performs the `interaction` with every controller of the given `peers` (or all of them) concurrently, with at
+        most `max_concurrency` interactions running at once.
+
+        Args:
+            interaction: A coroutine function that takes a `BotController`.
+            peers: Only run the interaction with these peers.
+            return_exceptions: Whether errors of single interactions are returned in place of their result.
+                Otherwise the first error is raised once all interactions have finished.
+
+        Returns:
+            The result (or error) of every interaction by peer, in the order of the `peers`.
+        """
+        controllers = [
+            self.controllers[p] for p in (self.controllers if peers is None else peers)
+        ]
+
+        async def run_one(controller: BotController) -> T:
+            async with self.slot():
+                return await interaction(controller)
+
+        results = await asyncio.gather(
+            *(run_one(c) for c in controllers), return_exceptions=True
+        )
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+        return {c.peer: r for c, r in zip(controllers, results)}
+
+    async def close(self) -> None:
+        """
+        Stops the client if it was started by the pool.
+        """
+        if self._started_client and self.client.is_connected:
+            await self.client.stop()
+        self._started_client = False
+
+    async def __aenter__(self) -> "ControllerPool":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
@@ -0,0 +1,326 @@
+"""
+Explores the menus of a bot by clicking through its keyboards, discovering the graph of its screens.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import re
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from tgintegration.botcontroller import BotController
+from tgintegration.containers import InvalidResponseError
+from tgintegration.containers import NoButtonFound
+from tgintegration.containers import Response
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_response(response: Response) -> str:
+    """
+    Identifies the screen that a response shows by the digest of its texts and keyboards, so that reaching the same
+    screen on different paths (e.g. through a "Back" button) is recognized.
+    """
+    return response.digest[:16]
+
+
+@dataclass(frozen=True)
+class Action:
+    """
+    A click on the button at `index` (counting from top left) of an inline keyboard (the `keyboard`-th of the
+    response) or of the reply keyboard.
+    """
+
+    kind: str  # "inline" or "reply"
+    keyboard: int
+    index: int
+    caption: str
+
+
+@dataclass
+class CrawlState:
+    """
+    A distinct screen of the bot, with the shortest known `path` of clicks that leads there from the command.
+    """
+
+    id: str
+    text: str
+    depth: int
+    path: List[Action]
+    actions: List[Action]
+
+
+@dataclass
+class CrawlEdge:
+    source: str
+    action: Action
+    target: Optional[str]
+    error: Optional[str] = None
+
+
+@dataclass
+class CrawlGraph:
+    """
+    The screens (`states`) of a bot and the clicks (`edges`) between them, starting at the screen that the
+    `command` shows.
+    """
+
+    command: str
+    root: Optional[str] = None
+    states: Dict[str, CrawlState] = field(default_factory=dict)
+    edges: List[CrawlEdge] = field(default_factory=list)
+    truncated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_dot(self) -> str:
+        """
+        Renders the graph in the DOT language of Graphviz.
+        """
+
+        def quote(value: str) -> str:
+            return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+        lines = ["digraph menu {"]
+        for state in self.states.values():
+            label = state.text if len(state.text) <= 40 else state.text[:39] + "…"
+            lines.append(f"  {quote(state.id)} [label={quote(label)}];")
+        for edge in self.edges:
+            target = edge.target or f"error:{edge.source}:{edge.action.caption}"
+            if edge.target is None:
+                lines.append(
+                    f"  {quote(target)} [label={quote(edge.error)}, shape=box];"
+                )
+            lines.append(
+                f"  {quote(edge.source)} -> {quote(target)} [label={quote(edge.action.caption)}];"
+            )
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+class _Worker:
+    __slots__ = ("controller", "state_id", "response")
+
+    def __init__(self, controller: BotController):
+        self.controller = controller
+        # The screen the worker's chat currently shows, if known
+        self.state_id: Optional[str] = None
+        self.response: Optional[Response] = None
+
+
+class MenuCrawler:
+    """
+    Explores the screens of a bot by a breadth-first search over the buttons of its keyboards, starting with the
+    response to a command.
+
+    Every clickable button (inline buttons with callback data and reply keyboard buttons) of every newly discovered
+    screen gets clicked once. Screens are told apart by a `fingerprint` of their text and keyboards, so that screens
+    reached more than once are only explored once.
+
+    The clicks are performed by several `controllers` of different accounts in parallel. A controller that does not
+    show the screen to click on gets there by repeating the command and the shortest known path of clicks, so the
+    bot should behave deterministically for the same path.
+
+    Args:
+        controllers: One controller per account, all for the bot to explore.
+        max_depth: The maximum number of clicks from the command.
+        max_states: Stops exploring once this many screens have been discovered. Clicks that lead to further
+            screens are recorded without a target and with the error "truncated".
+        skip: Buttons whose caption matches this pattern (by `re.search`) are not clicked, e.g. "Delete".
+        fingerprint: Identifies the screen that a response shows.
+
+    Examples:
+        ``` python
+        crawler = MenuCrawler([BotController(client, "@my_bot") for client in clients], skip="(?i)delete")
+        graph = await crawler.crawl("start")
+        Path("menu.dot").write_text(graph.to_dot())
+        ```
+    """
+
+    def __init__(
+        self,
+        controllers: Sequence[BotController],
+        *,
+        max_depth: int = 5,
+        max_states: int = 500,
+        skip: Union[Pattern, str, None] = None,
+        fingerprint: Callable[[Response], str] = fingerprint_response,
+    ):
+        if not controllers:
+            raise ValueError("At least one controller is required.")
+        if max_states < 1:
+            raise ValueError("At least the first screen needs to be discovered.")
+        self.controllers = list(controllers)
+        self.max_depth = max_depth
+        self.max_states = max_states
+        self.skip = re.compile(skip) if skip is not None else None
+        self.fingerprint = fingerprint
+
+        self._graph: Optional[CrawlGraph] = None
+        self._pending: List[Tuple[str, Action]] = []
+        self._busy = 0
+        self._changed: Optional[asyncio.Event] = None
+
+    def _get_actions(self, response: Response) -> List[Action]:
+        actions = []
+        for k, keyboard in enumerate(response.inline_keyboards or []):
+            for i, button in enumerate(itertools.chain.from_iterable(keyboard.rows)):
+                if button.callback_data is not None:
+                    actions.append(Action("inline", k, i, button.text))
+        if response.reply_keyboard:
+            buttons = itertools.chain.from_iterable(response.reply_keyboard.rows)
+            for i, button in enumerate(buttons):
+                actions.append(Action("reply", 0, i, getattr(button, "text", button)))
+        return [a for a in actions if not (self.skip and self.skip.search(a.caption))]
+
+    def _add_state(
+        self, response: Response, path: List[Action]
+    ) -> Tuple[str, Optional[CrawlState]]:
+        state_id = self.fingerprint(response)
+        state = self._graph.states.get(state_id)
+        if state is not None:
+            if len(path) < len(state.path):
+                state.path, state.depth = path, len(path)
+            return state_id, state
+
+        if len(self._graph.states) >= self.max_states:
+            self._graph.truncated = True
+            return state_id, None
+
+        state = CrawlState(
+            id=state_id,
+            text=response.full_text,
+            depth=len(path),
+            path=path,
+            actions=self._get_actions(response),
+        )
+        self._graph.states[state_id] = state
+        if state.depth < self.max_depth:
+            self._pending.extend((state_id, a) for a in state.actions)
+        return state_id, state
+
+    def _take(self, worker: _Worker) -> Optional[Tuple[str, Action]]:
+        if not self._pending:
+            return None
+        # Clicking on the screen that the worker shows already saves repeating the path to it
+        for n, (state_id, _) in enumerate(self._pending):
+            if state_id == worker.state_id:
+                return self._pending.pop(n)
+        shallowest = min(
+            range(len(self._pending)),
+            key=lambda n: self._graph.states[self._pending[n][0]].depth,
+        )
+        return self._pending.pop(shallowest)
+
+    async def _start(self, controller: BotController) -> Response:
+        async with controller.collect() as response:
+            await controller.send_command(self._graph.command)
+        return response
+
+    async def _perform(
+        self, controller: BotController, response: Response, action: Action
+    ) -> Response:
+        if action.kind == "inline":
+            keyboards = response.inline_keyboards or []
+            if action.keyboard >= len(keyboards):
+                raise NoButtonFound(f"No inline keyboard #{action.keyboard}")
+            return await keyboards[action.keyboard].click(index=action.index)
+
+        if response.reply_keyboard is None:
+            raise NoButtonFound("No reply keyboard")
+        return await response.reply_keyboard.click(f"^{re.escape(action.caption)}$")
+
+    async def _reach(self, worker: _Worker, state: CrawlState) -> Response:
+        if worker.state_id == state.id:
+            return worker.response
+
+        worker.state_id = worker.response = None
+        response = await self._start(worker.controller)
+        for action in state.path:
+            response = await self._perform(worker.controller, response, action)
+        if self.fingerprint(response) != state.id:
+            raise NoButtonFound("The path to the screen led somewhere else")
+        return response
+
+    async def _explore(self, worker: _Worker, source_id: str, action: Action) -> None:
+        source = self._graph.states[source_id]
+        edge = CrawlEdge(source_id, action, None)
+        self._graph.edges.append(edge)
+        try:
+            response = await self._reach(worker, source)
+            worker.state_id = worker.response = None
+            response = await self._perform(worker.controller, response, action)
+        except InvalidResponseError:
+            edge.error = "No response"
+            return
+        except NoButtonFound as e:
+            edge.error = f"Not reproducible: {e}"
+            return
+
+        state_id, state = self._add_state(response, source.path + [action])
+        worker.state_id, worker.response = state_id, response
+        if state is None:
+            edge.error = "truncated"  # The screen is new, but `max_states` have been discovered already
+            return
+        edge.target = state_id
+
+    async def _work(self, worker: _Worker) -> None:
+        while True:
+            item = self._take(worker)
+            if item is None:
+                if not self._busy:
+                    self._changed.set()  # Lets the other idle workers finish as well
+                    return
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+
+            self._busy += 1
+            try:
+                await self._explore(worker, *item)
+            except Exception as e:
+                logger.exception(e)
+                worker.state_id = worker.response = None
+            finally:
+                self._busy -= 1
+                self._changed.set()
+
+    async def crawl(self, command: str) -> CrawlGraph:
+        """
+        Explores the screens reachable from the response to the `command`.
+
+        Returns:
+            The discovered graph of screens and clicks.
+        """
+        await asyncio.gather(*(c.initialize() for c in self.controllers))
+        self._graph = CrawlGraph(command)
+        self._pending = []
+        self._busy = 0
+        self._changed = asyncio.Event()
+
+        workers = [_Worker(c) for c in self.controllers]
+        response = await self._start(workers[0].controller)
+        self._graph.root, _ = self._add_state(response, [])
+        workers[0].state_id, workers[0].response = self._graph.root, response
+
+        await asyncio.gather(*(self._work(w) for w in workers))
+        logger.info(
+            f"Discovered {len(self._graph.states)} screens and {len(self._graph.edges)} clicks "
+            f"of {self.controllers[0].peer}."
+        )
+        return self._graph
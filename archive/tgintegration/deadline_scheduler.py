@@ -0,0 +1,183 @@
+"""
+A single timer shared by all collectors for enforcing their deadlines.
+"""
+import asyncio
+import heapq
+import itertools
+import weakref
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.clock import TimerHandle
+
+_RESOLUTION = 0.001
+
+_schedulers: "WeakKeyDictionary[asyncio.AbstractEventLoop, WeakKeyDictionary[Clock, DeadlineScheduler]]" = (
+    WeakKeyDictionary()
+)
+
+
+class Deadline:
+    """
+    A callback scheduled to run at a point in time of the scheduler's clock.
+    """
+
+    __slots__ = ("when", "_seq", "callback", "cancelled")
+
+    def __init__(self, when: float, seq: int, callback: Callable[[], Any]):
+        self.when = when
+        self._seq = seq
+        self.callback = callback
+        self.cancelled = False
+
+    def __lt__(self, other: "Deadline") -> bool:
+        return (self.when, self._seq) < (other.when, other._seq)
+
+
+class DeadlineScheduler:
+    """
+    Keeps the deadlines of any number of concurrent waits in one heap and arms a single timer of the `clock` for
+    the earliest of them.
+
+    Waiting with a deadline neither spawns a task (like `asyncio.wait_for` does) nor registers a timer of its own.
+    With the default clock, all deadlines are measured with the loop's monotonic clock, so they are unaffected by
+    changes of the system time.
+
+    The scheduler only keeps weak references to its loop and its `clock`, so that the schedulers shared through
+    `get_scheduler` are garbage-collected together with either of them.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, clock: Clock = None):
+        self._loop_ref = weakref.ref(loop or asyncio.get_event_loop())
+        self._clock_ref = weakref.ref(clock or REAL_CLOCK)
+        self._heap: List[Deadline] = []
+        self._counter = itertools.count()
+        self._num_cancelled = 0
+
+        self._timer: Optional[TimerHandle] = None
+        self._timer_when: Optional[float] = None
+
+    @property
+    def _loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop_ref()
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock_ref()
+
+    def now(self) -> float:
+        return self.clock.now()
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._num_cancelled
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> Deadline:
+        """
+        Schedules the `callback` to be run once `when` (in terms of `now`) has passed.
+        """
+        deadline = Deadline(when, next(self._counter), callback)
+        heapq.heappush(self._heap, deadline)
+        self._arm()
+        return deadline
+
+    def cancel(self, deadline: Deadline) -> None:
+        if deadline.cancelled:
+            return
+        deadline.cancelled = True
+        self._num_cancelled += 1
+
+        if self._num_cancelled == len(self._heap):
+            # Nothing is left to wait for. The timer is released, as it references the loop.
+            self._heap.clear()
+            self._num_cancelled = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = self._timer_when = None
+        # Lazily deleted entries are compacted once they make up the majority of the heap
+        elif self._num_cancelled > len(self._heap) // 2:
+            self._heap = [d for d in self._heap if not d.cancelled]
+            heapq.heapify(self._heap)
+            self._num_cancelled = 0
+
+    async def wait(self, awaitable: Awaitable, deadline: float) -> Any:
+        """
+        Awaits the given future (or coroutine) and raises `asyncio.TimeoutError` if it has not completed by the
+        `deadline`.
+        """
+        future = asyncio.ensure_future(awaitable, loop=self._loop)
+        if future.done():
+            return future.result()
+
+        timed_out = False
+
+        def expire():
+            nonlocal timed_out
+            if not future.done():
+                timed_out = True
+                future.cancel()
+
+        entry = self.call_at(deadline, expire)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if timed_out:
+                raise asyncio.TimeoutError() from None
+            raise  # Cancelled from the outside
+        finally:
+            self.cancel(entry)
+
+    def _arm(self) -> None:
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._num_cancelled -= 1
+
+        if not self._heap:
+            return
+
+        when = self._heap[0].when
+        if self._timer is not None:
+            if self._timer_when <= when:
+                return  # The timer will fire early enough
+            self._timer.cancel()
+
+        self._timer = self.clock.call_at(when, self._run)
+        self._timer_when = when
+
+    def _run(self) -> None:
+        self._timer = None
+        self._timer_when = None
+
+        # The event loop may run timers up to its clock resolution early
+        now = self.now() + _RESOLUTION
+        while self._heap and self._heap[0].when <= now:
+            deadline = heapq.heappop(self._heap)
+            if deadline.cancelled:
+                self._num_cancelled -= 1
+                continue
+            deadline.cancelled = True  # Fired deadlines cannot be cancelled anymore
+            deadline.callback()
+
+        self._arm()
+
+
+def get_scheduler(clock: Clock = None) -> DeadlineScheduler:
+    """
+    Returns the `DeadlineScheduler` shared by everything running on the current event loop with the same `clock`.
+    """
+    loop = asyncio.get_running_loop()
+    clock = clock or REAL_CLOCK
+
+    by_clock = _schedulers.get(loop)
+    if by_clock is None:
+        by_clock = _schedulers[loop] = WeakKeyDictionary()
+
+    scheduler = by_clock.get(clock)
+    if scheduler is None:
+        scheduler = by_clock[clock] = DeadlineScheduler(loop, clock)
+    return scheduler
@@ -2,11 +2,19 @@
 ​
 """
 import logging
+import re
+from abc import ABC
+from abc import abstractmethod
 from dataclasses import dataclass
+from typing import Callable
 from typing import List
+from typing import Optional
+from typing import Pattern
 from typing import Union
 
+from pyrogram.types import InlineKeyboardMarkup
 from pyrogram.types import Message
+from pyrogram.types import ReplyKeyboardMarkup
 
 from tgintegration.containers.responses import InvalidResponseError
 from tgintegration.timeout_settings import TimeoutSettings
@@ -14,6 +22,172 @@ from tgintegration.utils.sentinel import NotSet
 
 logger = logging.getLogger(__name__)
 
+# An incremental check that gets fed every new message exactly once and returns `True` from the moment on that the
+# expectation is met
+MessageCheck = Callable[[Message], bool]
+
+
+class ContentExpectation(ABC):
+    """
+    Base class for expectations about the *content* of a peer's messages.
+
+    Content expectations are immutable descriptions. Each collector calls `watch` to obtain its own incremental
+    `MessageCheck`, so the same instance can be reused across (concurrent) interactions.
+
+    They can be composed with `&` (all of), `|` (any of) and `>>` (in sequence).
+    """
+
+    @abstractmethod
+    def watch(self) -> MessageCheck:
+        """
+        Returns a new incremental check for one interaction.
+        """
+
+    def __and__(self, other: "ContentExpectation") -> "AllOf":
+        return AllOf(self, other)
+
+    def __or__(self, other: "ContentExpectation") -> "AnyOf":
+        return AnyOf(self, other)
+
+    def __rshift__(self, other: "ContentExpectation") -> "InSequence":
+        return InSequence(self, other)
+
+
+class MessageSatisfies(ContentExpectation):
+    """
+    Met by a message for which the given `predicate` returns `True`.
+    """
+
+    def __init__(self, predicate: MessageCheck, description: str = None):
+        self.predicate = predicate
+        self.description = description or getattr(predicate, "__name__", "predicate")
+
+    def watch(self) -> MessageCheck:
+        return self.predicate
+
+    def __str__(self) -> str:
+        return f"a message satisfying {self.description}"
+
+
+class MessageMatches(ContentExpectation):
+    """
+    Met by a message whose text or caption matches the given `pattern` (by `re.search`).
+    """
+
+    def __init__(self, pattern: Union[Pattern, str]):
+        self.pattern = re.compile(pattern)
+
+    def watch(self) -> MessageCheck:
+        search = self.pattern.search
+        return lambda m: bool(search(m.text or m.caption or ""))
+
+    def __str__(self) -> str:
+        return f"a message matching r'{self.pattern.pattern}'"
+
+
+class HasInlineKeyboard(ContentExpectation):
+    """
+    Met by a message that carries an inline keyboard.
+    """
+
+    def watch(self) -> MessageCheck:
+        return lambda m: isinstance(m.reply_markup, InlineKeyboardMarkup)
+
+    def __str__(self) -> str:
+        return "a message with an inline keyboard"
+
+
+class HasReplyKeyboard(ContentExpectation):
+    """
+    Met by a message that carries a reply keyboard.
+    """
+
+    def watch(self) -> MessageCheck:
+        return lambda m: isinstance(m.reply_markup, ReplyKeyboardMarkup)
+
+    def __str__(self) -> str:
+        return "a message with a reply keyboard"
+
+
+def as_content_expectation(
+    value: Union[ContentExpectation, Pattern, str]
+) -> ContentExpectation:
+    """
+    Turns regular expressions into a `MessageMatches` expectation and passes through everything else.
+    """
+    if isinstance(value, ContentExpectation):
+        return value
+    return MessageMatches(value)
+
+
+class AllOf(ContentExpectation):
+    """
+    Met once every one of the given expectations has been met, in any order.
+    """
+
+    def __init__(self, *expectations: Union[ContentExpectation, Pattern, str]):
+        self.expectations = [as_content_expectation(e) for e in expectations]
+
+    def watch(self) -> MessageCheck:
+        pending = [e.watch() for e in self.expectations]
+
+        def check(message: Message) -> bool:
+            pending[:] = [c for c in pending if not c(message)]
+            return not pending
+
+        return check
+
+    def __str__(self) -> str:
+        return " and ".join(str(e) for e in self.expectations)
+
+
+class AnyOf(ContentExpectation):
+    """
+    Met as soon as one of the given expectations has been met.
+    """
+
+    def __init__(self, *expectations: Union[ContentExpectation, Pattern, str]):
+        self.expectations = [as_content_expectation(e) for e in expectations]
+
+    def watch(self) -> MessageCheck:
+        checks = [e.watch() for e in self.expectations]
+        # All checks are fed every message so that stateful ones stay consistent
+        return lambda m: any([c(m) for c in checks])
+
+    def __str__(self) -> str:
+        return " or ".join(str(e) for e in self.expectations)
+
+
+class InSequence(ContentExpectation):
+    """
+    Met once the given expectations have been met one after another. Each expectation only considers the messages
+    that arrived after its predecessor was met, e.g. `InSequence(r"^Loading", HasInlineKeyboard())`.
+    """
+
+    def __init__(self, *expectations: Union[ContentExpectation, Pattern, str]):
+        self.expectations = [as_content_expectation(e) for e in expectations]
+
+    def watch(self) -> MessageCheck:
+        remaining = iter(self.expectations)
+        current: Optional[MessageCheck] = None
+
+        def advance() -> None:
+            nonlocal current
+            nxt = next(remaining, None)
+            current = nxt.watch() if nxt else None
+
+        advance()
+
+        def check(message: Message) -> bool:
+            if current is not None and current(message):
+                advance()
+            return current is None
+
+        return check
+
+    def __str__(self) -> str:
+        return ", then ".join(str(e) for e in self.expectations)
+
 
 @dataclass
 class Expectation:
@@ -31,16 +205,76 @@ class Expectation:
     Maximum number of expected messages.
     """
 
+    content: Optional[ContentExpectation] = None
+    """
+    What the messages need to contain. When set, a collector completes as soon as it is met (and at least
+    `min_messages` arrived) instead of waiting for further consecutive messages.
+    """
+
+    def new_check(self) -> "ExpectationCheck":
+        """
+        Returns the state for checking the messages of one interaction against this expectation. The expectation
+        itself is never modified, so it can be shared by (concurrent) interactions.
+        """
+        return ExpectationCheck(self)
+
     def is_sufficient(self, messages: List[Message]) -> bool:
-        n = len(messages)
-        if self.min_messages is NotSet:
+        return self.new_check().is_sufficient(messages)
+
+    def is_complete(self, messages: List[Message]) -> bool:
+        return self.new_check().is_complete(messages)
+
+    def _is_match(self, messages: List[Message]) -> bool:
+        return self.new_check()._is_match(messages)
+
+    def verify(self, messages: List[Message], timeouts: TimeoutSettings) -> None:
+        self.new_check().verify(messages, timeouts)
+
+
+class ExpectationCheck:
+    """
+    Checks the growing list of messages of a single interaction against an `Expectation`. Every message is only
+    fed to the content check once, which makes repeated calls O(1) per new message.
+    """
+
+    def __init__(self, expectation: Expectation):
+        self.expectation = expectation
+        content = expectation.content
+        self._content_check: Optional[MessageCheck] = (
+            content.watch() if content else None
+        )
+        self._num_inspected = 0
+        self._is_content_met = content is None
+
+    def _inspect(self, messages: List[Message]) -> bool:
+        while not self._is_content_met and self._num_inspected < len(messages):
+            self._is_content_met = self._content_check(messages[self._num_inspected])
+            self._num_inspected += 1
+        return self._is_content_met
+
+    def _has_min_messages(self, n: int) -> bool:
+        if self.expectation.min_messages is NotSet:
             return n >= 1
-        return n >= self.min_messages
+        return n >= self.expectation.min_messages
+
+    def is_sufficient(self, messages: List[Message]) -> bool:
+        return self._has_min_messages(len(messages)) and self._inspect(messages)
+
+    def is_complete(self, messages: List[Message]) -> bool:
+        """
+        Whether a collector can stop right away because the `content` is met, without waiting for any further
+        consecutive messages.
+        """
+        return self.expectation.content is not None and self.is_sufficient(messages)
 
     def _is_match(self, messages: List[Message]) -> bool:
         n = len(messages)
-        return (self.min_messages is NotSet or n >= self.min_messages) and (
-            self.max_messages is NotSet or n <= self.max_messages
+        min_messages = self.expectation.min_messages
+        max_messages = self.expectation.max_messages
+        return (
+            (min_messages is NotSet or n >= min_messages)
+            and (max_messages is NotSet or n <= max_messages)
+            and self._inspect(messages)
         )
 
     def verify(self, messages: List[Message], timeouts: TimeoutSettings) -> None:
@@ -48,22 +282,33 @@ class Expectation:
             return
 
         n = len(messages)
+        min_messages = self.expectation.min_messages
+        max_messages = self.expectation.max_messages
+
+        if not self._inspect(messages):
+            _raise_or_log(
+                timeouts,
+                "Expected {} but did not receive it after waiting {} seconds.",
+                self.expectation.content,
+                timeouts.max_wait,
+            )
+            return
 
-        if n < self.min_messages:
+        if min_messages is not NotSet and n < min_messages:
             _raise_or_log(
                 timeouts,
                 "Expected {} messages but only received {} after waiting {} seconds.",
-                self.min_messages,
+                min_messages,
                 n,
                 timeouts.max_wait,
             )
             return
 
-        if n > self.max_messages:
+        if max_messages is not NotSet and n > max_messages:
             _raise_or_log(
                 timeouts,
                 "Expected only {} messages but received {}.",
-                self.max_messages,
+                max_messages,
                 n,
             )
             return
@@ -0,0 +1,27 @@
+"""
+An offline stand-in for Telegram: A `FakeClient` that can be used in place of a Pyrogram `Client`, and the
+scriptable `FakeBot`s it talks to.
+"""
+from tgintegration.fake.auth import FakeAuthServer
+from tgintegration.fake.bot import Conversation
+from tgintegration.fake.bot import FakeBot
+from tgintegration.fake.bot_api import BotApiBot
+from tgintegration.fake.bot_api import BotApiError
+from tgintegration.fake.bot_api import BotApiServer
+from tgintegration.fake.client import FakeClient
+from tgintegration.fake.client import FakeDispatcher
+from tgintegration.fake.replay import CassetteMismatchError
+from tgintegration.fake.replay import ReplayClient
+
+__all__ = [
+    "BotApiBot",
+    "BotApiError",
+    "BotApiServer",
+    "CassetteMismatchError",
+    "Conversation",
+    "FakeAuthServer",
+    "FakeBot",
+    "FakeClient",
+    "FakeDispatcher",
+    "ReplayClient",
+]
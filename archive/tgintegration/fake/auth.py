@@ -0,0 +1,131 @@
+"""
+A stand-in for Telegram's login flow, for testing tools that create sessions without a network connection.
+"""
+import itertools
+import random
+import secrets
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+from pyrogram.enums import SentCodeType
+from pyrogram.errors import PhoneCodeExpired
+from pyrogram.errors import PhoneCodeInvalid
+from pyrogram.errors import PhoneNumberUnoccupied
+from pyrogram.types import SentCode
+from pyrogram.types import User
+
+from tgintegration.clock import Clock
+from tgintegration.fake.bot import FakeBot
+
+if TYPE_CHECKING:
+    from tgintegration.fake.client import FakeClient
+
+SERVICE_NOTIFICATIONS_ID = 777000
+
+
+class FakeAuthServer:
+    """
+    Issues login codes for the accounts (phone numbers) it knows and, like Telegram, sends them as service
+    notifications to all sessions of the account that are logged in already.
+
+    ``` python
+    auth = FakeAuthServer()
+    existing = auth.create_session("+4912345", clock=clock)  # Receives the codes
+    new = auth.create_client("new", clock=clock)  # Logs in with `send_code` and `sign_in`
+    ```
+
+    Args:
+        code_delay: Seconds until a requested code arrives at the sessions of the account.
+    """
+
+    def __init__(self, code_delay: float = 1.0):
+        self.code_delay = code_delay
+        self.service_bot = FakeBot(
+            "telegram", id=SERVICE_NOTIFICATIONS_ID, first_name="Telegram"
+        )
+
+        self._users: Dict[str, User] = {}
+        self._sessions: Dict[str, List["FakeClient"]] = {}
+        self._codes: Dict[str, Tuple[str, str]] = {}
+        self._session_ids = itertools.count(1)
+        self._user_ids = itertools.count(100)
+
+    def _get_user(self, phone_number: str) -> User:
+        user = self._users.get(phone_number)
+        if user is None:
+            user = self._users[phone_number] = User(
+                id=next(self._user_ids),
+                is_self=True,
+                is_bot=False,
+                first_name=f"Agent {phone_number}",
+                phone_number=phone_number,
+            )
+        return user
+
+    def create_client(self, name: str, *bots: FakeBot, **kwargs) -> "FakeClient":
+        """
+        Creates a `FakeClient` that is not logged in yet.
+        """
+        from tgintegration.fake.client import FakeClient
+
+        return FakeClient(*bots, name=name, auth=self, **kwargs)
+
+    def create_session(
+        self, phone_number: str, *bots: FakeBot, clock: Clock = None, **kwargs
+    ) -> "FakeClient":
+        """
+        Creates a `FakeClient` that is logged in to the account with the `phone_number` and receives its login codes.
+        """
+        client = self.create_client(
+            f"session_{next(self._session_ids)}", *bots, clock=clock, **kwargs
+        )
+        self.add_session(phone_number, client)
+        return client
+
+    def add_session(self, phone_number: str, client: "FakeClient") -> None:
+        client.me = self._get_user(phone_number)
+        client.is_authorized = True
+        client.add_bot(self.service_bot)
+        self._sessions.setdefault(phone_number, []).append(client)
+
+    async def send_code(self, phone_number: str) -> SentCode:
+        code = f"{random.randrange(100_000):05d}"
+        phone_code_hash = secrets.token_hex(8)
+        self._codes[phone_code_hash] = (phone_number, code)
+
+        sessions = self._sessions.get(phone_number, [])
+        for client in sessions:
+            conversation = client._get_conversation(SERVICE_NOTIFICATIONS_ID)
+            client._spawn(
+                conversation.reply(
+                    f"Login code: {code}. Do not give this code to anyone, even if they say they are from "
+                    f"Telegram!",
+                    delay=self.code_delay,
+                )
+            )
+
+        return SentCode(
+            type=SentCodeType.APP if sessions else SentCodeType.SMS,
+            phone_code_hash=phone_code_hash,
+        )
+
+    def sign_in(
+        self, client: "FakeClient", phone_number: str, phone_code_hash: str, code: str
+    ) -> User:
+        try:
+            expected_phone, expected_code = self._codes[phone_code_hash]
+        except KeyError:
+            raise PhoneCodeExpired() from None
+        if expected_phone != phone_number:
+            raise PhoneNumberUnoccupied()
+        if code != expected_code:
+            raise PhoneCodeInvalid()
+
+        del self._codes[phone_code_hash]
+        self.add_session(phone_number, client)
+        return client.me
+
+    def export_session_string(self, client: "FakeClient") -> str:
+        return f"fake:{client.me.phone_number}:{client.name}"
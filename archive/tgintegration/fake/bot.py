@@ -0,0 +1,263 @@
+"""
+Scriptable bots for the `FakeClient`.
+"""
+import asyncio
+import itertools
+import logging
+import re
+from datetime import datetime
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import Union
+
+from pyrogram.enums import ChatType
+from pyrogram.raw.types import BotCommand
+from pyrogram.raw.types import BotInlineMessageText
+from pyrogram.raw.types import BotInlineResult
+from pyrogram.types import CallbackQuery
+from pyrogram.types import Chat
+from pyrogram.types import ForceReply
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import Message
+from pyrogram.types import ReplyKeyboardMarkup
+from pyrogram.types import ReplyKeyboardRemove
+from pyrogram.types import User
+
+if TYPE_CHECKING:
+    from tgintegration.fake.client import FakeClient
+
+logger = logging.getLogger(__name__)
+
+_bot_ids = itertools.count(1_000_000)
+
+ReplyMarkup = Union[
+    InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove, ForceReply
+]
+
+MessageCallback = Callable[["Conversation", Message], Awaitable[None]]
+CallbackQueryCallback = Callable[
+    ["Conversation", CallbackQuery], Awaitable[Optional[str]]
+]
+InlineQueryCallback = Callable[[str], Awaitable[List[BotInlineResult]]]
+
+
+class Conversation:
+    """
+    The private chat between the user of a `FakeClient` and a `FakeBot`, as seen from the bot's side.
+    """
+
+    def __init__(self, client: "FakeClient", bot: "FakeBot"):
+        self.client = client
+        self.bot = bot
+
+    @property
+    def chat(self) -> Chat:
+        user = self.bot.user
+        return Chat(
+            id=user.id,
+            type=ChatType.BOT,
+            username=user.username,
+            first_name=user.first_name,
+        )
+
+    @property
+    def history(self) -> List[Message]:
+        return self.client.get_history(self.bot.user.id)
+
+    async def reply(
+        self, text: str, reply_markup: ReplyMarkup = None, delay: float = 0
+    ) -> Message:
+        """
+        Sends a message from the bot to the user after `delay` seconds.
+        """
+        if delay:
+            await self.client.clock.sleep(delay)
+
+        message = Message(
+            client=self.client,
+            id=self.client.next_message_id(),
+            chat=self.chat,
+            from_user=self.bot.user,
+            date=datetime.fromtimestamp(self.client.clock.time()),
+            text=text,
+            reply_markup=reply_markup,
+            outgoing=False,
+        )
+        self.client.deliver(message)
+        return message
+
+    async def edit(
+        self,
+        message_id: int,
+        text: str = None,
+        reply_markup: ReplyMarkup = None,
+        delay: float = 0,
+    ) -> Message:
+        """
+        Edits a message previously sent by the bot after `delay` seconds.
+        """
+        if delay:
+            await self.client.clock.sleep(delay)
+
+        original = self.client.get_message(self.bot.user.id, message_id)
+        message = Message(
+            client=self.client,
+            id=message_id,
+            chat=original.chat,
+            from_user=original.from_user,
+            date=original.date,
+            edit_date=datetime.fromtimestamp(self.client.clock.time()),
+            text=original.text if text is None else text,
+            reply_markup=reply_markup,
+            outgoing=False,
+        )
+        self.client.deliver(message, edited=True)
+        return message
+
+
+class FakeBot:
+    """
+    A bot whose behavior is scripted with decorated coroutines, e.g.:
+
+    ``` python
+    bot = FakeBot("echo_bot", commands={"start": "Start the bot"})
+
+    @bot.on_command("start")
+    async def start(conversation, message):
+        await conversation.reply("Hi!", delay=0.1)
+
+    @bot.on_message()
+    async def echo(conversation, message):
+        await conversation.reply(message.text)
+    ```
+
+    The first handler whose pattern matches (by `re.search`) gets to handle an update.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        *,
+        id: int = None,
+        first_name: str = None,
+        commands: Dict[str, str] = None,
+        inline_page_size: int = 50,
+        inline_cache_time: int = 300,
+    ):
+        self.user = User(
+            id=id or next(_bot_ids),
+            is_bot=True,
+            first_name=first_name or username,
+            username=username,
+        )
+        self.commands = [
+            BotCommand(command=command, description=description)
+            for command, description in (commands or {}).items()
+        ]
+        self.inline_page_size = inline_page_size
+        self.inline_cache_time = inline_cache_time
+
+        self._message_handlers: List[Tuple[Optional[Pattern], MessageCallback]] = []
+        self._callback_query_handlers: List[
+            Tuple[Optional[Pattern], CallbackQueryCallback]
+        ] = []
+        self._inline_query_handlers: List[
+            Tuple[Optional[Pattern], InlineQueryCallback]
+        ] = []
+
+    def on_message(self, pattern: Union[Pattern, str] = None):
+        return _register(self._message_handlers, pattern)
+
+    def on_command(self, command: str):
+        username = re.escape(self.user.username)
+        return self.on_message(rf"^/{re.escape(command)}(@{username})?(\s|$)")
+
+    def on_callback_query(self, pattern: Union[Pattern, str] = None):
+        return _register(self._callback_query_handlers, pattern)
+
+    def on_inline_query(self, pattern: Union[Pattern, str] = None):
+        return _register(self._inline_query_handlers, pattern)
+
+    async def handle_message(self, conversation: Conversation, message: Message):
+        callback = _find(self._message_handlers, message.text or "")
+        if callback is not None:
+            await callback(conversation, message)
+
+    async def handle_callback_query(
+        self, conversation: Conversation, query: CallbackQuery
+    ) -> Optional[str]:
+        data = query.data.decode() if isinstance(query.data, bytes) else query.data
+        callback = _find(self._callback_query_handlers, data or "")
+        if callback is None:
+            return None
+        return await callback(conversation, query)
+
+    async def answer_inline_query(self, query: str) -> List[BotInlineResult]:
+        callback = _find(self._inline_query_handlers, query)
+        if callback is None:
+            return []
+        return await callback(query)
+
+    async def get_inline_results(
+        self, conversation: Conversation, query: str, offset: str
+    ) -> Tuple[List[BotInlineResult], Optional[str]]:
+        """
+        Returns the page of inline results at the given `offset`, and the offset of the next page (if any).
+        """
+        results = await self.answer_inline_query(query)
+        start = int(offset or 0)
+        end = start + self.inline_page_size
+        return results[start:end], str(end) if end < len(results) else None
+
+    @staticmethod
+    def article(
+        id: str,
+        title: str,
+        text: str = None,
+        description: str = None,
+        url: str = None,
+    ) -> BotInlineResult:
+        """
+        Creates an inline result of type "article" that sends the given `text` (or the `title`).
+        """
+        return BotInlineResult(
+            id=id,
+            type="article",
+            send_message=BotInlineMessageText(message=text or title),
+            title=title,
+            description=description,
+            url=url,
+        )
+
+
+def _register(handlers: list, pattern: Union[Pattern, str, None]):
+    compiled = re.compile(pattern) if pattern is not None else None
+
+    def decorator(callback):
+        handlers.append((compiled, callback))
+        return callback
+
+    return decorator
+
+
+def _find(handlers: list, text: str):
+    for pattern, callback in handlers:
+        if pattern is None or pattern.search(text):
+            return callback
+    return None
+
+
+async def run_handler(coro: Awaitable) -> Any:
+    try:
+        return await coro
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception(e)
@@ -0,0 +1,771 @@
+"""
+A local emulation of the Telegram Bot API, so that real bots (built with any framework) can be tested against a
+`FakeClient` in-process.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
+
+from pyrogram.errors import BotResponseTimeout
+from pyrogram.errors import MessageIdInvalid
+from pyrogram.raw.types import BotCommand
+from pyrogram.raw.types import BotInlineResult
+from pyrogram.types import CallbackQuery
+from pyrogram.types import ForceReply
+from pyrogram.types import InlineKeyboardButton
+from pyrogram.types import InlineKeyboardMarkup
+from pyrogram.types import KeyboardButton
+from pyrogram.types import Message
+from pyrogram.types import ReplyKeyboardMarkup
+from pyrogram.types import ReplyKeyboardRemove
+from pyrogram.types import User
+
+from tgintegration.fake.bot import Conversation
+from tgintegration.fake.bot import FakeBot
+from tgintegration.fake.bot import ReplyMarkup
+
+logger = logging.getLogger(__name__)
+
+JsonDict = Dict[str, Any]
+
+
+class BotApiError(Exception):
+    """
+    An error response of the Bot API, e.g. `BotApiError(400, "Bad Request: chat not found")`.
+    """
+
+    def __init__(self, error_code: int, description: str):
+        super().__init__(description)
+        self.error_code = error_code
+        self.description = description
+
+
+class BotApiBot(FakeBot):
+    """
+    A `FakeBot` that is controlled by a real bot through an emulated Bot API, served by a `BotApiServer`.
+
+    Whatever the users of `FakeClient`s send to the bot becomes an update that the real bot receives by polling
+    `getUpdates` or on its webhook. Its calls to `sendMessage`, `editMessageText`, `answerCallbackQuery`,
+    `answerInlineQuery` etc. then turn into the corresponding messages and answers on the client's side.
+
+    Only the private chats with the users that have contacted the bot exist, and only text messages, keyboards and
+    inline results of type "article" are supported.
+
+    Args:
+        username: The username of the bot.
+        token: The token the real bot authenticates with. Defaults to one derived from the bot's id.
+        answer_timeout: Seconds to wait for the bot to answer a callback or inline query, and for its webhook to
+            respond to an update.
+        **kwargs: Passed on to `FakeBot`.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        *,
+        token: str = None,
+        answer_timeout: float = 10,
+        **kwargs,
+    ):
+        super().__init__(username, **kwargs)
+        self.token = token or f"{self.user.id}:TEST-{username}"
+        self.answer_timeout = answer_timeout
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+
+        self._conversations: Dict[int, Conversation] = {}
+        self._updates: List[JsonDict] = []
+        self._update_ids = itertools.count(1)
+        self._updates_available: Optional[asyncio.Event] = None
+        self._query_ids = itertools.count(1)
+        self._pending_answers: Dict[str, asyncio.Future] = {}
+        self._webhook_tasks: Set[asyncio.Future] = set()
+        self._last_delivery: Optional[asyncio.Future] = None
+
+        # Bot API method names are case-insensitive
+        self._methods: Dict[str, Callable[[JsonDict], Awaitable[Any]]] = {
+            "getme": self._get_me,
+            "getupdates": self._get_updates,
+            "setwebhook": self._set_webhook,
+            "deletewebhook": self._delete_webhook,
+            "getwebhookinfo": self._get_webhook_info,
+            "sendmessage": self._send_message,
+            "editmessagetext": self._edit_message_text,
+            "deletemessage": self._delete_message,
+            "answercallbackquery": self._answer_callback_query,
+            "answerinlinequery": self._answer_inline_query,
+            "setmycommands": self._set_my_commands,
+            "getmycommands": self._get_my_commands,
+        }
+
+    async def call(self, method: str, params: JsonDict) -> Any:
+        """
+        Executes a Bot API method and returns its result.
+
+        Raises:
+            BotApiError: If the method does not exist or fails.
+        """
+        handler = self._methods.get(method.lower())
+        if handler is None:
+            raise BotApiError(404, "Not Found: method not found")
+        return await handler(params)
+
+    # region Updates from the users
+
+    async def handle_message(self, conversation: Conversation, message: Message):
+        user = self._register(conversation)
+        await self._push_update("message", _message_to_api(message, user))
+
+    async def handle_callback_query(
+        self, conversation: Conversation, query: CallbackQuery
+    ) -> Optional[str]:
+        user = self._register(conversation)
+        data = query.data.decode() if isinstance(query.data, bytes) else query.data
+        return await self._push_query(
+            "callback_query",
+            {
+                "id": str(next(self._query_ids)),
+                "from": _user_to_api(query.from_user),
+                "message": _message_to_api(query.message, user),
+                "chat_instance": str(user.id),
+                "data": data,
+            },
+        )
+
+    async def get_inline_results(
+        self, conversation: Conversation, query: str, offset: str
+    ) -> Tuple[List[BotInlineResult], Optional[str]]:
+        user = self._register(conversation)
+        answer = await self._push_query(
+            "inline_query",
+            {
+                "id": str(next(self._query_ids)),
+                "from": _user_to_api(user),
+                "query": query,
+                "offset": offset,
+            },
+        )
+        if answer is None:
+            raise BotResponseTimeout()
+        return answer
+
+    def _register(self, conversation: Conversation) -> User:
+        user = conversation.client.me
+        self._conversations[user.id] = conversation
+        return user
+
+    async def _push_query(self, kind: str, query: JsonDict) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending_answers[query["id"]] = future
+
+        async def push_and_wait() -> Any:
+            await self._push_update(kind, query)
+            return await future
+
+        try:
+            # Delivering the query to a webhook counts towards the time to answer it
+            return await asyncio.wait_for(push_and_wait(), self.answer_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.user.username} did not answer the {kind} in time.")
+            return None
+        finally:
+            self._pending_answers.pop(query["id"], None)
+
+    async def _push_update(self, kind: str, payload: JsonDict) -> None:
+        update = {"update_id": next(self._update_ids), kind: payload}
+        if self.webhook_url is not None:
+            await self._deliver(update)
+            return
+
+        self._updates.append(update)
+        self._get_updates_available().set()
+
+    def _get_updates_available(self) -> asyncio.Event:
+        # Created lazily, inside the running event loop
+        if self._updates_available is None:
+            self._updates_available = asyncio.Event()
+        return self._updates_available
+
+    def _deliver(self, update: JsonDict) -> asyncio.Future:
+        # Like Telegram, the emulator posts updates to the webhook one at a time and in order
+        task = asyncio.ensure_future(
+            self._post_after(self._last_delivery, self.webhook_url, update)
+        )
+        self._last_delivery = task
+        self._webhook_tasks.add(task)
+        task.add_done_callback(self._webhook_tasks.discard)
+        return task
+
+    async def _post_after(
+        self, previous: Optional[asyncio.Future], url: str, update: JsonDict
+    ) -> None:
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        await self._post_to_webhook(url, update)
+
+    async def _post_to_webhook(self, url: str, update: JsonDict) -> None:
+        headers = {}
+        if self.webhook_secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+        try:
+            status, body = await asyncio.wait_for(
+                post_json(url, update, headers), self.answer_timeout
+            )
+        except OSError as e:
+            logger.warning(f"Could not deliver an update to {url}: {e}")
+            return
+        except asyncio.TimeoutError:
+            logger.warning(f"The webhook {url} did not respond in time.")
+            return
+        if status >= 300:
+            logger.warning(f"The webhook {url} responded with {status}.")
+            return
+
+        # Bots may call a method in their response to the webhook request
+        try:
+            reply = json.loads(body) if body.strip() else None
+        except ValueError:
+            reply = None
+        if isinstance(reply, dict) and "method" in reply:
+            try:
+                await self.call(reply.pop("method"), reply)
+            except BotApiError as e:
+                logger.warning(f"The webhook reply of {self.user.username} failed: {e}")
+
+    # endregion
+
+    # region Bot API methods
+
+    async def _get_me(self, params: JsonDict) -> JsonDict:
+        return {
+            **_user_to_api(self.user),
+            "can_join_groups": False,
+            "can_read_all_group_messages": False,
+            "supports_inline_queries": True,
+        }
+
+    async def _get_updates(self, params: JsonDict) -> List[JsonDict]:
+        if self.webhook_url is not None:
+            raise BotApiError(
+                409,
+                "Conflict: can't use getUpdates method while webhook is active; "
+                "use deleteWebhook to delete the webhook first",
+            )
+        offset = _get_int(params, "offset", 0)
+        limit = _get_int(params, "limit", 100)
+        timeout = _get_int(params, "timeout", 0)
+
+        if offset:
+            # Updates before the offset are confirmed and never returned again
+            self._updates = [u for u in self._updates if u["update_id"] >= offset]
+
+        if not self._updates and timeout > 0:
+            updates_available = self._get_updates_available()
+            updates_available.clear()
+            try:
+                await asyncio.wait_for(updates_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _set_webhook(self, params: JsonDict) -> bool:
+        url = params.get("url") or None
+        if url is not None and urlsplit(url).scheme != "http":
+            raise BotApiError(
+                400, "Bad Request: bad webhook: the emulator only supports http URLs"
+            )
+        self.webhook_url = url
+        self.webhook_secret = params.get("secret_token") or None
+
+        pending, self._updates = self._updates, []
+        if url is not None and not _get_bool(params, "drop_pending_updates"):
+            for update in pending:
+                self._deliver(update)
+        elif url is None:
+            self._updates = pending
+        return True
+
+    async def _delete_webhook(self, params: JsonDict) -> bool:
+        if _get_bool(params, "drop_pending_updates"):
+            self._updates = []
+        return await self._set_webhook({})
+
+    async def _get_webhook_info(self, params: JsonDict) -> JsonDict:
+        return {
+            "url": self.webhook_url or "",
+            "has_custom_certificate": False,
+            "pending_update_count": len(self._updates),
+        }
+
+    async def _send_message(self, params: JsonDict) -> JsonDict:
+        conversation = self._get_conversation(params)
+        text = params.get("text")
+        if not text:
+            raise BotApiError(400, "Bad Request: message text is empty")
+
+        message = await conversation.reply(
+            str(text), reply_markup=_parse_reply_markup(params.get("reply_markup"))
+        )
+        return _message_to_api(message, conversation.client.me)
+
+    async def _edit_message_text(self, params: JsonDict) -> JsonDict:
+        if "inline_message_id" in params:
+            raise BotApiError(
+                400, "Bad Request: inline messages are not supported by the emulator"
+            )
+        conversation = self._get_conversation(params)
+        text = params.get("text")
+        if not text:
+            raise BotApiError(400, "Bad Request: message text is empty")
+
+        try:
+            message = await conversation.edit(
+                _get_int(params, "message_id", 0),
+                str(text),
+                reply_markup=_parse_reply_markup(params.get("reply_markup")),
+            )
+        except MessageIdInvalid:
+            raise BotApiError(400, "Bad Request: message to edit not found") from None
+        return _message_to_api(message, conversation.client.me)
+
+    async def _delete_message(self, params: JsonDict) -> bool:
+        conversation = self._get_conversation(params)
+        deleted = await conversation.client.delete_messages(
+            self.user.id, _get_int(params, "message_id", 0)
+        )
+        if not deleted:
+            raise BotApiError(400, "Bad Request: message to delete not found")
+        return True
+
+    async def _answer_callback_query(self, params: JsonDict) -> bool:
+        self._resolve_query(params, params.get("text"))
+        return True
+
+    async def _answer_inline_query(self, params: JsonDict) -> bool:
+        results = [_parse_inline_result(r) for r in _get_json(params, "results") or []]
+        self._resolve_query(params, (results, params.get("next_offset") or None))
+        return True
+
+    async def _set_my_commands(self, params: JsonDict) -> bool:
+        self.commands = [
+            BotCommand(command=c["command"], description=c["description"])
+            for c in _get_json(params, "commands") or []
+        ]
+        return True
+
+    async def _get_my_commands(self, params: JsonDict) -> List[JsonDict]:
+        return [
+            {"command": c.command, "description": c.description} for c in self.commands
+        ]
+
+    def _get_conversation(self, params: JsonDict) -> Conversation:
+        try:
+            return self._conversations[int(params.get("chat_id"))]
+        except (KeyError, TypeError, ValueError):
+            raise BotApiError(400, "Bad Request: chat not found") from None
+
+    def _resolve_query(self, params: JsonDict, answer: Any) -> None:
+        query_id = str(params.get("callback_query_id") or params.get("inline_query_id"))
+        future = self._pending_answers.get(query_id)
+        if future is None or future.done():
+            raise BotApiError(
+                400,
+                "Bad Request: query is too old and response timeout expired or query ID is invalid",
+            )
+        future.set_result(answer)
+
+    # endregion
+
+
+class BotApiServer:
+    """
+    Serves the emulated Bot API of `BotApiBot`s over HTTP on the loopback interface, at
+    `{url}/bot{token}/{method}` like the official server.
+
+    Only plain HTTP is supported, which is why this is meant for tests that run the bot in the same process or on
+    the same machine. As bots talk to it in real time, it cannot be used together with a `VirtualClock`.
+
+    Examples:
+        ``` python
+        bot = BotApiBot("my_bot")
+        async with BotApiServer(bot) as server, FakeClient(bot) as client:
+            # e.g. python-telegram-bot
+            application = Application.builder().token(bot.token).base_url(f"{server.url}/bot").build()
+            ...
+            controller = BotController(client, "@my_bot")
+        ```
+    """
+
+    def __init__(self, *bots: BotApiBot, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._bots: Dict[str, BotApiBot] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Future] = set()
+
+        for bot in bots:
+            self.add_bot(bot)
+
+    def add_bot(self, bot: BotApiBot) -> None:
+        self._bots[bot.token] = bot
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def get_api_url(self, bot: BotApiBot) -> str:
+        """
+        Returns the URL that the methods of the `bot` are appended to.
+        """
+        return f"{self.url}/bot{bot.token}"
+
+    async def start(self) -> "BotApiServer":
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Bot API emulator listening on {self.url}")
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "BotApiServer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await read_http_message(reader)
+                if request is None:
+                    break
+                start_line, headers, body = request
+                _, target, _ = start_line.split(" ", 2)
+
+                status, response = await self._handle_request(target, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                write_http_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _handle_request(
+        self, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, JsonDict]:
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/")
+        try:
+            if len(parts) != 2 or not parts[0].startswith("bot"):
+                raise BotApiError(404, "Not Found")
+            bot = self._bots.get(parts[0][3:])
+            if bot is None:
+                raise BotApiError(401, "Unauthorized")
+
+            params = parse_params(url.query, headers, body)
+            result = await bot.call(parts[1], params)
+        except BotApiError as e:
+            return (
+                e.error_code,
+                {"ok": False, "error_code": e.error_code, "description": e.description},
+            )
+        except Exception as e:
+            logger.exception(e)
+            return 500, {"ok": False, "error_code": 500, "description": str(e)}
+        return 200, {"ok": True, "result": result}
+
+
+# region HTTP
+
+
+async def read_http_message(
+    reader: asyncio.StreamReader, read_to_eof: bool = False
+) -> Optional[Tuple[str, Dict[str, str], bytes]]:
+    """
+    Reads an HTTP/1.1 request or response and returns its start line, headers (with lowercase names) and body, or
+    `None` if the connection was closed before.
+    """
+    start_line = await reader.readline()
+    if not start_line.strip():
+        return None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read() if read_to_eof else b""
+
+    return start_line.decode("latin-1").strip(), headers, body
+
+
+def write_http_response(
+    writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool
+) -> None:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+async def post_json(
+    url: str, payload: Any, headers: Dict[str, str] = None
+) -> Tuple[int, bytes]:
+    """
+    Posts the `payload` as JSON to a plain HTTP `url` and returns the status and body of the response.
+    """
+    parts = urlsplit(url)
+    body = json.dumps(payload).encode()
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    head = "".join(
+        f"{name}: {value}\r\n"
+        for name, value in {
+            "Host": parts.netloc,
+            "Content-Type": "application/json",
+            "Content-Length": len(body),
+            "Connection": "close",
+            **(headers or {}),
+        }.items()
+    )
+
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        writer.write(f"POST {path} HTTP/1.1\r\n{head}\r\n".encode("latin-1") + body)
+        await writer.drain()
+        response = await read_http_message(reader, read_to_eof=True)
+    finally:
+        writer.close()
+    if response is None:
+        raise ConnectionError("The server closed the connection without a response")
+
+    status_line, _, response_body = response
+    return int(status_line.split(" ", 2)[1]), response_body
+
+
+def parse_params(query: str, headers: Dict[str, str], body: bytes) -> JsonDict:
+    """
+    Extracts the parameters of a Bot API request from the query string and a JSON, URL-encoded or multipart body.
+    """
+    params: JsonDict = dict(parse_qsl(query))
+    content_type = headers.get("content-type", "")
+    if not body:
+        return params
+
+    if content_type.startswith("application/json"):
+        params.update(json.loads(body))
+    elif content_type.startswith("application/x-www-form-urlencoded"):
+        params.update(parse_qsl(body.decode()))
+    elif content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+        )
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name:
+                params[name] = part.get_content()
+    return params
+
+
+# endregion
+
+# region Conversion between Bot API objects and Pyrogram types
+
+
+def _get_int(params: JsonDict, name: str, default: int) -> int:
+    value = params.get(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        raise BotApiError(400, f"Bad Request: invalid {name}") from None
+
+
+def _get_bool(params: JsonDict, name: str) -> bool:
+    value = params.get(name)
+    if isinstance(value, str):
+        return value.lower() in ("true", "1")
+    return bool(value)
+
+
+def _get_json(params: JsonDict, name: str) -> Any:
+    # Form-encoded requests carry objects and arrays as JSON strings
+    value = params.get(name)
+    if isinstance(value, (str, bytes)):
+        try:
+            return json.loads(value)
+        except ValueError:
+            raise BotApiError(
+                400, f"Bad Request: can't parse {name} JSON object"
+            ) from None
+    return value
+
+
+def _user_to_api(user: User) -> JsonDict:
+    data = {"id": user.id, "is_bot": bool(user.is_bot), "first_name": user.first_name}
+    for name in ("last_name", "username", "language_code"):
+        if getattr(user, name, None):
+            data[name] = getattr(user, name)
+    return data
+
+
+def _message_to_api(message: Message, user: User) -> JsonDict:
+    """
+    Converts a message of the private chat with the `user`, as seen by the bot.
+    """
+    chat = {"id": user.id, "type": "private", "first_name": user.first_name}
+    if user.username:
+        chat["username"] = user.username
+
+    data = {
+        "message_id": message.id,
+        "from": _user_to_api(message.from_user),
+        "chat": chat,
+        "date": int(message.date.timestamp()),
+    }
+    if message.edit_date:
+        data["edit_date"] = int(message.edit_date.timestamp())
+    if message.text is not None:
+        data["text"] = message.text
+        if message.text.startswith("/"):
+            # Frameworks detect commands by this entity
+            command = message.text.split()[0]
+            data["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(command)}
+            ]
+    if isinstance(message.reply_markup, InlineKeyboardMarkup):
+        data["reply_markup"] = {
+            "inline_keyboard": [
+                [
+                    {
+                        k: v
+                        for k, v in (
+                            ("text", b.text),
+                            ("callback_data", b.callback_data),
+                            ("url", b.url),
+                            ("switch_inline_query", b.switch_inline_query),
+                            (
+                                "switch_inline_query_current_chat",
+                                b.switch_inline_query_current_chat,
+                            ),
+                        )
+                        if v is not None
+                    }
+                    for b in row
+                ]
+                for row in message.reply_markup.inline_keyboard
+            ]
+        }
+    return data
+
+
+def _parse_reply_markup(value: Any) -> Optional[ReplyMarkup]:
+    data = _get_json({"reply_markup": value}, "reply_markup")
+    if not data:
+        return None
+
+    if "inline_keyboard" in data:
+        return InlineKeyboardMarkup(
+            [
+                [
+                    InlineKeyboardButton(
+                        b["text"],
+                        callback_data=b.get("callback_data"),
+                        url=b.get("url"),
+                        switch_inline_query=b.get("switch_inline_query"),
+                        switch_inline_query_current_chat=b.get(
+                            "switch_inline_query_current_chat"
+                        ),
+                    )
+                    for b in row
+                ]
+                for row in data["inline_keyboard"]
+            ]
+        )
+    if "keyboard" in data:
+        return ReplyKeyboardMarkup(
+            [
+                [KeyboardButton(b if isinstance(b, str) else b["text"]) for b in row]
+                for row in data["keyboard"]
+            ],
+            resize_keyboard=data.get("resize_keyboard"),
+            one_time_keyboard=data.get("one_time_keyboard"),
+            selective=data.get("selective"),
+            placeholder=data.get("input_field_placeholder"),
+        )
+    if data.get("remove_keyboard"):
+        return ReplyKeyboardRemove(selective=data.get("selective"))
+    if data.get("force_reply"):
+        return ForceReply(
+            selective=data.get("selective"),
+            placeholder=data.get("input_field_placeholder"),
+        )
+    raise BotApiError(400, "Bad Request: can't parse reply keyboard markup JSON object")
+
+
+def _parse_inline_result(data: JsonDict) -> BotInlineResult:
+    if data.get("type") != "article":
+        raise BotApiError(
+            400,
+            f"Bad Request: inline results of type {data.get('type')} are not supported by the emulator",
+        )
+    content = data.get("input_message_content") or {}
+    return FakeBot.article(
+        str(data["id"]),
+        data["title"],
+        text=content.get("message_text"),
+        description=data.get("description"),
+        url=data.get("url"),
+    )
+
+
+# endregion
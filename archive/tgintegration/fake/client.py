@@ -0,0 +1,452 @@
+"""
+An in-process stand-in for a Pyrogram `Client` that talks to scripted `FakeBot`s instead of Telegram.
+"""
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
+from typing import TYPE_CHECKING
+from typing import Union
+
+from pyrogram.errors import MessageIdInvalid
+from pyrogram.errors import PeerIdInvalid
+from pyrogram.errors import Unauthorized
+from pyrogram.errors import UsernameNotOccupied
+from pyrogram.handlers import EditedMessageHandler
+from pyrogram.handlers import MessageHandler
+from pyrogram.handlers.handler import Handler
+from pyrogram.raw.base import InputPeer
+from pyrogram.raw.functions.messages import DeleteHistory
+from pyrogram.raw.functions.users import GetFullUser
+from pyrogram.raw.types import BotInfo
+from pyrogram.raw.types import InputPeerSelf
+from pyrogram.raw.types import InputPeerUser
+from pyrogram.raw.types import PeerNotifySettings
+from pyrogram.raw.types import PeerSettings
+from pyrogram.raw.types import UserFull
+from pyrogram.raw.types.messages import AffectedHistory
+from pyrogram.raw.types.messages import BotCallbackAnswer
+from pyrogram.raw.types.messages import BotResults
+from pyrogram.raw.types.users import UserFull as UsersUserFull
+from pyrogram.types import CallbackQuery
+from pyrogram.types import Message
+from pyrogram.types import SentCode
+from pyrogram.types import User
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.deadline_scheduler import get_scheduler
+from tgintegration.fake.bot import Conversation
+from tgintegration.fake.bot import FakeBot
+from tgintegration.fake.bot import run_handler
+
+if TYPE_CHECKING:
+    from tgintegration.fake.auth import FakeAuthServer
+
+logger = logging.getLogger(__name__)
+
+Peer = Union[int, str, InputPeer]
+
+
+class InlineExecutor(Executor):
+    """
+    Runs whatever is handed to `loop.run_in_executor` (namely synchronous Pyrogram filters) right away instead of on
+    a worker thread, so that all work of a simulated run happens on the event loop.
+    """
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class FakeDispatcher:
+    """
+    Mirrors the parts of Pyrogram's `Dispatcher` that handlers are registered with: `groups` and `locks_list`.
+    Updates are processed by `workers` worker tasks in the same way, i.e. the first matching handler of every group
+    gets called.
+    """
+
+    def __init__(self, client: "FakeClient", workers: int = 1):
+        self.client = client
+        self.workers = workers
+
+        self.groups: "OrderedDict[int, List[Handler]]" = OrderedDict()
+        self.locks_list: List[asyncio.Lock] = []
+        self.updates_queue: Optional[asyncio.Queue] = None
+        self.handler_worker_tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self.updates_queue = asyncio.Queue()
+        self.locks_list = [asyncio.Lock() for _ in range(self.workers)]
+        self.handler_worker_tasks = [
+            asyncio.ensure_future(self.handler_worker(lock)) for lock in self.locks_list
+        ]
+
+    async def stop(self) -> None:
+        for _ in self.handler_worker_tasks:
+            self.updates_queue.put_nowait(None)
+        await asyncio.gather(*self.handler_worker_tasks)
+
+        self.handler_worker_tasks.clear()
+        self.groups.clear()
+
+    async def handler_worker(self, lock: asyncio.Lock) -> None:
+        while True:
+            packet = await self.updates_queue.get()
+            try:
+                if packet is None:
+                    break
+                async with lock:
+                    await self._dispatch(*packet)
+            finally:
+                self.updates_queue.task_done()
+
+    async def _dispatch(self, update: Any, handler_type: Type[Handler]) -> None:
+        for group in list(self.groups.values()):
+            for handler in group:
+                if not isinstance(handler, handler_type):
+                    continue
+
+                try:
+                    if not await handler.check(self.client, update):
+                        continue
+                except Exception as e:
+                    logger.exception(e)
+                    continue
+
+                try:
+                    await handler.callback(self.client, update)
+                except Exception as e:
+                    logger.exception(e)
+
+                break
+
+
+class FakeClient:
+    """
+    Implements the subset of the Pyrogram `Client` interface that {{tgi}} relies on, backed by any number of
+    in-memory `FakeBot`s. Messages sent to a bot are handed to its scripted handlers, and whatever the bot replies
+    with is fed through the `dispatcher` like a real update.
+
+    This makes it possible to run whole test suites (and benchmarks of the library's own overhead) offline and at
+    in-memory speed. Pass a `VirtualClock` to also skip over all timeouts and delays without waiting for them:
+
+    ``` python
+    client = FakeClient(bot, clock=VirtualClock())
+    controller = BotController(client, "@echo_bot")  # Uses the client's clock
+    ```
+    """
+
+    def __init__(
+        self,
+        *bots: FakeBot,
+        name: str = "fake",
+        user_id: int = 1,
+        first_name: str = "Test",
+        username: str = None,
+        workers: int = 1,
+        clock: Clock = None,
+        auth: "FakeAuthServer" = None,
+    ):
+        self.name = name
+        self.clock = clock or REAL_CLOCK
+        self.me = User(
+            id=user_id,
+            is_self=True,
+            is_bot=False,
+            first_name=first_name,
+            username=username,
+        )
+        self.is_connected = False
+        self.auth = auth
+        # Clients of a `FakeAuthServer` need to sign in first
+        self.is_authorized = auth is None
+        self.executor = InlineExecutor()
+        self.dispatcher = FakeDispatcher(self, workers)
+
+        self._conversations: Dict[int, Conversation] = {}
+        self._usernames: Dict[str, int] = {}
+        self._history: Dict[int, "OrderedDict[int, Message]"] = {}
+        self._message_ids = itertools.count(1)
+        self._query_ids = itertools.count(1)
+        self._pending: Set[asyncio.Future] = set()
+
+        for bot in bots:
+            self.add_bot(bot)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.get_event_loop()
+
+    def add_bot(self, bot: FakeBot) -> None:
+        self._conversations[bot.user.id] = Conversation(self, bot)
+        self._usernames[bot.user.username.lower()] = bot.user.id
+
+    async def start(self) -> "FakeClient":
+        if self.is_connected:
+            raise ConnectionError("Client is already connected")
+        await self.dispatcher.start()
+        self.is_connected = True
+        return self
+
+    async def stop(self) -> "FakeClient":
+        if not self.is_connected:
+            raise ConnectionError("Client is already disconnected")
+        for task in list(self._pending):
+            task.cancel()
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.dispatcher.stop()
+        self.is_connected = False
+        return self
+
+    async def connect(self) -> bool:
+        """
+        Connects without starting to dispatch updates, like before logging in.
+
+        Returns:
+            Whether the client is authorized already.
+        """
+        if self.is_connected:
+            raise ConnectionError("Client is already connected")
+        self.is_connected = True
+        return self.is_authorized
+
+    async def disconnect(self) -> None:
+        if not self.is_connected:
+            raise ConnectionError("Client is already disconnected")
+        self.is_connected = False
+
+    async def __aenter__(self) -> "FakeClient":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def settle(self) -> None:
+        """
+        Waits until the bots have finished handling everything that was sent to them and all resulting updates have
+        been dispatched.
+        """
+        while True:
+            if self._pending:
+                await asyncio.gather(*self._pending, return_exceptions=True)
+            if self.dispatcher.updates_queue is not None:
+                await self.dispatcher.updates_queue.join()
+            if not self._pending:
+                return
+
+    # region Plumbing for the bots
+
+    def next_message_id(self) -> int:
+        return next(self._message_ids)
+
+    def deliver(self, message: Message, edited: bool = False) -> None:
+        """
+        Stores an incoming (or edited) message and dispatches it to the registered handlers.
+        """
+        self._history.setdefault(message.chat.id, OrderedDict())[message.id] = message
+        if self.is_connected:
+            handler_type = EditedMessageHandler if edited else MessageHandler
+            self.dispatcher.updates_queue.put_nowait((message, handler_type))
+
+    def get_history(self, chat_id: int) -> List[Message]:
+        return list(self._history.get(chat_id, {}).values())
+
+    def get_message(self, chat_id: int, message_id: int) -> Message:
+        try:
+            return self._history[chat_id][message_id]
+        except KeyError:
+            raise MessageIdInvalid() from None
+
+    def _get_conversation(self, peer: Peer) -> Conversation:
+        if isinstance(peer, str):
+            user_id = self._usernames.get(peer.lstrip("@").lower())
+            if user_id is None:
+                raise UsernameNotOccupied()
+        else:
+            user_id = getattr(peer, "user_id", peer)
+
+        try:
+            return self._conversations[user_id]
+        except KeyError:
+            raise PeerIdInvalid() from None
+
+    def _spawn(self, coro) -> asyncio.Future:
+        task = asyncio.ensure_future(run_handler(coro))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    # endregion
+
+    # region Client interface
+
+    async def resolve_peer(self, peer_id: Peer) -> InputPeer:
+        if peer_id in ("me", "self"):
+            return InputPeerSelf()
+        user = self._get_conversation(peer_id).bot.user
+        return InputPeerUser(user_id=user.id, access_hash=0)
+
+    async def get_users(
+        self, user_ids: Union[Peer, Iterable[Peer]]
+    ) -> Union[User, List[User]]:
+        if isinstance(user_ids, (int, str)):
+            return self._get_user(user_ids)
+        return [self._get_user(u) for u in user_ids]
+
+    def _get_user(self, peer: Peer) -> User:
+        if peer in ("me", "self", self.me.id):
+            return self.me
+        return self._get_conversation(peer).bot.user
+
+    async def invoke(self, query: Any, *args, **kwargs) -> Any:
+        if isinstance(query, GetFullUser):
+            bot = self._get_conversation(query.id).bot
+            return UsersUserFull(
+                full_user=UserFull(
+                    id=bot.user.id,
+                    settings=PeerSettings(),
+                    notify_settings=PeerNotifySettings(),
+                    common_chats_count=0,
+                    bot_info=BotInfo(user_id=bot.user.id, commands=bot.commands),
+                ),
+                chats=[],
+                users=[],
+            )
+
+        if isinstance(query, DeleteHistory):
+            chat_id = self._get_conversation(query.peer).bot.user.id
+            deleted = self._history.pop(chat_id, {})
+            return AffectedHistory(pts=0, pts_count=len(deleted), offset=0)
+
+        raise NotImplementedError(
+            f"{query.__class__.__name__} is not supported by the {self.__class__.__name__}."
+        )
+
+    async def send_message(
+        self,
+        chat_id: Peer,
+        text: str,
+        reply_to_message_id: int = None,
+        reply_markup: Any = None,
+        **kwargs,
+    ) -> Message:
+        conversation = self._get_conversation(chat_id)
+        message = Message(
+            client=self,
+            id=self.next_message_id(),
+            chat=conversation.chat,
+            from_user=self.me,
+            date=datetime.fromtimestamp(self.clock.time()),
+            text=text,
+            reply_to_message_id=reply_to_message_id,
+            reply_markup=reply_markup,
+            outgoing=True,
+        )
+        # Like with a real session, our own messages are stored but not dispatched as updates
+        self._history.setdefault(message.chat.id, OrderedDict())[message.id] = message
+
+        self._spawn(conversation.bot.handle_message(conversation, message))
+        return message
+
+    async def request_callback_answer(
+        self,
+        chat_id: Peer,
+        message_id: int,
+        callback_data: Union[str, bytes],
+        timeout: int = 10,
+    ) -> BotCallbackAnswer:
+        conversation = self._get_conversation(chat_id)
+        query = CallbackQuery(
+            client=self,
+            id=str(next(self._query_ids)),
+            from_user=self.me,
+            chat_instance=str(conversation.bot.user.id),
+            message=self.get_message(conversation.bot.user.id, message_id),
+            data=callback_data,
+        )
+
+        task = self._spawn(conversation.bot.handle_callback_query(conversation, query))
+        scheduler = get_scheduler(self.clock)
+        try:
+            answer = await scheduler.wait(
+                asyncio.shield(task), scheduler.now() + timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError("Request timed out") from None
+
+        return BotCallbackAnswer(cache_time=0, message=answer)
+
+    async def get_inline_bot_results(
+        self,
+        bot: Peer,
+        query: str = "",
+        offset: str = "",
+        latitude: float = None,
+        longitude: float = None,
+    ) -> BotResults:
+        conversation = self._get_conversation(bot)
+        results, next_offset = await conversation.bot.get_inline_results(
+            conversation, query, offset
+        )
+        return BotResults(
+            query_id=next(self._query_ids),
+            results=results,
+            cache_time=conversation.bot.inline_cache_time,
+            users=[],
+            next_offset=next_offset,
+        )
+
+    async def delete_messages(
+        self,
+        chat_id: Peer,
+        message_ids: Union[int, Iterable[int]],
+        revoke: bool = True,
+    ) -> int:
+        chat_id = self._get_conversation(chat_id).bot.user.id
+        ids: Tuple[int, ...] = (
+            (message_ids,) if isinstance(message_ids, int) else tuple(message_ids)
+        )
+        history = self._history.get(chat_id, {})
+        return sum(history.pop(i, None) is not None for i in ids)
+
+    # endregion
+
+    # region Login
+
+    def _get_auth(self) -> "FakeAuthServer":
+        if self.auth is None:
+            raise NotImplementedError(
+                f"Logging in requires a {self.__class__.__name__} created by a FakeAuthServer."
+            )
+        return self.auth
+
+    async def send_code(self, phone_number: str) -> SentCode:
+        return await self._get_auth().send_code(phone_number)
+
+    async def sign_in(
+        self, phone_number: str, phone_code_hash: str, phone_code: str
+    ) -> User:
+        return self._get_auth().sign_in(self, phone_number, phone_code_hash, phone_code)
+
+    async def export_session_string(self) -> str:
+        if not self.is_authorized:
+            raise Unauthorized()
+        return self._get_auth().export_session_string(self)
+
+    # endregion
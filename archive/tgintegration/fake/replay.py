@@ -0,0 +1,159 @@
+"""
+A client that plays back recorded `Cassette`s instead of talking to Telegram.
+"""
+import logging
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+
+from tgintegration.cassette import Cassette
+from tgintegration.cassette import decode
+from tgintegration.cassette import decode_error
+from tgintegration.cassette import encode
+from tgintegration.cassette import encode_kwargs
+from tgintegration.clock import Clock
+from tgintegration.fake.client import FakeClient
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMismatchError(Exception):
+    """
+    Raised when a call is made that the cassette does not contain (any more).
+    """
+
+
+class ReplayClient(FakeClient):
+    """
+    Plays back a `Cassette` recorded by a `CassetteRecorder`: Each call that a `BotController` makes returns the
+    recorded result, and the messages that answered it are dispatched as updates again, through the same handlers
+    and collectors as live ones.
+
+    Calls are matched by method and arguments against the recorded calls that have not been replayed yet, so
+    concurrent conversations may interleave differently than while recording.
+
+    Args:
+        cassette: The cassette, or the path to a cassette file.
+        speed: Factor for all recorded delays: `1` replays at the original speed, `0` delivers the responses right
+            away. Use a `VirtualClock` to also skip the timeouts of the controller.
+        clock: Defaults to real time.
+
+    Examples:
+        ``` python
+        client = ReplayClient("start.cassette.json", clock=VirtualClock())
+        controller = BotController(client, "@bot")
+        ```
+    """
+
+    def __init__(
+        self,
+        cassette: Union[Cassette, str],
+        *,
+        speed: float = 1.0,
+        name: str = "replay",
+        clock: Clock = None,
+        **kwargs,
+    ):
+        super().__init__(name=name, clock=clock, **kwargs)
+        self.cassette = (
+            cassette if isinstance(cassette, Cassette) else Cassette.load(cassette)
+        )
+        self.speed = speed
+
+        self._replayed: List[bool] = [False] * len(self.cassette.events)
+        self._responses: Dict[Any, List[Dict[str, Any]]] = {}
+        for event in self.cassette.events:
+            if "message" in event:
+                self._responses.setdefault(event["after"], []).append(event)
+
+    async def start(self) -> "ReplayClient":
+        await super().start()
+        if None in self._responses:
+            # Messages that were recorded before the first call
+            self._spawn(self._deliver_responses(None, 0))
+        return self
+
+    @property
+    def remaining_calls(self) -> List[Dict[str, Any]]:
+        """
+        The recorded calls that have not been replayed yet.
+        """
+        return [
+            e
+            for e, replayed in zip(self.cassette.events, self._replayed)
+            if "call" in e and not replayed and not e.get("discarded")
+        ]
+
+    async def _deliver_responses(self, index: Any, started: float) -> None:
+        previous = started
+        for event in self._responses.pop(index, ()):
+            delay = (event["t"] - previous) * self.speed
+            if delay > 0:
+                await self.clock.sleep(delay)
+            previous = event["t"]
+            self.deliver(decode(event["message"], self), edited=event["edited"])
+
+    def _find_call(self, method: str, args: tuple, kwargs: dict) -> int:
+        encoded_args = encode(args)
+        encoded_kwargs = encode_kwargs(kwargs)
+        for index, event in enumerate(self.cassette.events):
+            if (
+                "call" in event
+                and not self._replayed[index]
+                and not event.get("discarded")
+                and event["call"] == method
+                and event["args"] == encoded_args
+                and event["kwargs"] == encoded_kwargs
+            ):
+                return index
+
+        remaining = ", ".join(e["call"] for e in self.remaining_calls[:3]) or "none"
+        raise CassetteMismatchError(
+            f"The cassette contains no call of {method} with the arguments {encoded_args} {encoded_kwargs} "
+            f"(next recorded calls: {remaining})."
+        )
+
+    async def _replay(self, method: str, *args, **kwargs) -> Any:
+        index = self._find_call(method, args, kwargs)
+        self._replayed[index] = True
+        event = self.cassette.events[index]
+
+        if index in self._responses:
+            self._spawn(self._deliver_responses(index, event["t"]))
+
+        duration = event.get("duration", 0) * self.speed
+        if duration > 0:
+            await self.clock.sleep(duration)
+
+        if "error" in event:
+            raise decode_error(event["error"])
+        return decode(event.get("result"), self)
+
+    # region Client interface
+
+    async def resolve_peer(self, *args, **kwargs):
+        return await self._replay("resolve_peer", *args, **kwargs)
+
+    async def get_users(self, *args, **kwargs):
+        return await self._replay("get_users", *args, **kwargs)
+
+    async def invoke(self, *args, **kwargs):
+        return await self._replay("invoke", *args, **kwargs)
+
+    async def send_message(self, *args, **kwargs):
+        return await self._replay("send_message", *args, **kwargs)
+
+    async def request_callback_answer(self, *args, **kwargs):
+        return await self._replay("request_callback_answer", *args, **kwargs)
+
+    async def get_inline_bot_results(self, *args, **kwargs):
+        return await self._replay("get_inline_bot_results", *args, **kwargs)
+
+    async def send_inline_bot_result(self, *args, **kwargs):
+        return await self._replay("send_inline_bot_result", *args, **kwargs)
+
+    async def delete_messages(self, *args, **kwargs):
+        return await self._replay("delete_messages", *args, **kwargs)
+
+    # endregion
@@ -10,6 +10,9 @@ from pyrogram.handlers.handler import Handler
 def find_free_group(dispatcher: Dispatcher, max_index: int = -1000) -> int:
     """
     Finds the next free group index in the given `dispatcher`'s groups that is lower than `max_index`.
+
+    As transient groups are removed again once they are empty, the scan only ever needs to skip over the groups
+    that are in use at the same time.
     """
     groups = dispatcher.groups
     i = max_index
@@ -22,34 +25,51 @@ def find_free_group(dispatcher: Dispatcher, max_index: int = -1000) -> int:
 
 @asynccontextmanager
 async def add_handlers_transient(client: Client, handlers: List[Handler]):
+    """
+    Registers the given `handlers` in a new dispatcher group for the duration of the context manager body.
+
+    The handlers are always removed afterwards, even if the body raises, and the group itself is dropped from the
+    dispatcher so that its index can be reused and the dispatcher does not have to walk over empty groups.
+    """
     dispatcher = client.dispatcher
 
-    # TODO: Add a comment why it's necessary to circumvent pyro's builtin
+    # Pyrogram's `Dispatcher.add_handler` only schedules the registration as a task. We need the handlers to be
+    # in place before the user-defined interaction starts, so the dispatcher's locks are acquired directly.
     for lock in dispatcher.locks_list:
         await lock.acquire()
 
     group = find_free_group(dispatcher)
 
     try:
-        dispatcher.groups[group] = []
+        dispatcher.groups[group] = list(handlers)
         dispatcher.groups = OrderedDict(sorted(dispatcher.groups.items()))
-        for handler in handlers:
-            dispatcher.groups[group].append(handler)
     finally:
         for lock in dispatcher.locks_list:
             lock.release()
 
-    yield
+    try:
+        yield
+    finally:
+        await _remove_handler_group(dispatcher, group, handlers)
 
+
+async def _remove_handler_group(
+    dispatcher: Dispatcher, group: int, handlers: List[Handler]
+) -> None:
     for lock in dispatcher.locks_list:
         await lock.acquire()
 
     try:
+        # Pyrogram clears all groups when the client is stopped in the meantime
         if group not in dispatcher.groups:
-            raise ValueError(f"Group {group} does not exist. Handler was not removed.")
+            return
 
         for handler in handlers:
             dispatcher.groups[group].remove(handler)
+
+        # Removing an entry keeps the remaining groups sorted
+        if not dispatcher.groups[group]:
+            del dispatcher.groups[group]
     finally:
         for lock in dispatcher.locks_list:
             lock.release()
@@ -0,0 +1,83 @@
+"""
+An opt-in cache for inline query results that honors the cache time requested by the bot.
+"""
+from collections import OrderedDict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.containers.inlineresults import InlineResultContainer
+
+
+class InlineResultCache:
+    """
+    Least-recently-used cache for `InlineResultContainer`s.
+
+    Every entry expires after the `cache_time` that the bot returned along with the results, so the cache never
+    serves results that Telegram itself would not have cached. At most `max_size` entries are kept, evicting the
+    least recently used one first.
+
+    Expiry is measured with the `clock`, which defaults to the clock of the `BotController` that the cache is
+    passed to, or to real time if it is used on its own.
+    """
+
+    def __init__(self, max_size: int = 256, clock: Clock = None):
+        if max_size <= 0:
+            raise ValueError("The cache needs to be able to hold at least one entry.")
+        self.max_size = max_size
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, InlineResultContainer]]" = (
+            OrderedDict()
+        )
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[InlineResultContainer]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, container = entry
+            if self._now() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return container
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, container: InlineResultContainer, ttl: float) -> None:
+        if ttl <= 0:
+            return  # The bot asked not to cache these results
+
+        self._entries[key] = (self._now() + ttl, container)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Drops the entry for the given `key`, or all entries if no key is given.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _now(self) -> float:
+        return (self.clock or REAL_CLOCK).now()
+
+    @staticmethod
+    def make_key(
+        peer_id: int,
+        query: str,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        limit: int,
+    ) -> Hashable:
+        return peer_id, query, latitude, longitude, limit
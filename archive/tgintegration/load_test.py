@@ -0,0 +1,436 @@
+"""
+Load tests: Many synthetic users (each a `BotController` of its own account) running a scenario against a bot at the
+same time, with the number of users following ramp-up, steady-state and spike phases.
+"""
+import asyncio
+import json
+import logging
+import math
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import IO
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from tgintegration.botcontroller import BotController
+from tgintegration.clock import Clock
+from tgintegration.containers.responses import InvalidResponseError
+from tgintegration.metrics import InteractionMetrics
+from tgintegration.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+Scenario = Callable[[BotController], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Phase:
+    """
+    A period of the load test with a target number of concurrent `users`. Ramping phases move there linearly from
+    the number of users at the end of the previous phase, the others start all of them at once.
+    """
+
+    name: str
+    duration: float
+    users: int
+    ramp: bool = False
+
+
+def ramp_up(duration: float, users: int, name: str = "ramp-up") -> Phase:
+    return Phase(name, duration, users, ramp=True)
+
+
+def steady(duration: float, users: int, name: str = "steady") -> Phase:
+    return Phase(name, duration, users)
+
+
+def spike(duration: float, users: int, name: str = "spike") -> Phase:
+    """
+    A sudden jump to `users` for `duration` seconds, typically followed by a phase with fewer users again.
+    """
+    return Phase(name, duration, users)
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    """
+    The results of a load test, or of a part of it.
+
+    Attributes:
+        name: "total", the name of a phase, or "interval" for the periodic snapshots.
+        start: The start, in seconds since the beginning of the load test.
+        duration: Seconds covered by these statistics.
+        users: The number of concurrent users at the end.
+        iterations: Completed runs of the scenario (successful or not).
+        errors: Runs of the scenario that raised anything but a timeout.
+        interactions: Interactions with the bot (e.g. collected responses, clicks or timeouts) within the scenario.
+        timeouts: Interactions that failed with an `InvalidResponseError`.
+        flood_waits: `FloodWait` errors returned by Telegram, including the ones that were retried.
+        latency_p50, latency_p95, latency_p99: Percentiles of the time until the first message of a response.
+    """
+
+    name: str
+    start: float
+    duration: float
+    users: int
+    iterations: int
+    errors: int
+    interactions: int
+    timeouts: int
+    flood_waits: int
+    latency_p50: Optional[float]
+    latency_p95: Optional[float]
+    latency_p99: Optional[float]
+
+    @property
+    def throughput(self) -> float:
+        """
+        Iterations of the scenario per second.
+        """
+        return self.iterations / self.duration if self.duration else 0.0
+
+    @property
+    def timeout_rate(self) -> float:
+        return self.timeouts / self.interactions if self.interactions else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "throughput": self.throughput,
+            "timeout_rate": self.timeout_rate,
+        }
+
+
+@dataclass(frozen=True)
+class LoadTestResult:
+    total: LoadStats
+    phases: List[LoadStats]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """
+    The `q`-th percentile (0 to 100) of the `sorted_values` by the nearest-rank method.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _Window:
+    __slots__ = (
+        "name",
+        "start",
+        "iterations",
+        "errors",
+        "interactions",
+        "timeouts",
+        "flood_waits",
+        "latencies",
+    )
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.iterations = 0
+        self.errors = 0
+        self.interactions = 0
+        self.timeouts = 0
+        self.flood_waits = 0
+        self.latencies: List[float] = []
+
+    def to_stats(self, end: float, users: int) -> LoadStats:
+        latencies = sorted(self.latencies)
+        return LoadStats(
+            name=self.name,
+            start=self.start,
+            duration=end - self.start,
+            users=users,
+            iterations=self.iterations,
+            errors=self.errors,
+            interactions=self.interactions,
+            timeouts=self.timeouts,
+            flood_waits=self.flood_waits,
+            latency_p50=percentile(latencies, 50),
+            latency_p95=percentile(latencies, 95),
+            latency_p99=percentile(latencies, 99),
+        )
+
+
+class _LoadTestMetrics(InteractionMetrics):
+    """
+    Forwards the observations of the controllers to the windows of the load test, besides recording them as usual.
+    """
+
+    def __init__(self, registry: MetricsRegistry, load_test: "LoadTest"):
+        super().__init__(registry)
+        self._load_test = load_test
+
+    def observe_interaction(self, peer, command, kind, *, latency=None, **kwargs):
+        super().observe_interaction(peer, command, kind, latency=latency, **kwargs)
+        for window in self._load_test._windows:
+            window.interactions += 1
+            if latency is not None:
+                window.latencies.append(latency)
+
+    def observe_timeout(self, peer, command, kind):
+        super().observe_timeout(peer, command, kind)
+        for window in self._load_test._windows:
+            window.interactions += 1
+            window.timeouts += 1
+
+    def observe_flood_wait(self, peer, kind):
+        super().observe_flood_wait(peer, kind)
+        for window in self._load_test._windows:
+            window.flood_waits += 1
+
+
+class _User:
+    __slots__ = ("controller", "task", "stopping")
+
+    def __init__(self, controller: BotController):
+        self.controller = controller
+        self.task: Optional[asyncio.Future] = None
+        self.stopping = False
+
+
+class LoadTest:
+    """
+    Runs a `scenario` repeatedly with many synthetic users at once, each being one of the given `controllers`.
+
+    As the conversation with a bot belongs to the account, every concurrent user needs a controller of a distinct
+    client (account), so the number of controllers caps the number of users. The users of a phase are started (or
+    asked to stop after their current iteration) as the phases progress, and periodic snapshots of the statistics
+    are written to the `output` file as JSON lines while the test runs.
+
+    The `metrics` of the controllers are replaced with ones that report to the load test (and to `registry`).
+
+    Args:
+        controllers: One controller per account, all for the bot under test.
+        scenario: A coroutine function performing one iteration of a user's interaction with the bot.
+        phases: The phases of the test, in order.
+        output: A file to stream the statistics to, as one JSON object per line.
+        report_interval: Seconds between the snapshots written to `output`.
+        think_time: Seconds each user pauses between two iterations.
+        adjust_interval: Seconds between adjustments of the number of users while ramping.
+        registry: Receives the usual metrics of all interactions. Defaults to a new registry.
+        clock: Defaults to the clock of the first controller.
+
+    Examples:
+        ``` python
+        async def scenario(controller):
+            async with controller.collect(count=1):
+                await controller.send_command("start")
+
+        controllers = [BotController(client, "@my_bot") for client in clients]
+        result = await LoadTest(
+            controllers,
+            scenario,
+            [ramp_up(60, 50), steady(300, 50), spike(30, 200), steady(120, 50)],
+            output="load.jsonl",
+        ).run()
+        print(result.total.latency_p95, result.total.timeout_rate)
+        ```
+    """
+
+    def __init__(
+        self,
+        controllers: Sequence[BotController],
+        scenario: Scenario,
+        phases: Sequence[Phase],
+        *,
+        output: Union[str, Path, None] = None,
+        report_interval: float = 5.0,
+        think_time: float = 0.0,
+        adjust_interval: float = 1.0,
+        registry: Optional[MetricsRegistry] = None,
+        clock: Clock = None,
+    ):
+        if not phases:
+            raise ValueError("At least one phase is required.")
+        max_users = max(p.users for p in phases)
+        if max_users > len(controllers):
+            raise ValueError(
+                f"The phases need up to {max_users} users, but there are only {len(controllers)} controllers."
+            )
+        if len({c.client.name for c in controllers}) != len(controllers):
+            raise ValueError("Every controller needs a client (account) of its own.")
+
+        self.controllers = list(controllers)
+        self.scenario = scenario
+        self.phases = list(phases)
+        self.output = output
+        self.report_interval = report_interval
+        self.think_time = think_time
+        self.adjust_interval = adjust_interval
+        self.registry = registry or MetricsRegistry()
+        self.clock = clock or self.controllers[0].clock
+
+        self._metrics = _LoadTestMetrics(self.registry, self)
+        self._windows: List[_Window] = []
+        self._interval_window = _Window("interval", 0.0)
+        self._users: List[_User] = []
+        self._started = 0.0
+
+    @classmethod
+    def from_clients(
+        cls,
+        clients: Sequence[Client],
+        peer: Union[int, str],
+        scenario: Scenario,
+        phases: Sequence[Phase],
+        *,
+        controller_kwargs: Dict[str, Any] = None,
+        **kwargs,
+    ) -> "LoadTest":
+        """
+        Creates a load test with a controller for the `peer` on each of the `clients`.
+        """
+        controllers = [
+            BotController(client, peer, **(controller_kwargs or {}))
+            for client in clients
+        ]
+        return cls(controllers, scenario, phases, **kwargs)
+
+    @property
+    def active_users(self) -> int:
+        return sum(not u.stopping for u in self._users)
+
+    def _elapsed(self) -> float:
+        return self.clock.now() - self._started
+
+    async def _run_user(self, user: _User) -> None:
+        while not user.stopping:
+            try:
+                await self.scenario(user.controller)
+                error = False
+            except InvalidResponseError:
+                error = False  # Counted as a timeout by the metrics
+            except FloodWait:
+                error = True
+            except Exception as e:
+                logger.debug(f"Scenario failed: {e!r}")
+                error = True
+
+            for window in self._windows:
+                window.iterations += 1
+                window.errors += error
+
+            if self.think_time and not user.stopping:
+                await self.clock.sleep(self.think_time)
+
+    def _set_users(self, target: int) -> None:
+        active = [u for u in self._users if not u.stopping]
+        for user in active[target:]:
+            user.stopping = True  # Finishes its current iteration first
+
+        busy = {id(u.controller) for u in self._users}
+        idle = (c for c in self.controllers if id(c) not in busy)
+        for _ in range(target - len(active)):
+            controller = next(idle, None)
+            if controller is None:
+                break  # The remaining controllers are still finishing an iteration
+            user = _User(controller)
+            user.task = asyncio.ensure_future(self._run_user(user))
+            user.task.add_done_callback(lambda _, u=user: self._users.remove(u))
+            self._users.append(user)
+
+    def _write(self, file: Optional[IO[str]], record: Dict[str, Any]) -> None:
+        if file is not None:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+
+    async def _run_phase(self, phase: Phase, file: Optional[IO[str]]) -> LoadStats:
+        phase_window = _Window(phase.name, self._elapsed())
+        self._windows.append(phase_window)
+        start_users = self.active_users
+        phase_start = self.clock.now()
+        phase_end = phase_start + phase.duration
+        next_report = self._next_report
+
+        try:
+            while True:
+                now = self.clock.now()
+                if phase.ramp and phase.duration:
+                    progress = min(1.0, (now - phase_start) / phase.duration)
+                    self._set_users(
+                        round(start_users + (phase.users - start_users) * progress)
+                    )
+                else:
+                    self._set_users(phase.users)
+
+                if now >= next_report:
+                    self._report_interval(file)
+                    next_report = self._next_report
+                if now >= phase_end:
+                    break
+
+                wake_up = min(phase_end, next_report)
+                if phase.ramp:
+                    wake_up = min(wake_up, now + self.adjust_interval)
+                await self.clock.sleep(wake_up - now)
+        finally:
+            self._windows.remove(phase_window)
+
+        stats = phase_window.to_stats(self._elapsed(), self.active_users)
+        self._write(file, {"type": "phase", **stats.to_dict()})
+        logger.info(
+            f"Phase {phase.name}: {stats.throughput:.2f} iterations/s, "
+            f"p95 latency {stats.latency_p95}, {stats.timeouts} timeouts, {stats.flood_waits} FloodWaits"
+        )
+        return stats
+
+    @property
+    def _next_report(self) -> float:
+        return self._interval_window.start + self._started + self.report_interval
+
+    def _report_interval(self, file: Optional[IO[str]]) -> None:
+        stats = self._interval_window.to_stats(self._elapsed(), self.active_users)
+        self._write(file, {"type": "interval", **stats.to_dict()})
+        self._windows.remove(self._interval_window)
+        self._interval_window = _Window("interval", self._elapsed())
+        self._windows.append(self._interval_window)
+
+    async def run(self) -> LoadTestResult:
+        """
+        Initializes the controllers (starting their clients), runs all phases and waits for the iterations that are
+        still in progress at the end.
+        """
+        await asyncio.gather(*(c.initialize() for c in self.controllers))
+        for controller in self.controllers:
+            controller.metrics = self._metrics
+
+        file = open(self.output, "w") if self.output is not None else None
+        try:
+            self._started = self.clock.now()
+            total = _Window("total", 0.0)
+            self._interval_window = _Window("interval", 0.0)
+            self._windows = [total, self._interval_window]
+
+            phases = [await self._run_phase(p, file) for p in self.phases]
+
+            self._set_users(0)
+            await asyncio.gather(
+                *(u.task for u in list(self._users)), return_exceptions=True
+            )
+            self._report_interval(file)
+
+            result = LoadTestResult(total.to_stats(self._elapsed(), 0), phases)
+            self._write(file, {"type": "total", **result.total.to_dict()})
+            return result
+        finally:
+            for user in list(self._users):
+                user.task.cancel()
+            self._windows = []
+            if file is not None:
+                file.close()
@@ -0,0 +1,346 @@
+"""
+In-process metrics about the interactions of `BotController`s, renderable as OpenMetrics text or JSON.
+"""
+import bisect
+import json
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import Union
+
+if TYPE_CHECKING:
+    from tgintegration.containers.responses import Response
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _label_values(self, labels: Dict[str, object]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"Expected the labels {self.labelnames} for {self.name}, got {tuple(labels)}."
+            )
+        return tuple(
+            "" if labels[n] is None else str(labels[n]) for n in self.labelnames
+        )
+
+    def _labels_dict(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing value per combination of labels.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be increased.")
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for values, value in self._values.items():
+            yield f"{self.name}_total", self._labels_dict(values), value
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "samples": [
+                {"labels": self._labels_dict(values), "value": value}
+                for values, value in self._values.items()
+            ],
+        }
+
+
+class _HistogramData:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self, num_buckets: int):
+        self.counts = [0] * num_buckets
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """
+    Counts observations in buckets per combination of labels.
+
+    Observations only find their bucket by bisection and increment it. The cumulative bucket counts that
+    OpenMetrics requires are only computed when rendering.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if not self.buckets or self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        self._data: Dict[LabelValues, _HistogramData] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        data = self._data.get(key)
+        if data is None:
+            data = self._data[key] = _HistogramData(len(self.buckets))
+        data.counts[bisect.bisect_left(self.buckets, value)] += 1
+        data.count += 1
+        data.sum += value
+
+    def get_count(self, **labels) -> int:
+        data = self._data.get(self._label_values(labels))
+        return data.count if data else 0
+
+    def get_sum(self, **labels) -> float:
+        data = self._data.get(self._label_values(labels))
+        return data.sum if data else 0.0
+
+    def _cumulative(self, data: _HistogramData) -> List[Tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, data.counts):
+            total += count
+            result.append((_format_bound(bound), total))
+        return result
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for values, data in self._data.items():
+            labels = self._labels_dict(values)
+            for bound, count in self._cumulative(data):
+                yield f"{self.name}_bucket", {**labels, "le": bound}, count
+            yield f"{self.name}_count", labels, data.count
+            yield f"{self.name}_sum", labels, data.sum
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "samples": [
+                {
+                    "labels": self._labels_dict(values),
+                    "buckets": dict(self._cumulative(data)),
+                    "count": data.count,
+                    "sum": data.sum,
+                }
+                for values, data in self._data.items()
+            ],
+        }
+
+
+class MetricsRegistry:
+    """
+    Holds named metrics and renders them without the need for any external service.
+
+    All updates are plain in-memory operations that never await, so they are atomic with respect to other
+    coroutines and need no locks.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(
+                name, documentation, labelnames, **kwargs
+            )
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(
+                f"A different metric named '{name}' is already registered."
+            )
+        return metric
+
+    def __iter__(self) -> Iterator[Metric]:
+        return iter(self._metrics.values())
+
+    def to_openmetrics(self) -> str:
+        """
+        Renders all metrics in the OpenMetrics text format.
+        """
+        lines = []
+        for metric in self:
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict:
+        return {metric.name: metric.to_dict() for metric in self}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+_interaction: ContextVar[Tuple[str, Optional[str]]] = ContextVar(
+    "tgintegration_interaction", default=("collect", None)
+)
+
+
+@contextmanager
+def interaction(kind: str, command: str = None):
+    """
+    Labels the collectors started within this context (in the current task) with the kind of interaction and
+    the command that triggers it, e.g. `"inline_click"` and the caption of the clicked button.
+    """
+    token = _interaction.set((kind, command))
+    try:
+        yield
+    finally:
+        _interaction.reset(token)
+
+
+def current_interaction() -> Tuple[str, Optional[str]]:
+    return _interaction.get()
+
+
+class InteractionMetrics:
+    """
+    The metrics that `BotController`s record in a `MetricsRegistry`. Controllers sharing a registry share these
+    metrics, with each observation labeled by peer, command and kind of interaction.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        labels = ("peer", "command", "kind")
+        self.interactions = registry.counter(
+            "tgintegration_interactions", "Number of interactions with peers.", labels
+        )
+        self.timeouts = registry.counter(
+            "tgintegration_timeouts",
+            "Number of interactions that failed with an InvalidResponseError.",
+            labels,
+        )
+        self.messages_received = registry.counter(
+            "tgintegration_messages_received",
+            "Number of messages received from peers.",
+            labels,
+        )
+        self.flood_waits = registry.counter(
+            "tgintegration_flood_waits",
+            "Number of FloodWait errors raised by Telegram.",
+            ("peer", "kind"),
+        )
+        self.latency = registry.histogram(
+            "tgintegration_latency_seconds",
+            "Time from the start of an interaction until the first message of the peer.",
+            labels,
+        )
+        self.duration = registry.histogram(
+            "tgintegration_interaction_duration_seconds",
+            "Total duration of interactions.",
+            labels,
+        )
+
+    def observe_interaction(
+        self,
+        peer: Union[int, str],
+        command: Optional[str],
+        kind: str,
+        *,
+        latency: Optional[float] = None,
+        duration: Optional[float] = None,
+        num_messages: int = 0,
+    ) -> None:
+        self.interactions.inc(peer=peer, command=command, kind=kind)
+        if num_messages:
+            self.messages_received.inc(
+                num_messages, peer=peer, command=command, kind=kind
+            )
+        if latency is not None:
+            self.latency.observe(latency, peer=peer, command=command, kind=kind)
+        if duration is not None:
+            self.duration.observe(duration, peer=peer, command=command, kind=kind)
+
+    def observe_response(
+        self,
+        peer: Union[int, str],
+        command: Optional[str],
+        kind: str,
+        response: "Response",
+    ) -> None:
+        self.observe_interaction(
+            peer,
+            command,
+            kind,
+            latency=response.timing.time_to_first_message,
+            duration=response.timing.duration,
+            num_messages=response.num_messages,
+        )
+
+    def observe_timeout(
+        self, peer: Union[int, str], command: Optional[str], kind: str
+    ) -> None:
+        self.interactions.inc(peer=peer, command=command, kind=kind)
+        self.timeouts.inc(peer=peer, command=command, kind=kind)
+
+    def observe_flood_wait(self, peer: Union[int, str], kind: str) -> None:
+        self.flood_waits.inc(peer=peer, kind=kind)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
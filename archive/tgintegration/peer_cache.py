@@ -0,0 +1,139 @@
+"""
+An on-disk cache for the information that `BotController.initialize` fetches about its peer.
+"""
+import json
+import sqlite3
+from pathlib import Path
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+from pyrogram.raw.types import BotCommand
+from pyrogram.raw.types import InputPeerUser
+from pyrogram.types import User
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+
+_USER_FIELDS = (
+    "id",
+    "is_bot",
+    "is_verified",
+    "first_name",
+    "last_name",
+    "username",
+    "language_code",
+)
+
+
+class CachedPeer(NamedTuple):
+    input_peer: InputPeerUser
+    user: User
+    command_list: List[BotCommand]
+
+
+class PeerCache:
+    """
+    Persists resolved peers, their user information and (for bots) their command lists in a local SQLite database,
+    so that a controller can be initialized without any network requests while the entry is younger than `ttl`
+    seconds. Expired entries are refreshed the next time they are needed.
+
+    Entries are stored per `account` (the name of the controlling client), as Telegram's access hashes are only
+    valid for the account that resolved the peer.
+
+    The age of entries is measured with the wall-clock `time` of the `clock`, which defaults to the clock of the
+    `BotController` that the cache is passed to, or to real time if it is used on its own.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "tgintegration_peers.sqlite",
+        ttl: float = 24 * 60 * 60,
+        clock: Clock = None,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.clock = clock
+
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS peers (
+                account TEXT NOT NULL,
+                peer TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account, peer)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def get(self, account: str, peer: Union[int, str]) -> Optional[CachedPeer]:
+        """
+        Returns the cached information about the `peer`, or `None` if there is no entry or it has expired.
+        """
+        row = self._connection.execute(
+            "SELECT data, updated_at FROM peers WHERE account = ? AND peer = ?",
+            (account, str(peer)),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        data, updated_at = row
+        if self._time() - updated_at >= self.ttl:
+            return None
+
+        return _deserialize(json.loads(data))
+
+    def put(self, account: str, peer: Union[int, str], cached: CachedPeer) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO peers (account, peer, data, updated_at) VALUES (?, ?, ?, ?)",
+            (account, str(peer), json.dumps(_serialize(cached)), self._time()),
+        )
+        self._connection.commit()
+
+    def invalidate(self, account: str = None, peer: Union[int, str] = None) -> None:
+        """
+        Drops the entries matching the given `account` and/or `peer`, or all entries if no arguments are given.
+        """
+        conditions = {"account": account, "peer": None if peer is None else str(peer)}
+        given = {
+            column: value for column, value in conditions.items() if value is not None
+        }
+        where = " AND ".join(f"{column} = ?" for column in given)
+        self._connection.execute(
+            "DELETE FROM peers" + (f" WHERE {where}" if where else ""),
+            tuple(given.values()),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _time(self) -> float:
+        return (self.clock or REAL_CLOCK).time()
+
+
+def _serialize(cached: CachedPeer) -> dict:
+    return {
+        "input_peer": {
+            "user_id": cached.input_peer.user_id,
+            "access_hash": cached.input_peer.access_hash,
+        },
+        "user": {f: getattr(cached.user, f) for f in _USER_FIELDS},
+        "commands": [
+            {"command": c.command, "description": c.description}
+            for c in cached.command_list
+        ],
+    }
+
+
+def _deserialize(data: dict) -> CachedPeer:
+    return CachedPeer(
+        input_peer=InputPeerUser(**data["input_peer"]),
+        user=User(**data["user"]),
+        command_list=[BotCommand(**c) for c in data["commands"]],
+    )
@@ -0,0 +1,253 @@
+"""
+Creates session strings for test accounts, logging in many sessions at once.
+"""
+import asyncio
+import logging
+import re
+from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from pyrogram import Client
+from pyrogram.errors import PhoneCodeInvalid
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+from tgintegration.deadline_scheduler import get_scheduler
+from tgintegration.update_router import route_handlers_transient
+
+logger = logging.getLogger(__name__)
+
+# Telegram's service notifications deliver login codes to the logged in sessions of an account
+SERVICE_NOTIFICATIONS_ID = 777000
+
+LOGIN_CODE_PATTERN = re.compile(r"\b(\d{5,6})\b")
+
+
+def get_test_login_code(phone_number: str) -> Optional[str]:
+    """
+    Returns the fixed login code of a phone number on Telegram's test servers, which have the form 99966XYYYY and log
+    in with X repeated five times, or `None` for any other number.
+    """
+    match = re.fullmatch(r"99966(\d)\d{4}", re.sub(r"\D", "", phone_number))
+    return match.group(1) * 5 if match else None
+
+
+class LoginCodeDemultiplexer:
+    """
+    Hands the login codes that arrive for an account to the pending logins of that account.
+
+    Codes are not tied to the login that requested them, so when several logins of the same account are pending,
+    each of them takes a code it has not tried yet and puts it back if it turns out to belong to another login.
+    """
+
+    def __init__(self, clock: Clock = None):
+        self.clock = clock or REAL_CLOCK
+        self._codes: Dict[str, List[str]] = {}
+        self._waiters: Dict[str, List[Tuple[asyncio.Future, Set[str]]]] = {}
+
+    def feed(self, phone_number: str, code: str) -> None:
+        """
+        Passes the `code` to a login of the account with the `phone_number` that is waiting for one and has not tried
+        it yet, or keeps it until there is one.
+        """
+        for future, tried in self._waiters.get(phone_number, ()):
+            if not future.done() and code not in tried:
+                future.set_result(code)
+                return
+        self._codes.setdefault(phone_number, []).append(code)
+
+    def feed_message(self, phone_number: str, message: Message) -> None:
+        match = LOGIN_CODE_PATTERN.search(message.text or "")
+        if match:
+            logger.debug(f"Received a login code for {phone_number}.")
+            self.feed(phone_number, match.group(1))
+
+    async def next_code(
+        self, phone_number: str, tried: Set[str], timeout: float
+    ) -> str:
+        """
+        Waits for a code of the account that is not among the `tried` ones.
+
+        Raises:
+            asyncio.TimeoutError: If no such code arrives within `timeout` seconds.
+        """
+        codes = self._codes.get(phone_number, [])
+        for code in codes:
+            if code not in tried:
+                codes.remove(code)
+                return code
+
+        scheduler = get_scheduler(self.clock)
+        waiter = (asyncio.get_running_loop().create_future(), tried)
+        waiters = self._waiters.setdefault(phone_number, [])
+        waiters.append(waiter)
+        try:
+            return await scheduler.wait(waiter[0], scheduler.now() + timeout)
+        finally:
+            waiters.remove(waiter)
+
+    @asynccontextmanager
+    async def intercept(self, client: Client, phone_number: str) -> AsyncIterator[None]:
+        """
+        Feeds the codes that the (logged in and started) `client` of the account with the `phone_number` receives
+        while inside the context.
+        """
+
+        async def on_message(_, message: Message):
+            self.feed_message(phone_number, message)
+
+        async with route_handlers_transient(
+            client, SERVICE_NOTIFICATIONS_ID, [MessageHandler(on_message)]
+        ):
+            yield
+
+
+class SessionProvisioner:
+    """
+    Logs in new sessions for accounts concurrently and exports their session strings.
+
+    The login codes of an account are read from the service notifications of a session of the same account that is
+    logged in already (an interceptor). On Telegram's test servers, the fixed codes of the test phone numbers are
+    used instead.
+
+    Args:
+        client_factory: Creates a new, unauthorized client (e.g. with `in_memory=True`) for a phone number.
+        interceptors: Logged in clients by the phone number of their account. They get started if necessary.
+        test_mode: Whether the clients connect to Telegram's test servers.
+        max_concurrency: The maximum number of logins in progress at the same time.
+        code_timeout: Seconds to wait for the code of a login before giving up.
+        clock: Defaults to the clock of the first interceptor (if any), otherwise real time.
+
+    Examples:
+        ``` python
+        provisioner = SessionProvisioner(
+            lambda phone: Client(":memory:", api_id, api_hash, in_memory=True, phone_number=phone),
+            interceptors={phone: existing_client},
+        )
+        session_strings = await provisioner.provision_many([phone] * 20)
+        ```
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], Client],
+        interceptors: Mapping[str, Client] = None,
+        *,
+        test_mode: bool = False,
+        max_concurrency: int = 5,
+        code_timeout: float = 120,
+        clock: Clock = None,
+    ):
+        self.client_factory = client_factory
+        self.interceptors = dict(interceptors or {})
+        self.test_mode = test_mode
+        self.max_concurrency = max_concurrency
+        self.code_timeout = code_timeout
+
+        first_interceptor = next(iter(self.interceptors.values()), None)
+        self.clock = clock or getattr(first_interceptor, "clock", None) or REAL_CLOCK
+        self.demultiplexer = LoginCodeDemultiplexer(self.clock)
+
+    @asynccontextmanager
+    async def _intercepting(self) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            for phone_number, client in self.interceptors.items():
+                if not client.is_connected:
+                    await client.start()
+                    stack.push_async_callback(client.stop)
+                await stack.enter_async_context(
+                    self.demultiplexer.intercept(client, phone_number)
+                )
+            yield
+
+    async def _get_code(self, phone_number: str, tried: Set[str]) -> str:
+        test_code = get_test_login_code(phone_number) if self.test_mode else None
+        if test_code is not None:
+            if test_code in tried:
+                raise PhoneCodeInvalid()
+            return test_code
+
+        if phone_number not in self.interceptors:
+            raise ValueError(
+                f"Cannot receive login codes for {phone_number} without a logged in session of the account."
+            )
+        try:
+            return await self.demultiplexer.next_code(
+                phone_number, tried, self.code_timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"No login code for {phone_number} arrived within {self.code_timeout} seconds."
+            ) from None
+
+    async def _login(self, phone_number: str) -> str:
+        client = self.client_factory(phone_number)
+        await client.connect()
+        try:
+            sent_code = await client.send_code(phone_number)
+            tried: Set[str] = set()
+            while True:
+                code = await self._get_code(phone_number, tried)
+                try:
+                    await client.sign_in(phone_number, sent_code.phone_code_hash, code)
+                    break
+                except PhoneCodeInvalid:
+                    # The code was requested by another login of the same account
+                    tried.add(code)
+                    self.demultiplexer.feed(phone_number, code)
+
+            logger.info(f"Logged in a new session of {phone_number}.")
+            return await client.export_session_string()
+        finally:
+            await client.disconnect()
+
+    async def provision(self, phone_number: str) -> str:
+        """
+        Logs in a new session of the account with the `phone_number` and returns its session string.
+        """
+        async with self._intercepting():
+            return await self._login(phone_number)
+
+    async def provision_many(
+        self, phone_numbers: Iterable[str], *, return_exceptions: bool = True
+    ) -> List[Union[str, BaseException]]:
+        """
+        Logs in a new session for each of the `phone_numbers` (which may repeat to create several sessions of the
+        same account), with up to `max_concurrency` logins at a time.
+
+        Args:
+            phone_numbers: The accounts to create sessions for.
+            return_exceptions: Whether the errors of failed logins are returned in place of their session string.
+                Otherwise the first error is raised once all logins have finished.
+
+        Returns:
+            The session strings (or errors), in the order of the `phone_numbers`.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def login(phone_number: str) -> str:
+            async with semaphore:
+                return await self._login(phone_number)
+
+        async with self._intercepting():
+            results = await asyncio.gather(
+                *(login(p) for p in phone_numbers), return_exceptions=True
+            )
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return list(results)
@@ -0,0 +1,195 @@
+"""
+Throttles the requests that controllers send to Telegram with token buckets per account and per peer.
+"""
+import logging
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Allows bursts of up to `capacity` requests and refills at `rate` tokens per second.
+
+    Tokens are reserved instead of waited for: The balance may go negative, and every caller is told how long to
+    wait for its token. Concurrent callers are thereby served in order without any locking.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("The rate must be positive and the capacity at least 1.")
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = now
+        self._updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+    def reserve(self, now: float) -> float:
+        """
+        Takes a token and returns the number of seconds until it is actually available.
+        """
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, now: float, seconds: float, factor: float, min_rate: float):
+        """
+        Blocks the bucket for `seconds` and lowers its rate by `factor` (down to `min_rate`).
+        """
+        self._refill(now)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.rate = max(self.rate * factor, min(min_rate, self.max_rate))
+        self.tokens = min(self.tokens, 0)
+
+    def recover(self, now: float, step: float) -> None:
+        """
+        Raises a lowered rate by `step` (a fraction of the configured rate), up to the configured rate.
+        """
+        if self.rate < self.max_rate:
+            self._refill(now)
+            self.rate = min(self.max_rate, self.rate + step * self.max_rate)
+
+
+class RateLimiter:
+    """
+    Paces outgoing requests with a token bucket per account (shared by all peers of the account) and one per peer of
+    every account. Either limit can be disabled by passing `None` as its rate.
+
+    When Telegram answers with a `FloodWait`, the affected buckets are blocked for the requested duration and their
+    refill rate is multiplied by `backoff`. Every successful request raises a lowered rate again by `recovery` times
+    the configured rate. This additive increase and multiplicative decrease converges towards the highest rate that
+    Telegram accepts for an account.
+
+    Share one instance between all controllers of an account for the account limit to take effect across them.
+
+    Args:
+        account_rate: Requests per second and account.
+        account_burst: Number of requests an account may send at once before being throttled.
+        peer_rate: Requests per second and peer.
+        peer_burst: Number of requests per peer that may be sent at once before being throttled.
+        backoff: Factor to lower the rate of the affected buckets by upon a `FloodWait`.
+        recovery: Fraction of the configured rate that a lowered rate is raised by per successful request.
+        min_rate: The rate is never lowered below this many requests per second.
+        clock: Defaults to real time.
+    """
+
+    def __init__(
+        self,
+        account_rate: Optional[float] = 10.0,
+        account_burst: float = 10,
+        peer_rate: Optional[float] = 1.0,
+        peer_burst: float = 1,
+        *,
+        backoff: float = 0.5,
+        recovery: float = 0.01,
+        min_rate: float = 0.02,
+        clock: Clock = None,
+    ):
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.peer_rate = peer_rate
+        self.peer_burst = peer_burst
+        self.backoff = backoff
+        self.recovery = recovery
+        self.min_rate = min_rate
+        self.clock = clock or REAL_CLOCK
+
+        self._account_buckets: Dict[Hashable, TokenBucket] = {}
+        self._peer_buckets: Dict[Tuple[Hashable, Hashable], TokenBucket] = {}
+        self._blocked_until: Dict[Hashable, float] = {}
+
+    def _get_buckets(
+        self, account: Hashable, peer: Optional[Hashable]
+    ) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        now = self.clock.now()
+
+        account_bucket = None
+        if self.account_rate:
+            account_bucket = self._account_buckets.get(account)
+            if account_bucket is None:
+                account_bucket = self._account_buckets[account] = TokenBucket(
+                    self.account_rate, self.account_burst, now
+                )
+
+        peer_bucket = None
+        if self.peer_rate and peer is not None:
+            peer_bucket = self._peer_buckets.get((account, peer))
+            if peer_bucket is None:
+                peer_bucket = self._peer_buckets[(account, peer)] = TokenBucket(
+                    self.peer_rate, self.peer_burst, now
+                )
+
+        return account_bucket, peer_bucket
+
+    def reserve(self, account: Hashable, peer: Optional[Hashable] = None) -> float:
+        """
+        Takes a token from the buckets of the `account` and the `peer` and returns the number of seconds to wait
+        before sending the request.
+        """
+        now = self.clock.now()
+        return max(
+            (b.reserve(now) for b in self._get_buckets(account, peer) if b),
+            default=0.0,
+        )
+
+    async def acquire(self, account: Hashable, peer: Optional[Hashable] = None):
+        """
+        Waits until a request to the `peer` may be sent from the `account`.
+        """
+        wait = self.reserve(account, peer)
+        if wait > 0:
+            logger.debug(f"Throttling request to {peer} for {wait:.2f} seconds...")
+            await self.clock.sleep(wait)
+
+    def on_success(self, account: Hashable, peer: Optional[Hashable] = None):
+        now = self.clock.now()
+        for bucket in self._get_buckets(account, peer):
+            if bucket:
+                bucket.recover(now, self.recovery)
+
+    def on_flood_wait(
+        self, account: Hashable, peer: Optional[Hashable], seconds: float
+    ) -> None:
+        """
+        Feeds back a `FloodWait` of the given number of `seconds` received for a request to the `peer`.
+        """
+        now = self.clock.now()
+        self._blocked_until[account] = max(
+            self._blocked_until.get(account, now), now + seconds
+        )
+        account_bucket, peer_bucket = self._get_buckets(account, peer)
+        for bucket in (account_bucket, peer_bucket):
+            if bucket:
+                bucket.block(now, seconds, self.backoff, self.min_rate)
+        logger.warning(
+            f"FloodWait of {seconds} seconds for {account} (peer {peer}), lowered the rate to "
+            f"{account_bucket.rate if account_bucket else None} requests per second."
+        )
+
+    def get_blocked_until(self, account: Hashable) -> float:
+        """
+        The point in time of the `clock` until which the latest `FloodWait` of the `account` (for any peer) lasts.
+        """
+        return self._blocked_until.get(account, float("-inf"))
+
+    def get_rate(self, account: Hashable, peer: Optional[Hashable] = None) -> float:
+        """
+        The effective number of requests per second currently allowed for the `peer` (or the whole `account`).
+        """
+        rates = [b.rate for b in self._get_buckets(account, peer) if b]
+        return min(rates) if rates else float("inf")
@@ -0,0 +1,138 @@
+"""
+Retries requests to Telegram that failed with a transient error, within a budget per interaction.
+"""
+import logging
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+
+from pyrogram.errors import FloodWait
+from pyrogram.errors import InternalServerError
+
+from tgintegration.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    """
+    The maximum number of times a single request is retried. Set to `0` to disable retrying.
+    """
+
+    budget: int = 5
+    """
+    The maximum number of retries of all requests within one interaction (e.g. a `collect` call or a click), so that
+    an unhealthy peer fails fast instead of multiplying the duration of a test.
+    """
+
+    base_delay: float = 1.0
+    """
+    The delay in seconds before the first retry after an `InternalServerError`. It doubles with every further retry.
+    """
+
+    max_delay: float = 30.0
+    """
+    The upper bound in seconds of the exponential backoff.
+    """
+
+    jitter: float = 0.5
+    """
+    The fraction of the backoff delay that is randomized, so that concurrent controllers do not retry in lockstep.
+    """
+
+    max_flood_wait: float = 120.0
+    """
+    `FloodWait`s of more seconds than this are raised right away instead of being waited for.
+    """
+
+    def get_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        The number of seconds to wait before the retry following the given `attempt` (starting at 0) that failed
+        with the `error`, or `None` if the error must not be retried.
+        """
+        if isinstance(error, FloodWait):
+            # Telegram tells exactly how long to wait, so neither backoff nor jitter apply
+            return error.value if error.value <= self.max_flood_wait else None
+        if isinstance(error, InternalServerError):
+            delay = min(self.max_delay, self.base_delay * 2**attempt)
+            return delay * (1 - self.jitter * random.random())
+        return None
+
+
+class RetryBudget:
+    """
+    The number of retries left to all requests of an interaction.
+    """
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self.used = 0
+
+    def spend(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.used += 1
+        return True
+
+
+_budget: ContextVar[Optional[RetryBudget]] = ContextVar(
+    "tgintegration_retry_budget", default=None
+)
+
+
+@contextmanager
+def retry_budget(retries: int):
+    """
+    Limits the retries of all requests made within this context (in the current task and the tasks it spawns) to
+    `retries` in total.
+
+    Yields:
+        The `RetryBudget`, which tells how many retries were `used`.
+    """
+    budget = RetryBudget(retries)
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+def current_retry_budget() -> Optional[RetryBudget]:
+    return _budget.get()
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]], policy: RetryPolicy, clock: Clock
+) -> T:
+    """
+    Awaits `call()` and calls it again whenever it fails with an error that the `policy` deems transient, for as
+    long as both the policy and the current `retry_budget` (if any) allow.
+    """
+    budget = current_retry_budget()
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except (FloodWait, InternalServerError) as e:
+            delay = policy.get_delay(e, attempt)
+            if (
+                delay is None
+                or attempt >= policy.max_retries
+                or (budget is not None and not budget.spend())
+            ):
+                raise
+            logger.warning(
+                f"{e.__class__.__name__} in attempt #{attempt + 1}, retrying in {delay:.2f} seconds..."
+            )
+            await clock.sleep(delay)
+            attempt += 1
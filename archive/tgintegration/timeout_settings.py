@@ -1,5 +1,10 @@
 from dataclasses import dataclass
 from typing import Optional
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tgintegration.adaptive_wait import AdaptiveWait
+    from tgintegration.clock import Clock
 
 
 @dataclass
@@ -19,3 +24,20 @@ class TimeoutSettings:
     """
     Whether to raise an exception when a timeout occurs or to fail with a log message.
     """
+
+    adaptive_wait: Optional["AdaptiveWait"] = None
+    """
+    When set, the duration to wait for consecutive messages is learned from the gaps between the peer's messages
+    in previous interactions. `wait_consecutive` then only serves as the fallback until enough gaps were observed.
+    """
+
+    adaptive_key: Optional[str] = None
+    """
+    The kind of interaction (typically the command that was sent) that learned gaps are associated with in
+    addition to the peer. It is read after the interaction, so it may be set while performing it.
+    """
+
+    clock: Optional["Clock"] = None
+    """
+    The clock that all of the durations above are measured with. Defaults to real time.
+    """
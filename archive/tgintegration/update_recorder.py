@@ -1,24 +1,51 @@
 import asyncio
+import heapq
+import itertools
 import logging
-import time
 from typing import Callable
 from typing import List
+from typing import Set
 from typing import Tuple
 
 from pyrogram.types import Message
 
+from tgintegration.clock import Clock
+from tgintegration.clock import REAL_CLOCK
+
 logger = logging.getLogger(__name__)
 
+MessagePredicate = Callable[[Message], bool]
+
 
 class MessageRecorder:
-    def __init__(self):
+    """
+    Records the messages of an interaction and lets collectors wait for them.
+
+    Waiting for a number of messages costs O(log n) per waiter as these waiters are kept in a min-heap keyed on the
+    message count they are waiting for. Custom predicates are only evaluated against each newly recorded message.
+    Waiters are dropped as soon as they have fired or were abandoned (e.g. because of a timeout).
+    """
+
+    def __init__(
+        self, clock: Clock = None, on_record: Callable[[Message], None] = None
+    ):
         self.messages: List[Message] = []
+        self._clock = clock or REAL_CLOCK
+        self._on_record = on_record
+        self.receive_times: List[float] = []
+        """
+        When each message was recorded, in terms of the monotonic `Clock.now`.
+        """
         self._lock = asyncio.Lock()
 
         self.any_received = asyncio.Event()
-        self._event_conditions: List[
-            Tuple[Callable[[List[Message]], bool], asyncio.Event]
-        ] = [(bool, self.any_received)]
+
+        self._count_waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._predicate_waiters: List[Tuple[MessagePredicate, asyncio.Future]] = []
+        self._counter = itertools.count()
+        # The futures of `_count_waiters` that are still in the heap, and those of them that have been abandoned
+        self._queued: Set[asyncio.Future] = set()
+        self._abandoned: Set[asyncio.Future] = set()
 
         self._is_completed = False
 
@@ -27,22 +54,81 @@ class MessageRecorder:
             return
 
         async with self._lock:
-            message.exact_timestamp = time.time()
+            message.exact_timestamp = self._clock.time()
+            self.receive_times.append(self._clock.now())
             self.messages.append(message)
-            for (pred, ev) in self._event_conditions:
-                if pred(self.messages):
-                    ev.set()
+            self.any_received.set()
+            if self._on_record:
+                self._on_record(message)
 
-    async def wait_until(self, predicate: Callable[[List[Message]], bool]):
+            n = len(self.messages)
+            while self._count_waiters and self._count_waiters[0][0] <= n:
+                _, _, fut = heapq.heappop(self._count_waiters)
+                self._queued.discard(fut)
+                self._abandoned.discard(fut)
+                if not fut.done():
+                    fut.set_result(None)
 
-        async with self._lock:
-            if predicate(self.messages):
-                return
+            if self._predicate_waiters:
+                pending = []
+                for (pred, fut) in self._predicate_waiters:
+                    if fut.done():
+                        continue
+                    if pred(message):
+                        fut.set_result(None)
+                        continue
+                    pending.append((pred, fut))
+                self._predicate_waiters = pending
 
-            ev = asyncio.Event()
-            self._event_conditions.append((predicate, ev))
+    def wait_for_count(self, count: int) -> asyncio.Future:
+        """
+        Returns a future that completes as soon as at least `count` messages have been recorded.
+        """
+        fut = asyncio.get_event_loop().create_future()
+        if len(self.messages) >= count:
+            fut.set_result(None)
+            return fut
+
+        heapq.heappush(self._count_waiters, (count, next(self._counter), fut))
+        self._queued.add(fut)
+        fut.add_done_callback(self._on_count_waiter_done)
+        return fut
+
+    def waiter(self, predicate: MessagePredicate) -> asyncio.Future:
+        """
+        Returns a future that completes as soon as a message satisfying the `predicate` is recorded. Messages that
+        have been recorded before are checked once upon registration.
+
+        Unlike `wait_until`, this does not require a task of its own, which makes it cheap to combine with a
+        `DeadlineScheduler`.
+        """
+        fut = asyncio.get_event_loop().create_future()
+        if any(predicate(m) for m in self.messages):
+            fut.set_result(None)
+        else:
+            self._predicate_waiters.append((predicate, fut))
+        return fut
+
+    async def wait_until(self, predicate: Callable[[List[Message]], bool]):
+        """
+        Waits until the list of all recorded messages satisfies the `predicate`. The predicate is evaluated once
+        per recorded message.
+        """
+        if not predicate(self.messages):
+            await self.waiter(lambda _: predicate(self.messages))
+
+    def _on_count_waiter_done(self, fut: asyncio.Future) -> None:
+        # This callback runs some time after the cancellation, when the waiter may already have been popped
+        if not fut.cancelled() or fut not in self._queued:
+            return
 
-        await ev.wait()
+        # Waiters that timed out stay in the heap until their count is reached, so they're compacted regularly
+        self._abandoned.add(fut)
+        if len(self._abandoned) > len(self._count_waiters) // 2:
+            self._count_waiters = [w for w in self._count_waiters if not w[2].done()]
+            heapq.heapify(self._count_waiters)
+            self._queued = {w[2] for w in self._count_waiters}
+            self._abandoned.clear()
 
     def stop(self):
         self._is_completed = True
@@ -0,0 +1,164 @@
+"""
+A single, long-lived update handler per `Client` that fans incoming messages out to the active collectors.
+"""
+import logging
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Type
+from weakref import WeakKeyDictionary
+
+from pyrogram import Client
+from pyrogram.handlers import EditedMessageHandler
+from pyrogram.handlers import MessageHandler
+from pyrogram.handlers.handler import Handler
+from pyrogram.types import Message
+
+from tgintegration.handler_utils import find_free_group
+
+logger = logging.getLogger(__name__)
+
+ChatId = Optional[int]
+
+_routers: "WeakKeyDictionary[Client, UpdateRouter]" = WeakKeyDictionary()
+
+
+class UpdateRouter:
+    """
+    Registers one `MessageHandler` and one `EditedMessageHandler` with the Pyrogram dispatcher of a `client` and
+    forwards every update to the handlers that have been routed to the update's chat.
+
+    Adding and removing routes is a plain dictionary operation, so opening a collector neither takes the
+    dispatcher's locks nor re-sorts its handler groups. Routes registered under the chat id `None` receive the
+    updates of all chats.
+
+    The router only keeps a weak reference to its `client`, so that the client can be garbage-collected together with
+    its router.
+    """
+
+    def __init__(self, client: Client):
+        self._client_ref = weakref.ref(client)
+        self.group: Optional[int] = None
+        self._routes: Dict[ChatId, List[Handler]] = {}
+
+        self._message_handler = MessageHandler(self._on_message)
+        self._edited_message_handler = EditedMessageHandler(self._on_edited_message)
+
+    @property
+    def client(self) -> Optional[Client]:
+        return self._client_ref()
+
+    @property
+    def is_installed(self) -> bool:
+        """
+        Whether the router's handlers are currently registered with the dispatcher.
+        Pyrogram drops all handler groups when a client is stopped, hence this needs to be checked before use.
+        """
+        client = self.client
+        if self.group is None or client is None:
+            return False
+        handlers = client.dispatcher.groups.get(self.group)
+        return bool(handlers) and self._message_handler in handlers
+
+    async def install(self) -> None:
+        """
+        Registers the router's handlers in a dedicated dispatcher group if they are not registered yet.
+        """
+        if self.is_installed:
+            return
+
+        dispatcher = self.client.dispatcher
+        for lock in dispatcher.locks_list:
+            await lock.acquire()
+
+        try:
+            self.group = find_free_group(dispatcher)
+            dispatcher.groups[self.group] = [
+                self._message_handler,
+                self._edited_message_handler,
+            ]
+            dispatcher.groups = OrderedDict(sorted(dispatcher.groups.items()))
+        finally:
+            for lock in dispatcher.locks_list:
+                lock.release()
+
+        logger.debug(f"Update router installed in dispatcher group {self.group}.")
+
+    def add_route(self, chat_id: ChatId, handler: Handler) -> None:
+        self._routes.setdefault(chat_id, []).append(handler)
+
+    def remove_route(self, chat_id: ChatId, handler: Handler) -> None:
+        handlers = self._routes.get(chat_id)
+        if not handlers or handler not in handlers:
+            raise ValueError(f"Handler is not routed to chat {chat_id}.")
+
+        handlers.remove(handler)
+        if not handlers:
+            del self._routes[chat_id]
+
+    def num_routes(self, chat_id: ChatId = None) -> int:
+        return len(self._routes.get(chat_id, ()))
+
+    async def _on_message(self, client: Client, message: Message) -> None:
+        await self._dispatch(client, message, MessageHandler)
+
+    async def _on_edited_message(self, client: Client, message: Message) -> None:
+        await self._dispatch(client, message, EditedMessageHandler)
+
+    async def _dispatch(
+        self, client: Client, message: Message, handler_type: Type[Handler]
+    ) -> None:
+        chat_id = message.chat.id if message.chat else None
+
+        # Take a snapshot as routes may be added or removed while the callbacks are awaited
+        candidates = list(self._routes.get(chat_id, ()))
+        if chat_id is not None:
+            candidates.extend(self._routes.get(None, ()))
+
+        for handler in candidates:
+            if not isinstance(handler, handler_type):
+                continue
+
+            try:
+                if not await handler.check(client, message):
+                    continue
+                await handler.callback(client, message)
+            except Exception as e:
+                logger.exception(e)
+
+
+async def get_router(client: Client) -> UpdateRouter:
+    """
+    Returns the `UpdateRouter` of the given `client`, creating and installing it on first use.
+    """
+    router = _routers.get(client)
+    if router is None:
+        router = UpdateRouter(client)
+        _routers[client] = router
+
+    await router.install()
+    return router
+
+
+@asynccontextmanager
+async def route_handlers_transient(
+    client: Client, chat_id: ChatId, handlers: List[Handler]
+) -> AsyncIterator[None]:
+    """
+    Routes the given `handlers` to updates of the chat with `chat_id` (or all chats if `None`) for the duration of
+    the context manager body.
+    """
+    router = await get_router(client)
+
+    for handler in handlers:
+        router.add_route(chat_id, handler)
+
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            router.remove_route(chat_id, handler)